@@ -0,0 +1,236 @@
+"""
+b3_scraper.application.backfill
+Reconstrói partições históricas executando fetch -> parse -> store para um intervalo de pregões.
+"""
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from b3_scraper.config import settings
+from b3_scraper.domain.calendar import trading_days
+from b3_scraper.infrastructure.parser import Parser
+from b3_scraper.infrastructure.scraper import Scraper
+from b3_scraper.application.orchestrator import (
+    archive_payload,
+    build_archive,
+    build_scraper,
+    build_storage,
+    parse_targets,
+    prefix_for,
+    update_ticker_index,
+)
+
+if TYPE_CHECKING:
+    from b3_scraper.infrastructure.archive import PayloadArchive
+    from b3_scraper.infrastructure.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DayResult:
+    """
+    Resultado do backfill de um pregão:
+    - status: "ok", "skipped" (partição já existente), "mismatch" (a B3 devolveu outra data)
+      ou "failed"
+    """
+    index: str
+    segment: str
+    day: date
+    status: str
+    records: int = 0
+    error: Optional[str] = None
+
+
+class Checkpoint:
+    """
+    Registro local dos pregões já concluídos, para que um backfill interrompido
+    recomece de onde parou. Gravado de forma atômica (arquivo temporário + rename).
+    """
+    def __init__(self, path: str):
+        """
+        :param path: caminho do arquivo JSON de checkpoint
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._done: Dict[str, Set[str]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                stored = json.load(f)
+            self._done = {key: set(days) for key, days in stored.get("done", {}).items()}
+            logger.info("Loaded checkpoint %s with %d completed days",
+                        path, sum(len(days) for days in self._done.values()))
+
+    @staticmethod
+    def _key(index: str, segment: str) -> str:
+        return f"{index}:{segment}"
+
+    def is_done(self, index: str, segment: str, day: date) -> bool:
+        return day.isoformat() in self._done.get(self._key(index, segment), set())
+
+    def mark_done(self, index: str, segment: str, day: date) -> None:
+        """
+        Marca o pregão como concluído e persiste o checkpoint.
+        """
+        with self._lock:
+            self._done.setdefault(self._key(index, segment), set()).add(day.isoformat())
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"done": {key: sorted(days) for key, days in self._done.items()}}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+
+# Clientes reaproveitados pelas tarefas de um mesmo worker (thread ou processo)
+_worker_scraper: Optional[Scraper] = None
+_worker_storage: Optional["Storage"] = None
+_worker_archive: Optional["PayloadArchive"] = None
+
+
+def _init_worker(workers: int) -> None:
+    """
+    Cria os clientes HTTP/S3 do worker. No modo thread é chamado uma vez e os
+    clientes são compartilhados; no modo processo roda uma vez por processo.
+    """
+    global _worker_scraper, _worker_storage, _worker_archive
+    _worker_scraper = build_scraper(workers)
+    _worker_storage = build_storage()
+    _worker_archive = build_archive()
+
+
+def _backfill_day(index: str, segment: str, day: date, force: bool) -> DayResult:
+    """
+    Executa fetch -> parse -> store de um pregão.
+    """
+    prefix = prefix_for(index)
+    result = DayResult(index=index, segment=segment, day=day, status="ok")
+    try:
+        if not force and _worker_storage.partition_exists(day.isoformat(), prefix=prefix):
+            result.status = "skipped"
+            return result
+
+        if settings.STREAMING:
+            return _backfill_day_streaming(result, prefix)
+
+        data = _worker_scraper.fetch_json_all(
+            page_size=settings.PAGE_SIZE,
+            max_workers=settings.FETCH_WORKERS,
+            index=index,
+            segment=segment,
+            trade_date=day,
+        )
+        archive_payload(_worker_archive, data, index, segment)
+        table = Parser().parse_json_table(data)
+        # Nunca grava a carteira de outro dia na partição solicitada
+        dates = set(table["record_date"].cast("string").to_pylist())
+        if dates != {day.isoformat()}:
+            result.status = "mismatch"
+            result.error = f"B3 retornou {table.num_rows} registros para {sorted(map(str, dates))}"
+            return result
+
+        _worker_storage.save_table(table, prefix=prefix)
+        result.records = table.num_rows
+        update_ticker_index(index, table)
+    except Exception as e:
+        result.status = "failed"
+        result.error = str(e)
+    return result
+
+
+class _DateMismatch(Exception):
+    pass
+
+
+def _backfill_day_streaming(result: DayResult, prefix: str) -> DayResult:
+    """
+    Variante de _backfill_day em lotes (ver orchestrator._stream_index). A data de cada
+    lote é conferida antes de gravá-lo; uma divergência aborta os uploads do pregão.
+    """
+    day = result.day.isoformat()
+    pages = _worker_scraper.iter_json_pages(
+        page_size=settings.PAGE_SIZE,
+        max_workers=settings.FETCH_WORKERS,
+        index=result.index,
+        segment=result.segment,
+        trade_date=result.day,
+    )
+
+    def checked(batches):
+        for table in batches:
+            dates = set(table["record_date"].cast("string").to_pylist())
+            if dates != {day}:
+                raise _DateMismatch(f"B3 retornou registros para {sorted(map(str, dates))}")
+            yield table
+
+    try:
+        partitions = _worker_storage.save_stream(
+            checked(Parser().iter_json_tables(pages, settings.STREAM_BATCH_SIZE)), prefix=prefix
+        )
+        result.records = sum(partition.rows for partition in partitions)
+    except _DateMismatch as e:
+        result.status = "mismatch"
+        result.error = str(e)
+    return result
+
+
+def backfill(
+    start: date,
+    end: date,
+    targets: Optional[List[Tuple[str, str]]] = None,
+    workers: int = None,
+    executor: str = "thread",
+    checkpoint_path: str = None,
+    force: bool = False,
+) -> List[DayResult]:
+    """
+    Executa o backfill de todos os pregões entre start e end (inclusive).
+    :param targets: pares (índice, segmento); default: settings.INDEX/SEGMENT
+    :param workers: limite de pregões processados simultaneamente (default: settings.BACKFILL_WORKERS)
+    :param executor: "thread" ou "process"
+    :param checkpoint_path: arquivo de checkpoint (default: settings.BACKFILL_CHECKPOINT)
+    :param force: regrava partições já existentes
+    :return: resultado por índice/pregão (pregões do checkpoint não são reprocessados)
+    """
+    targets = targets or parse_targets([settings.INDEX])
+    workers = max(1, workers or settings.BACKFILL_WORKERS)
+    checkpoint = Checkpoint(checkpoint_path or settings.BACKFILL_CHECKPOINT)
+
+    tasks = [
+        (index, segment, day)
+        for day in trading_days(start, end)
+        for index, segment in targets
+        if force or not checkpoint.is_done(index, segment, day)
+    ]
+    logger.info("Backfill of %d index/day pairs between %s and %s with %d %s workers",
+                len(tasks), start, end, workers, executor)
+    if not tasks:
+        return []
+
+    if executor == "process":
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(1,))
+    elif executor == "thread":
+        _init_worker(workers)
+        pool = ThreadPoolExecutor(max_workers=workers)
+    else:
+        raise ValueError(f"Executor desconhecido: {executor}")
+
+    results: List[DayResult] = []
+    with pool:
+        futures = [pool.submit(_backfill_day, index, segment, day, force) for index, segment, day in tasks]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result.status in ("ok", "skipped"):
+                checkpoint.mark_done(result.index, result.segment, result.day)
+                logger.info("Backfill %s %s: %s (%d records)", result.index, result.day, result.status, result.records)
+            else:
+                logger.error("Backfill %s %s: %s – %s", result.index, result.day, result.status, result.error)
+
+    results.sort(key=lambda result: (result.day, result.index))
+    return results
@@ -0,0 +1,285 @@
+"""
+b3_scraper.application.daemon
+Modo daemon: um único processo mantém a sessão HTTP e o cliente S3 aquecidos e agenda
+as coletas de cada índice ao longo do pregão, com intervalo adaptativo (backoff quando
+a carteira não muda, intervalo mínimo perto da abertura e do fechamento).
+Expõe /health e /metrics em um servidor HTTP local.
+"""
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from b3_scraper import instrumentation
+from b3_scraper.domain.calendar import B3_TIMEZONE, is_trading_day, next_trading_day, session_bounds
+from b3_scraper.application.orchestrator import build_scraper, build_storage, run
+
+if TYPE_CHECKING:
+    from b3_scraper.infrastructure.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+
+class PollPolicy:
+    """
+    Regras de agendamento: janela de coleta (abertura - margem até fechamento + margem,
+    só em dias de pregão), intervalo mínimo perto das bordas e backoff multiplicativo
+    enquanto a carteira não muda.
+    """
+    def __init__(self, min_interval: float, max_interval: float, backoff: float, edge_minutes: int):
+        """
+        :param min_interval: intervalo (s) após uma mudança e perto da abertura/fechamento
+        :param max_interval: teto (s) do backoff
+        :param backoff: fator aplicado ao intervalo a cada coleta sem mudança (ou com falha)
+        :param edge_minutes: margem, em minutos, antes/depois da abertura e do fechamento
+        """
+        self.min_interval = timedelta(seconds=min_interval)
+        self.max_interval = timedelta(seconds=max(min_interval, max_interval))
+        self.backoff = max(1.0, backoff)
+        self.edge = timedelta(minutes=edge_minutes)
+
+    def window(self, day) -> Tuple[datetime, datetime]:
+        opening, closing = session_bounds(day)
+        return opening - self.edge, closing + self.edge
+
+    def near_edge(self, now: datetime) -> bool:
+        opening, closing = session_bounds(now.date())
+        return any(abs(now - moment) <= self.edge for moment in (opening, closing))
+
+    def next_window_start(self, now: datetime) -> datetime:
+        """
+        Início da próxima janela de coleta a partir de `now`.
+        """
+        day = now.date()
+        if is_trading_day(day) and now < self.window(day)[0]:
+            return self.window(day)[0]
+        return self.window(next_trading_day(day + timedelta(days=1)))[0]
+
+    def next_interval(self, interval: timedelta, status: str, now: datetime) -> timedelta:
+        """
+        Intervalo seguinte: mínimo após mudança ou perto das bordas; senão backoff até o teto.
+        """
+        if status == "ok" or self.near_edge(now):
+            return self.min_interval
+        return min(max(interval, self.min_interval) * self.backoff, self.max_interval)
+
+    def next_poll(self, now: datetime, interval: timedelta) -> datetime:
+        """
+        Próxima coleta: now + interval, antecipada para o início das margens da abertura/
+        fechamento e adiada para a próxima janela quando cair fora do pregão.
+        """
+        day = now.date()
+        start, end = self.window(day)
+        if not is_trading_day(day) or now >= end:
+            return self.next_window_start(now)
+        if now < start:
+            return start
+        candidate = now + interval
+        opening, closing = session_bounds(day)
+        for edge_start in (opening - self.edge, closing - self.edge):
+            if now < edge_start < candidate:
+                candidate = edge_start
+        return candidate if candidate < end else self.next_window_start(end)
+
+
+@dataclass
+class IndexSchedule:
+    """
+    Estado do agendamento de um índice.
+    """
+    index: str
+    segment: str
+    interval: float
+    next_poll: datetime
+    last_poll: Optional[datetime] = None
+    last_status: Optional[str] = None
+    last_error: Optional[str] = None
+    last_fingerprint: Optional[str] = None
+    polls: int = 0
+    changes: int = 0
+    unchanged: int = 0
+    failures: int = 0
+
+
+class Daemon:
+    """
+    Laço de coleta de longa duração. Scraper (sessão HTTP) e Storage (cliente S3)
+    são criados uma vez e reutilizados em todas as coletas.
+    """
+    def __init__(
+        self,
+        targets: List[Tuple[str, str]],
+        policy: PollPolicy,
+        http_host: str = "127.0.0.1",
+        http_port: Optional[int] = None,
+    ):
+        """
+        :param targets: pares (índice, segmento)
+        :param policy: regras de agendamento
+        :param http_host: endereço do servidor de /health e /metrics
+        :param http_port: porta do servidor; None ou 0 desabilita
+        """
+        self.policy = policy
+        self.http_host = http_host
+        self.http_port = http_port
+        self.scraper = build_scraper(len(targets))
+        # Métricas das etapas acumulam por toda a vida do processo
+        self.recorder = instrumentation.current() or instrumentation.start_run()
+        self.started = time.monotonic()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._storage: Optional["Storage"] = None
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        now = self.now()
+        first_poll = now if self._in_window(now) else policy.next_window_start(now)
+        self.schedules: Dict[str, IndexSchedule] = {
+            index: IndexSchedule(index, segment, policy.min_interval.total_seconds(), first_poll)
+            for index, segment in targets
+        }
+
+    @staticmethod
+    def now() -> datetime:
+        return datetime.now(B3_TIMEZONE)
+
+    def _in_window(self, now: datetime) -> bool:
+        start, end = self.policy.window(now.date())
+        return is_trading_day(now.date()) and start <= now < end
+
+    def storage(self) -> "Storage":
+        """
+        Storage compartilhado, criado na primeira coleta. Com AWS_ROLE_ARN, as credenciais
+        são renovadas em segundo plano (infrastructure.aws).
+        """
+        if self._storage is None:
+            self._storage = build_storage()
+        return self._storage
+
+    def poll_due(self, now: datetime) -> List[IndexSchedule]:
+        """
+        Coleta, em uma única execução de run(), todos os índices cuja vez chegou.
+        """
+        due = [schedule for schedule in self.schedules.values() if schedule.next_poll <= now]
+        if not due:
+            return []
+        targets = [(schedule.index, schedule.segment) for schedule in due]
+        error = None
+        try:
+            results = {result.index: result for result in run(targets, scraper=self.scraper, storage=self.storage())}
+        except Exception as e:
+            logger.error("Poll of %s failed: %s", [index for index, _ in targets], e)
+            results = {}
+            error = str(e)
+        finished = self.now()
+        with self._lock:
+            for schedule in due:
+                result = results.get(schedule.index)
+                status = result.status if result else "failed"
+                # Sem SKIP_UNCHANGED o Storage regrava a carteira e devolve "ok" mesmo sem
+                # mudança: a comparação com a coleta anterior mantém o backoff funcionando
+                fingerprint = result.fingerprint if result else None
+                if status == "ok" and fingerprint is not None and fingerprint == schedule.last_fingerprint:
+                    status = "unchanged"
+                if fingerprint is not None:
+                    schedule.last_fingerprint = fingerprint
+                schedule.polls += 1
+                schedule.last_poll = finished
+                schedule.last_status = status
+                schedule.last_error = result.error if result else error
+                if status == "ok":
+                    schedule.changes += 1
+                elif status == "unchanged":
+                    schedule.unchanged += 1
+                else:
+                    schedule.failures += 1
+                interval = self.policy.next_interval(timedelta(seconds=schedule.interval), status, finished)
+                schedule.interval = interval.total_seconds()
+                schedule.next_poll = self.policy.next_poll(finished, interval)
+                logger.info("Index %s: %s; next poll at %s (interval %ds)",
+                            schedule.index, status, schedule.next_poll.isoformat(timespec="seconds"),
+                            schedule.interval)
+        return due
+
+    def serve_forever(self) -> None:
+        """
+        Executa o laço até stop() (ex.: SIGTERM).
+        """
+        if self.http_port:
+            self._start_http()
+        logger.info("Daemon started for %s", sorted(self.schedules))
+        try:
+            while not self._stop.is_set():
+                self.poll_due(self.now())
+                with self._lock:
+                    next_poll = min(schedule.next_poll for schedule in self.schedules.values())
+                self._stop.wait(max(0.0, (next_poll - self.now()).total_seconds()))
+        finally:
+            if self._httpd is not None:
+                self._httpd.shutdown()
+                self._httpd.server_close()
+            logger.info("Daemon stopped")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def health(self) -> Dict:
+        """
+        Estado do daemon: "ok", ou "failing" quando a última coleta de todos os índices falhou.
+        """
+        with self._lock:
+            schedules = [asdict(schedule) for schedule in self.schedules.values()]
+        polled = [schedule for schedule in schedules if schedule["last_status"] is not None]
+        failing = bool(polled) and all(schedule["last_status"] == "failed" for schedule in polled)
+        return {
+            "status": "failing" if failing else "ok",
+            "uptime_seconds": round(time.monotonic() - self.started, 1),
+            "indices": schedules,
+        }
+
+    def metrics(self) -> str:
+        """
+        Métricas Prometheus: etapas do pipeline (instrumentation) e contadores por índice.
+        """
+        lines = [self.recorder.prometheus().rstrip("\n")]
+        with self._lock:
+            schedules = list(self.schedules.values())
+        for field in ("polls", "changes", "unchanged", "failures", "interval"):
+            metric = f"b3_scraper_daemon_{field}"
+            lines.append(f"# TYPE {metric} {'gauge' if field == 'interval' else 'counter'}")
+            lines.extend(f'{metric}{{index="{schedule.index}"}} {getattr(schedule, field)}' for schedule in schedules)
+        lines.append("# TYPE b3_scraper_daemon_next_poll_timestamp_seconds gauge")
+        lines.extend(
+            f'b3_scraper_daemon_next_poll_timestamp_seconds{{index="{schedule.index}"}} {schedule.next_poll.timestamp():.0f}'
+            for schedule in schedules
+        )
+        return "\n".join(lines) + "\n"
+
+    def _start_http(self) -> None:
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/health":
+                    health = daemon.health()
+                    status = 200 if health["status"] == "ok" else 503
+                    body, content_type = json.dumps(health, default=str).encode("utf-8"), "application/json"
+                elif self.path == "/metrics":
+                    status, body, content_type = 200, daemon.metrics().encode("utf-8"), "text/plain; version=0.0.4"
+                else:
+                    status, body, content_type = 404, b"", "text/plain"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer((self.http_host, self.http_port), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        logger.info("Health/metrics endpoint listening on http://%s:%d", self.http_host, self._httpd.server_port)
@@ -2,65 +2,540 @@
 b3_scraper.application.orchestrator
 Orquestra o fluxo principal: fetch -> parse -> store.
 """
+import asyncio
 import logging
 import json
+import os
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
 
 from b3_scraper.config import settings
-from b3_scraper.infrastructure.http_client import HttpClient
+from b3_scraper.infrastructure.async_http_client import AsyncHttpClient
+from b3_scraper.infrastructure.http_client import HttpClient, ResponseCache
+from b3_scraper.infrastructure.disk_cache import DiskCache
 from b3_scraper.infrastructure.scraper import Scraper
 from b3_scraper.infrastructure.parser import Parser
-from b3_scraper.infrastructure.storage import Storage
-from b3_scraper.logger import configure_logging
+from b3_scraper.instrumentation import current, stage
 
-import pandas as pd
-from datetime import datetime, date
-
-# Configura logging antes de tudo
-configure_logging()
+# pyarrow/boto3 (via storage e ticker_index) são importados apenas quando usados
+if TYPE_CHECKING:
+    import pyarrow as pa
+    from b3_scraper.infrastructure.archive import PayloadArchive
+    from b3_scraper.infrastructure.backends import SpoolBackend, StorageBackend
+    from b3_scraper.infrastructure.snapshot import SnapshotPublisher
+    from b3_scraper.infrastructure.storage import PartitionResult, Storage
+    from b3_scraper.infrastructure.ticker_index import TickerIndex
 
 logger = logging.getLogger(__name__)
 
-def run():
+
+@dataclass
+class IndexResult:
+    """
+    Resultado da coleta de um índice em uma execução:
+    - index / segment: alvo consultado
+    - status: "ok", "unchanged" (carteira idêntica à última gravada; nada foi enviado)
+      ou "failed"
+    - records: quantidade de registros persistidos
+    - error: mensagem de erro quando status == "failed"
+    - fingerprint: impressão digital do conteúdo gravado (partições do índice), calculada
+      mesmo sem SKIP_UNCHANGED; None quando a coleta falha
+    """
+    index: str
+    segment: str
+    status: str
+    records: int = 0
+    error: Optional[str] = None
+    fingerprint: Optional[str] = None
+
+
+def parse_targets(values: Iterable[str], default_segment: str = None) -> List[Tuple[str, str]]:
+    """
+    Converte entradas como "IBOV", "IBXX:1" ou "IBOV,SMLL" em pares (índice, segmento).
+    :param values: índices, opcionalmente com ":segmento" e separados por vírgula
+    :param default_segment: segmento usado quando não informado (default: settings.SEGMENT)
+    """
+    default_segment = default_segment or settings.SEGMENT
+    targets: List[Tuple[str, str]] = []
+    for value in values:
+        for item in value.split(","):
+            item = item.strip()
+            if not item:
+                continue
+            index, _, segment = item.partition(":")
+            target = (index.strip().upper(), segment.strip() or default_segment)
+            if target not in targets:
+                targets.append(target)
+    return targets
+
+
+def prefix_for(index: str) -> str:
+    """
+    Prefixo S3 de um índice. S3_PREFIX aceita o placeholder "{index}"; sem ele,
+    S3_PREFIX_INDEX usa S3_PREFIX e os demais são gravados em pastas irmãs
+    (ex.: raw/ibov -> raw/ibxx), quaisquer que sejam os outros índices da execução.
+    """
+    prefix = settings.S3_PREFIX.rstrip("/")
+    if "{index}" in prefix:
+        return prefix.format(index=index.lower())
+    if index.upper() == settings.S3_PREFIX_INDEX.upper():
+        return prefix
+    parent = posixpath.dirname(prefix)
+    return posixpath.join(parent, index.lower()) if parent else index.lower()
+
+
+def build_scraper(workers: int = 1) -> Scraper:
     """
-    Executa o fluxo de scraping:
-    1. Busca o JSON do pregão IBOV.
-    2. Converte o JSON em registros de negócio.
-    3. Persiste os registros no S3.
+    Cria o Scraper com um HttpClient cujo pool comporta `workers` coletas simultâneas,
+    cada uma buscando até settings.FETCH_WORKERS páginas em paralelo.
     """
-    # Cria cliente HTTP configurado
-    http_client = HttpClient(timeout=settings.TIMEOUT)
-    # Inicializa o scraper com URL base e path
-    scraper = Scraper(
+    cache = None
+    if settings.HTTP_CACHE_DIR:
+        cache = ResponseCache(
+            directory=settings.HTTP_CACHE_DIR,
+            ttl=settings.HTTP_CACHE_TTL,
+            max_bytes=settings.HTTP_CACHE_MAX_BYTES,
+        )
+    http_client = HttpClient(
+        timeout=settings.TIMEOUT,
+        pool_maxsize=settings.FETCH_WORKERS * workers,
+        cache=cache,
+    )
+    async_http_client = None
+    if settings.HTTP_ASYNC:
+        if cache is not None:
+            # O AsyncHttpClient não usa o ResponseCache: o fetch assíncrono sempre vai à B3
+            logger.warning("HTTP_CACHE_DIR is not used by the async HTTP client (HTTP_ASYNC)")
+        async_http_client = AsyncHttpClient(
+            timeout=settings.TIMEOUT,
+            pool_maxsize=settings.FETCH_WORKERS * workers,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            rate_limit=settings.HTTP_RATE_LIMIT,
+            rate_burst=settings.HTTP_RATE_BURST,
+            host_rate_limit=settings.HTTP_HOST_RATE_LIMIT,
+            host_rate_burst=settings.HTTP_HOST_RATE_BURST,
+        )
+    return Scraper(
         http_client=http_client,
         base_url=settings.B3_BASE_URL,
         path=settings.IBOV_PATH,
+        async_http_client=async_http_client,
     )
-    # Faz o fetch do JSON
-    data = scraper.fetch_json(page_number=1, page_size=settings.PAGE_SIZE)
-    logger.debug("JSON fetched successfully")
-    logger.debug("JSON payload: %s", data)
 
-    # Parseia o JSON em registros de negócio
-    parser = Parser()
-    records = parser.parse_json(data)
-    logger.info("Parsed %d records from JSON", len(records))
-    # Log do conteúdo que será salvo no S3
-    payload = [record.__dict__ for record in records]
-    # Convert to DataFrame
-    # Skip local write; directly upload to S3
-    df = pd.DataFrame.from_records(payload)
-
-    logger.debug("S3 payload: %s", payload)
-
-    # Persiste os registros no S3
-    storage = Storage(
+
+# Spool write-behind do processo, por diretório (um único uploader por spool)
+_spools: Dict[str, "SpoolBackend"] = {}
+_spools_lock = threading.Lock()
+# O uploader (thread) não sobrevive ao fork: processos filhos criam o próprio spool
+os.register_at_fork(after_in_child=_spools.clear)
+
+
+def build_backend() -> "StorageBackend":
+    """
+    Backend de objetos do Storage (STORAGE_BACKEND), envolvido pelo spool write-behind
+    do processo quando SPOOL_DIR está definido.
+    """
+    from b3_scraper.infrastructure.backends import LocalBackend, S3Backend, SpoolBackend
+
+    directory = os.path.abspath(settings.SPOOL_DIR) if settings.SPOOL_DIR else None
+    with _spools_lock:
+        if directory in _spools:
+            return _spools[directory]
+    if settings.STORAGE_BACKEND == "local":
+        backend = LocalBackend(settings.STORAGE_LOCAL_DIR)
+    elif settings.STORAGE_BACKEND == "s3":
+        backend = S3Backend(
+            settings.S3_BUCKET,
+            settings.AWS_REGION,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            upload_workers=max(settings.S3_UPLOAD_WORKERS, settings.SPOOL_UPLOAD_WORKERS),
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+        )
+    else:
+        raise ValueError(f"Backend de armazenamento desconhecido: {settings.STORAGE_BACKEND}")
+    if directory is None:
+        return backend
+    with _spools_lock:
+        spool = _spools.get(directory)
+        if spool is None:
+            spool = _spools[directory] = SpoolBackend(
+                directory,
+                backend,
+                workers=settings.SPOOL_UPLOAD_WORKERS,
+                batch_size=settings.SPOOL_BATCH_SIZE,
+                retry_backoff=settings.SPOOL_RETRY_BACKOFF,
+                max_backoff=settings.SPOOL_RETRY_MAX_BACKOFF,
+            )
+    return spool
+
+
+def drain_spool(timeout: float) -> int:
+    """
+    Aguarda até `timeout` segundos o envio das entradas do spool (SPOOL_DIR), inclusive
+    as gravadas por outros processos (ex.: workers do backfill).
+    :return: entradas ainda pendentes (enviadas por uma próxima execução)
+    """
+    if not settings.SPOOL_DIR:
+        return 0
+    remaining = build_backend().drain(timeout)
+    if remaining:
+        logger.warning("%d spooled objects still pending after %.0fs; they will be uploaded by the next run",
+                       remaining, timeout)
+    return remaining
+
+
+def build_storage() -> "Storage":
+    """
+    Cria o Storage a partir das configurações de S3 (e de STORAGE_BACKEND/SPOOL_DIR).
+    """
+    from b3_scraper.infrastructure.storage import Storage
+
+    cache = None
+    if settings.STORAGE_CACHE_DIR:
+        cache = DiskCache(settings.STORAGE_CACHE_DIR, settings.STORAGE_CACHE_MAX_BYTES)
+    return Storage(
         bucket=settings.S3_BUCKET,
         region=settings.AWS_REGION,
         prefix=settings.S3_PREFIX,
+        upload_workers=settings.S3_UPLOAD_WORKERS,
+        multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+        skip_unchanged=settings.SKIP_UNCHANGED,
+        cache=cache,
+        backend=build_backend(),
+    )
+
+
+def build_archive() -> Optional["PayloadArchive"]:
+    """
+    Arquivo de payloads brutos (ARCHIVE_DIR e/ou ARCHIVE_S3_PREFIX), ou None se nenhum estiver definido.
+    """
+    if not (settings.ARCHIVE_DIR or settings.ARCHIVE_S3_PREFIX):
+        return None
+    from b3_scraper.infrastructure.archive import PayloadArchive
+
+    s3_client = None
+    if settings.ARCHIVE_S3_PREFIX:
+        from b3_scraper.infrastructure import aws
+
+        s3_client = aws.client(
+            "s3",
+            settings.AWS_REGION,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            addressing_style="path" if settings.S3_ENDPOINT_URL else None,
+        )
+    return PayloadArchive(
+        directory=settings.ARCHIVE_DIR,
+        s3_client=s3_client,
+        bucket=settings.S3_BUCKET,
+        s3_prefix=settings.ARCHIVE_S3_PREFIX,
+        level=settings.ARCHIVE_ZSTD_LEVEL,
+    )
+
+
+def archive_payload(archive: Optional["PayloadArchive"], data: dict, index: str, segment: str) -> None:
+    """
+    Arquiva o JSON coletado, se houver arquivo configurado. Uma falha aqui não
+    interrompe a coleta.
+    """
+    if archive is None:
+        return
+    try:
+        with stage("archive") as span:
+            entry = archive.put_json(data, index, segment)
+            span.add(bytes_in=entry.size)
+    except Exception as e:
+        logger.warning("Failed to archive payload of %s: %s", index, e)
+
+
+def ticker_index_for(index: str) -> Optional["TickerIndex"]:
+    """
+    Índice de séries por ticker de um índice, ou None se TICKER_INDEX_DIR não estiver definido.
+    """
+    from b3_scraper.infrastructure.ticker_index import TickerIndex
+
+    if not settings.TICKER_INDEX_DIR:
+        return None
+    return TickerIndex(posixpath.join(settings.TICKER_INDEX_DIR, index.lower()))
+
+
+def update_ticker_index(index: str, table: "pa.Table") -> None:
+    """
+    Acrescenta o pregão gravado ao índice por ticker, se TICKER_INDEX_DIR estiver definido.
+    O índice é derivado: uma falha aqui não invalida a gravação no S3.
+    """
+    try:
+        ticker_index = ticker_index_for(index)
+        if ticker_index is not None:
+            ticker_index.update(table)
+    except Exception as e:
+        logger.warning("Failed to update ticker index of %s: %s", index, e)
+
+
+def build_snapshot_publisher() -> Optional["SnapshotPublisher"]:
+    """
+    Publicador do snapshot local da carteira mais recente, ou None se SNAPSHOT_DIR não estiver definido.
+    """
+    if not settings.SNAPSHOT_DIR:
+        return None
+    from b3_scraper.infrastructure.snapshot import SnapshotPublisher
+
+    return SnapshotPublisher(settings.SNAPSHOT_DIR)
+
+
+def publish_snapshot(publisher: Optional["SnapshotPublisher"], result: IndexResult, table: "pa.Table") -> None:
+    """
+    Publica a carteira coletada como snapshot do índice. Carteira inalterada só é publicada
+    se ainda não houver snapshot (ex.: primeiro run com SNAPSHOT_DIR), sem mudar a versão à toa.
+    O snapshot é derivado: uma falha aqui não invalida a gravação no S3.
+    """
+    if publisher is None:
+        return
+    try:
+        if result.status == "ok" or publisher.version(result.index) == 0:
+            with stage("snapshot") as span:
+                publisher.publish(result.index, table)
+                span.add(rows=table.num_rows)
+    except Exception as e:
+        logger.warning("Failed to publish snapshot of %s: %s", result.index, e)
+
+
+def _collect(
+    scraper: Scraper,
+    parser: Parser,
+    index: str,
+    segment: str,
+    archive: Optional["PayloadArchive"] = None,
+) -> "pa.Table":
+    """
+    Busca todas as páginas de um índice, arquiva o JSON (se configurado) e o converte
+    na tabela colunar de registros.
+    """
+    data = scraper.fetch_json_all(
+        page_size=settings.PAGE_SIZE,
+        max_workers=settings.FETCH_WORKERS,
+        index=index,
+        segment=segment,
+    )
+    return _parse_payload(parser, data, index, segment, archive)
+
+
+def _parse_payload(
+    parser: Parser,
+    data: Union[dict, BaseException],
+    index: str,
+    segment: str,
+    archive: Optional["PayloadArchive"] = None,
+) -> "pa.Table":
+    """
+    Arquiva o JSON de um índice (se configurado) e o converte na tabela colunar de registros.
+    :param data: JSON coletado, ou a exceção do fetch (propagada)
+    """
+    if isinstance(data, BaseException):
+        raise data
+    logger.debug("JSON fetched successfully for %s", index)
+    logger.debug("JSON payload: %s", data)
+    archive_payload(archive, data, index, segment)
+
+    table = parser.parse_json_table(data)
+    logger.info("Parsed %d records from JSON for %s", table.num_rows, index)
+    return table
+
+
+def _fetch_all_async(scraper: Scraper, targets: List[Tuple[str, str]]) -> List[Union[dict, BaseException]]:
+    """
+    Busca o JSON de todos os índices concorrentemente no AsyncHttpClient do Scraper.
+    :return: JSON (ou a exceção do fetch) de cada alvo, na ordem de targets
+    """
+    async def fetch_all():
+        async with scraper.async_http_client:
+            return await asyncio.gather(
+                *(
+                    scraper.afetch_json_all(page_size=settings.PAGE_SIZE, index=index, segment=segment)
+                    for index, segment in targets
+                ),
+                return_exceptions=True,
+            )
+
+    return asyncio.run(fetch_all())
+
+
+def _fingerprint(partitions: List["PartitionResult"]) -> Optional[str]:
+    """
+    Impressão digital do conteúdo de um índice: as das suas partições, por data do pregão.
+    """
+    if not partitions or any(partition.fingerprint is None for partition in partitions):
+        return None
+    return ",".join(
+        f"{partition.record_date}:{partition.fingerprint}"
+        for partition in sorted(partitions, key=lambda partition: partition.record_date)
     )
-    storage.save_records(records)
-    logger.info("Saved %d records to S3://%s/%s", len(records), settings.S3_BUCKET, settings.S3_PREFIX)
+
+
+def _record_results(results: List[IndexResult]) -> None:
+    """
+    Anexa o resultado de cada índice ao relatório da execução (instrumentation), se ativo.
+    """
+    recorder = current()
+    if recorder is not None:
+        recorder.info["indices"] = {
+            result.index: {"status": result.status, "records": result.records, "error": result.error}
+            for result in results
+        }
+
+
+def _stream_index(scraper: Scraper, parser: Parser, storage: "Storage", index: str, segment: str) -> IndexResult:
+    """
+    Fetch -> parse -> store de um índice em streaming: as páginas são convertidas em lotes
+    de até STREAM_BATCH_SIZE linhas e gravadas incrementalmente (Storage.save_stream);
+    a memória não cresce com o total de registros.
+    """
+    from b3_scraper.infrastructure.storage import StorageError
+
+    result = IndexResult(index=index, segment=segment, status="ok")
+    try:
+        pages = scraper.iter_json_pages(
+            page_size=settings.PAGE_SIZE,
+            max_workers=settings.FETCH_WORKERS,
+            index=index,
+            segment=segment,
+        )
+        with stage("store") as span:
+            partitions = storage.save_stream(
+                parser.iter_json_tables(pages, settings.STREAM_BATCH_SIZE), prefix=prefix_for(index)
+            )
+            span.add(rows=sum(partition.rows for partition in partitions))
+    except StorageError as e:
+        logger.error("Falha ao gravar o índice %s (segmento %s): %s", index, segment, e)
+        result.status = "failed"
+        result.error = str(e)
+        return result
+    except Exception as e:
+        logger.error("Falha ao coletar o índice %s (segmento %s): %s", index, segment, e)
+        result.status = "failed"
+        result.error = str(e)
+        return result
+    result.fingerprint = _fingerprint(partitions)
+    if partitions and all(partition.status == "unchanged" for partition in partitions):
+        result.status = "unchanged"
+        logger.info("Portfolio of %s unchanged; nothing written", index)
+        return result
+    result.records = sum(partition.rows for partition in partitions)
+    logger.info("Streamed %d records to S3://%s/%s", result.records, settings.S3_BUCKET, prefix_for(index))
+    return result
+
+
+def _run_streaming(
+    targets: List[Tuple[str, str]],
+    scraper: Scraper,
+    parser: Parser,
+    storage: "Storage",
+    workers: int,
+) -> List[IndexResult]:
+    # O payload completo e a tabela do pregão nunca existem em memória neste modo
+    if settings.ARCHIVE_DIR or settings.ARCHIVE_S3_PREFIX or settings.TICKER_INDEX_DIR or settings.SNAPSHOT_DIR:
+        logger.warning("Payload archive, ticker index and snapshot are not updated in streaming mode")
+    if scraper.async_http_client is not None:
+        # iter_json_pages usa o cliente síncrono: limites de taxa e coalescência não se aplicam
+        logger.warning("Streaming mode fetches pages synchronously; HTTP_ASYNC and its rate limits are ignored")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            lambda target: _stream_index(scraper, parser, storage, *target), targets
+        ))
+    _record_results(results)
+    return results
+
+
+def run(
+    targets: Optional[List[Tuple[str, str]]] = None,
+    scraper: Optional[Scraper] = None,
+    storage: Optional["Storage"] = None,
+) -> List[IndexResult]:
+    """
+    Executa o fluxo de scraping para um ou mais índices:
+    1. Busca, em paralelo, o JSON do pregão de cada índice (pool HTTP compartilhado).
+    2. Arquiva cada JSON (se ARCHIVE_DIR/ARCHIVE_S3_PREFIX) e o converte em registros de negócio.
+    3. Persiste todos os registros no S3 em uma única passada.
+    4. Acrescenta o pregão ao índice por ticker (se TICKER_INDEX_DIR estiver definido).
+    5. Publica o snapshot local da carteira de cada índice (se SNAPSHOT_DIR estiver definido).
+    :param targets: pares (índice, segmento); default: settings.INDEX/SEGMENT
+    :param scraper: Scraper já criado (ex.: sessão HTTP mantida pelo daemon); default: novo
+    :param storage: Storage já criado (ex.: cliente S3 mantido pelo daemon); default: novo
+    :return: resultado por índice
+    Com STREAMING, cada índice segue o fluxo em lotes de _stream_index.
+    """
+    targets = targets or parse_targets([settings.INDEX])
+    workers = max(1, min(settings.INDEX_WORKERS, len(targets)))
+
+    # Cliente HTTP único; o pool comporta o fetch paralelo de páginas de todos os índices
+    scraper = scraper or build_scraper(workers)
+    parser = Parser()
+    if settings.STREAMING:
+        return _run_streaming(targets, scraper, parser, storage or build_storage(), workers)
+    archive = build_archive()
+
+    # Fetch + parse de cada índice em paralelo
+    results: List[IndexResult] = []
+    collected: List[Tuple[IndexResult, "pa.Table"]] = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        if scraper.async_http_client is not None:
+            # Fetch concorrente no event loop (HTTP_ASYNC); o parse segue no pool
+            payloads = _fetch_all_async(scraper, targets)
+            futures = [
+                (index, segment, executor.submit(_parse_payload, parser, payload, index, segment, archive))
+                for (index, segment), payload in zip(targets, payloads)
+            ]
+        else:
+            futures = [
+                (index, segment, executor.submit(_collect, scraper, parser, index, segment, archive))
+                for index, segment in targets
+            ]
+        for index, segment, future in futures:
+            result = IndexResult(index=index, segment=segment, status="ok")
+            try:
+                table = future.result()
+            except Exception as e:
+                logger.error("Falha ao coletar o índice %s (segmento %s): %s", index, segment, e)
+                result.status = "failed"
+                result.error = str(e)
+                table = None
+            results.append(result)
+            if result.status == "ok":
+                collected.append((result, table))
+
+    if not collected:
+        _record_results(results)
+        return results
+
+    # Persiste os registros de todos os índices no S3 com um único cliente
+    from b3_scraper.infrastructure.storage import StorageError
+
+    storage = storage or build_storage()
+    snapshots = build_snapshot_publisher()
+    with stage("store") as span:
+        saved = storage.save_many([(prefix_for(result.index), table) for result, table in collected])
+        span.add(rows=sum(table.num_rows for _, table in collected))
+    for (result, table), partitions in zip(collected, saved):
+        failures = [partition for partition in partitions if partition.status == "failed"]
+        if failures:
+            result.status = "failed"
+            result.error = str(StorageError(partitions))
+            continue
+        result.fingerprint = _fingerprint(partitions)
+        if partitions and all(partition.status == "unchanged" for partition in partitions):
+            result.status = "unchanged"
+            logger.info("Portfolio of %s unchanged; nothing written", result.index)
+            publish_snapshot(snapshots, result, table)
+            continue
+        result.records = table.num_rows
+        logger.info("Saved %d records to S3://%s/%s", table.num_rows, settings.S3_BUCKET, prefix_for(result.index))
+        update_ticker_index(result.index, table)
+        publish_snapshot(snapshots, result, table)
+    _record_results(results)
+    return results
 
 if __name__ == "__main__":
     # Executa quando invocado diretamente
-    run()
\ No newline at end of file
+    run()
@@ -0,0 +1,198 @@
+"""
+b3_scraper.application.refine
+Camada refined local: reproduz a transformação do job Glue "bovespa_refined" sobre as
+partições raw ano=/mes=/dia= gravadas pelo Storage, com compute vetorizado do Arrow.
+Funciona tanto com diretórios locais quanto com URIs s3://.
+"""
+import hashlib
+import json
+import logging
+import os
+import posixpath
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from b3_scraper.config import settings
+from b3_scraper.infrastructure.columnar import conform, deduplicate
+
+logger = logging.getLogger(__name__)
+
+# Arquivo (na raiz da saída refined) com as partições raw já processadas
+STATE_FILE = "_refine_state.json"
+
+# Partições de saída, como no job Glue
+REFINED_PARTITIONING = ds.partitioning(
+    pa.schema([("record_date", pa.string()), ("acao_partition", pa.string())]),
+    flavor="hive",
+)
+
+
+@dataclass
+class RefineResult:
+    """
+    Resultado do refinamento de uma partição raw (ex.: "ano=2025/mes=07/dia=21").
+    """
+    partition: str
+    rows_in: int
+    rows_out: int
+    status: str = "ok"
+    error: Optional[str] = None
+
+
+def filesystem_for(uri: str) -> Tuple[pafs.FileSystem, str]:
+    """
+    Resolve uma URI s3://bucket/prefixo ou caminho local em (filesystem, caminho base).
+    No S3 assume AWS_ROLE_ARN, quando definido, como o Storage. O próprio Arrow assume o
+    role e renova as credenciais, de modo que um refine longo não para com ExpiredToken
+    (uma cópia das credenciais do Storage poderia ter só alguns minutos de validade).
+    """
+    if uri.startswith("s3://"):
+        role_arn = os.getenv("AWS_ROLE_ARN")
+        filesystem = pafs.S3FileSystem(
+            region=settings.AWS_REGION,
+            role_arn=role_arn or None,
+            session_name="b3-scraper-refine" if role_arn else None,
+        )
+        return filesystem, uri[len("s3://"):].rstrip("/")
+    return pafs.LocalFileSystem(), os.path.abspath(uri).rstrip("/")
+
+
+def transform(raw: pa.Table, today: date) -> pa.Table:
+    """
+    Aplica a transformação do "bovespa_refined":
+    1. Agrupamento/contagem por ação (código + nome) e data: qtd_registros conta as linhas
+       raw (uma por coleta do dia, como no job Glue); os totais usam só a última coleta,
+       para que polls repetidos não os multipliquem.
+    2. Renomeia colunas (stock -> acao, theoretical_quantity -> quantidade_teorica...).
+    3. Métricas de data: days_since_record, record_year, record_month.
+    4. Colunas de partição record_date / acao_partition.
+    :param raw: linhas raw do dia, na ordem de gravação (todos os arquivos da partição)
+    """
+    keys = ["code", "stock", "record_date"]
+    schema = pa.schema([
+        ("code", pa.string()),
+        ("stock", pa.string()),
+        ("record_date", pa.string()),
+        ("theoretical_quantity", raw.schema.field("theoretical_quantity").type),
+        ("participation_percentage", raw.schema.field("participation_percentage").type),
+    ])
+    counts = raw.select(keys).cast(pa.schema(list(schema)[:3])).group_by(keys).aggregate([("code", "count")])
+    totals = deduplicate(raw).select(list(schema.names)).cast(schema).group_by(keys).aggregate([
+        ("theoretical_quantity", "sum"),
+        ("participation_percentage", "sum"),
+    ])
+    grouped = totals.join(counts, keys=keys, join_type="left outer").sort_by(
+        [("record_date", "ascending"), ("code", "ascending"), ("stock", "ascending")]
+    )
+
+    record_day = pc.cast(pc.strptime(grouped["record_date"], format="%Y-%m-%d", unit="s"), pa.date32())
+    return pa.table({
+        "code": grouped["code"],
+        "acao": grouped["stock"],
+        "qtd_registros": grouped["code_count"],
+        "quantidade_teorica_total": grouped["theoretical_quantity_sum"],
+        "participacao_total": grouped["participation_percentage_sum"],
+        "data_pregao": record_day,
+        "days_since_record": pc.days_between(record_day, pa.scalar(today, type=pa.date32())),
+        "record_year": pc.year(record_day),
+        "record_month": pc.month(record_day),
+        "record_date": grouped["record_date"],
+        "acao_partition": grouped["stock"],
+    })
+
+
+class Refiner:
+    """
+    Processa incrementalmente as partições raw: somente partições novas ou alteradas
+    (conjunto de arquivos diferente do registrado no estado) são lidas e regravadas.
+    """
+    def __init__(self, raw_uri: str, refined_uri: str):
+        """
+        :param raw_uri: raiz das partições raw (ex.: s3://bucket/raw/ibov ou ./data/raw/ibov)
+        :param refined_uri: raiz da saída refined (ex.: s3://bucket/refined)
+        """
+        self.raw_fs, self.raw_root = filesystem_for(raw_uri)
+        self.refined_fs, self.refined_root = filesystem_for(refined_uri)
+        self.state_path = posixpath.join(self.refined_root, STATE_FILE)
+
+    def _load_state(self) -> Dict[str, str]:
+        # Só a ausência do estado vale como "nada processado"; outras falhas (permissão,
+        # rede) interrompem o refine em vez de disparar um reprocessamento completo
+        if self.refined_fs.get_file_info(self.state_path).type == pafs.FileType.NotFound:
+            return {}
+        with self.refined_fs.open_input_stream(self.state_path) as f:
+            return json.loads(f.read()).get("partitions", {})
+
+    def _save_state(self, state: Dict[str, str]) -> None:
+        self.refined_fs.create_dir(self.refined_root, recursive=True)
+        with self.refined_fs.open_output_stream(self.state_path) as f:
+            f.write(json.dumps({"partitions": state}, sort_keys=True).encode("utf-8"))
+
+    def raw_partitions(self) -> Dict[str, List[pafs.FileInfo]]:
+        """
+        Arquivos Parquet de cada partição raw, por caminho relativo "ano=/mes=/dia=".
+        """
+        partitions: Dict[str, List[pafs.FileInfo]] = {}
+        selector = pafs.FileSelector(self.raw_root, recursive=True, allow_not_found=True)
+        for info in self.raw_fs.get_file_info(selector):
+            if info.type != pafs.FileType.File or not info.path.endswith(".parquet"):
+                continue
+            relative = posixpath.relpath(posixpath.dirname(info.path), self.raw_root)
+            if relative.startswith("ano="):
+                partitions.setdefault(relative, []).append(info)
+        return partitions
+
+    @staticmethod
+    def _signature(files: List[pafs.FileInfo]) -> str:
+        listing = sorted(f"{info.base_name}:{info.size}:{info.mtime_ns}" for info in files)
+        return hashlib.sha256("\n".join(listing).encode("utf-8")).hexdigest()
+
+    def refine(self, today: Optional[date] = None, full: bool = False) -> List[RefineResult]:
+        """
+        Refina as partições raw novas/alteradas, uma por vez (memória limitada a um dia).
+        :param today: data de referência de days_since_record (default: hoje)
+        :param full: reprocessa todas as partições, ignorando o estado
+        """
+        today = today or date.today()
+        state = {} if full else self._load_state()
+        results: List[RefineResult] = []
+        for partition, files in sorted(self.raw_partitions().items()):
+            signature = self._signature(files)
+            if state.get(partition) == signature:
+                continue
+            try:
+                raw = pa.concat_tables([
+                    conform(pq.read_table(info.path, filesystem=self.raw_fs))
+                    for info in sorted(files, key=lambda info: info.base_name)
+                ])
+                refined = transform(raw, today)
+                for record_date in pc.unique(refined["record_date"]).to_pylist():
+                    # Remove a saída anterior do dia (inclusive ações que saíram da carteira)
+                    self.refined_fs.delete_dir_contents(
+                        posixpath.join(self.refined_root, f"record_date={record_date}"),
+                        missing_dir_ok=True,
+                    )
+                ds.write_dataset(
+                    refined,
+                    self.refined_root,
+                    filesystem=self.refined_fs,
+                    format="parquet",
+                    partitioning=REFINED_PARTITIONING,
+                    basename_template="part-{i}.parquet",
+                    existing_data_behavior="overwrite_or_ignore",
+                )
+                state[partition] = signature
+                self._save_state(state)
+                results.append(RefineResult(partition, raw.num_rows, refined.num_rows))
+                logger.info("Refined %s: %d raw rows -> %d refined rows", partition, raw.num_rows, refined.num_rows)
+            except Exception as e:
+                logger.error("Failed to refine partition %s: %s", partition, e)
+                results.append(RefineResult(partition, 0, 0, status="failed", error=str(e)))
+        return results
@@ -0,0 +1,123 @@
+"""
+b3_scraper.application.reprocess
+Reconstrói partições raw a partir do arquivo de payloads (infrastructure.archive), sem
+acessar a B3: parse -> store em um pool de processos, um pregão por tarefa.
+"""
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from b3_scraper.config import settings
+from b3_scraper.infrastructure.parser import Parser
+from b3_scraper.application.orchestrator import (
+    build_archive,
+    build_storage,
+    parse_targets,
+    prefix_for,
+    update_ticker_index,
+)
+
+if TYPE_CHECKING:
+    from b3_scraper.infrastructure.archive import ArchiveEntry, PayloadArchive
+    from b3_scraper.infrastructure.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReprocessResult:
+    """
+    Resultado do reprocessamento de um pregão:
+    - status: "ok", "unchanged" (partição idêntica à gravada; nada foi enviado) ou "failed"
+    """
+    index: str
+    record_date: str
+    sha256: str
+    status: str
+    records: int = 0
+    error: Optional[str] = None
+
+
+# Arquivo e Storage reaproveitados pelas tarefas de um mesmo processo
+_worker_archive: Optional["PayloadArchive"] = None
+_worker_storage: Optional["Storage"] = None
+
+
+def _init_worker() -> None:
+    global _worker_archive, _worker_storage
+    _worker_archive = build_archive()
+    _worker_storage = build_storage()
+
+
+def _reprocess_entry(entry: "ArchiveEntry") -> ReprocessResult:
+    """
+    Lê o payload arquivado, converte em tabela colunar e grava a partição do pregão.
+    """
+    result = ReprocessResult(index=entry.index, record_date=entry.record_date, sha256=entry.sha256, status="ok")
+    try:
+        payload = _worker_archive.get(entry)
+        parser = Parser()
+        if entry.kind == "json":
+            table = parser.parse_json_table(payload)
+        else:
+            from b3_scraper.infrastructure.columnar import table_from_records
+
+            table = table_from_records(parser.parse(payload))
+        partitions = _worker_storage.save_table(table, prefix=prefix_for(entry.index))
+        if partitions and all(partition.status == "unchanged" for partition in partitions):
+            result.status = "unchanged"
+        result.records = table.num_rows
+        # Também quando inalterado: o índice por ticker pode não ter o pregão (ex.: criado depois)
+        update_ticker_index(entry.index, table)
+    except Exception as e:
+        result.status = "failed"
+        result.error = str(e)
+    return result
+
+
+def reprocess(
+    start: date,
+    end: date,
+    targets: Optional[List[Tuple[str, str]]] = None,
+    workers: int = None,
+) -> List[ReprocessResult]:
+    """
+    Reprocessa, para cada índice e pregão entre start e end (inclusive), o último payload
+    arquivado daquele pregão.
+    :param targets: pares (índice, segmento); default: settings.INDEX/SEGMENT
+    :param workers: processos do pool (default: settings.BACKFILL_WORKERS)
+    :return: resultado por índice/pregão
+    """
+    archive = build_archive()
+    if archive is None:
+        raise ValueError("Defina ARCHIVE_DIR e/ou ARCHIVE_S3_PREFIX para reprocessar o arquivo")
+    targets = targets or parse_targets([settings.INDEX])
+    workers = max(1, workers or settings.BACKFILL_WORKERS)
+
+    # Último payload coletado de cada índice/pregão (as entradas vêm ordenadas pela coleta)
+    latest: Dict[Tuple[str, str], "ArchiveEntry"] = {}
+    for index, _ in targets:
+        for entry in archive.entries(index, start, end):
+            latest[(entry.index, entry.record_date)] = entry
+    tasks = [latest[key] for key in sorted(latest)]
+    logger.info("Reprocessing %d archived index/day payloads between %s and %s with %d processes",
+                len(tasks), start, end, workers)
+    if not tasks:
+        return []
+
+    results: List[ReprocessResult] = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_reprocess_entry, entry) for entry in tasks]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result.status == "failed":
+                logger.error("Reprocess %s %s: failed – %s", result.index, result.record_date, result.error)
+            else:
+                logger.info("Reprocess %s %s: %s (%d records)",
+                            result.index, result.record_date, result.status, result.records)
+
+    results.sort(key=lambda result: (result.record_date, result.index))
+    return results
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Optional
+
 from pydantic import BaseSettings, AnyHttpUrl, Field
 
 class Settings(BaseSettings):
@@ -14,10 +17,15 @@ class Settings(BaseSettings):
 
     # Tamanho da página de dados do IBOV
     PAGE_SIZE: int = Field(120, env="PAGE_SIZE")
-    # Nome do índice para consulta no endpoint JSON (por ex. "IBOV")
+    # Nome do índice para consulta no endpoint JSON (por ex. "IBOV").
+    # Aceita lista separada por vírgula, com segmento opcional (por ex. "IBOV,IBXX:1,SMLL")
     INDEX: str = Field("IBOV", env="INDEX")
     # Segmento de mercado para consulta no endpoint JSON (por ex. "1")
     SEGMENT: str = Field("1", env="SEGMENT")
+    # Número máximo de páginas buscadas em paralelo no endpoint JSON
+    FETCH_WORKERS: int = Field(4, env="FETCH_WORKERS")
+    # Número máximo de índices coletados em paralelo em uma execução
+    INDEX_WORKERS: int = Field(4, env="INDEX_WORKERS")
 
     # Bucket S3 onde os dados serão persistidos
     S3_BUCKET: str = Field(..., env="S3_BUCKET")
@@ -26,15 +34,129 @@ class Settings(BaseSettings):
     # Chaves de acesso AWS para autenticação programática
     AWS_ACCESS_KEY_ID: str = Field(..., env="AWS_ACCESS_KEY_ID")
     AWS_SECRET_ACCESS_KEY: str = Field(..., env="AWS_SECRET_ACCESS_KEY")
+    # Partições serializadas/enviadas ao S3 em paralelo (também dimensiona o pool de conexões)
+    S3_UPLOAD_WORKERS: int = Field(8, env="S3_UPLOAD_WORKERS")
+    # Tamanho (bytes) a partir do qual os uploads ao S3 usam multipart
+    S3_MULTIPART_THRESHOLD: int = Field(8 * 1024 * 1024, env="S3_MULTIPART_THRESHOLD")
+    # Não regrava partições cujo conteúdo não mudou desde a última gravação (manifesto por partição)
+    SKIP_UNCHANGED: bool = Field(True, env="SKIP_UNCHANGED")
     # Timeout de requisição em segundos
     TIMEOUT: int = Field(10, env="TIMEOUT")
-    # Prefixo de pasta dentro do bucket S3
+    # Prefixo de pasta dentro do bucket S3 (aceita o placeholder "{index}", por ex. "raw/{index}")
     S3_PREFIX: str = Field("raw/ibov", env="S3_PREFIX")
+    # Índice gravado diretamente em S3_PREFIX (sem "{index}"); os demais vão para pastas irmãs
+    S3_PREFIX_INDEX: str = Field("IBOV", env="S3_PREFIX_INDEX")
+
+    # Backend de parsing do HTML: "auto", "lxml", "stream" ou "bs4" (BeautifulSoup)
+    PARSER_BACKEND: str = Field("auto", env="PARSER_BACKEND")
+
+    # Diretório do cache local de respostas HTTP (desabilitado quando vazio)
+    HTTP_CACHE_DIR: Optional[str] = Field(None, env="HTTP_CACHE_DIR")
+    # Segundos em que uma resposta em cache é reutilizada sem consultar a B3
+    HTTP_CACHE_TTL: int = Field(60, env="HTTP_CACHE_TTL")
+    # Tamanho máximo do cache de respostas HTTP em bytes
+    HTTP_CACHE_MAX_BYTES: int = Field(256 * 1024 * 1024, env="HTTP_CACHE_MAX_BYTES")
+
+    # Número máximo de pregões processados simultaneamente no backfill
+    BACKFILL_WORKERS: int = Field(4, env="BACKFILL_WORKERS")
+    # Arquivo local de checkpoint do backfill (permite retomar execuções interrompidas)
+    BACKFILL_CHECKPOINT: str = Field(".backfill_checkpoint.json", env="BACKFILL_CHECKPOINT")
+
+    # Partições compactadas em paralelo e linhas por row group do arquivo compactado
+    COMPACTION_WORKERS: int = Field(4, env="COMPACTION_WORKERS")
+    COMPACTION_ROW_GROUP_SIZE: int = Field(128 * 1024, env="COMPACTION_ROW_GROUP_SIZE")
+
+    # Cache local dos Parquets lidos por Storage.load (opcional; vazio desabilita) e tamanho máximo em bytes
+    STORAGE_CACHE_DIR: Optional[str] = Field(None, env="STORAGE_CACHE_DIR")
+    STORAGE_CACHE_MAX_BYTES: int = Field(1024 * 1024 * 1024, env="STORAGE_CACHE_MAX_BYTES")
+
+    # Diretório do índice local de séries por ticker, atualizado a cada run (opcional; vazio desabilita)
+    TICKER_INDEX_DIR: Optional[str] = Field(None, env="TICKER_INDEX_DIR")
+
+    # Diretório do snapshot Arrow IPC da carteira mais recente de cada índice (opcional; vazio desabilita)
+    SNAPSHOT_DIR: Optional[str] = Field(None, env="SNAPSHOT_DIR")
+
+    # Relatório JSON de métricas por etapa e textfile Prometheus (node_exporter) de cada execução (opcionais)
+    RUN_REPORT_PATH: Optional[str] = Field(None, env="RUN_REPORT_PATH")
+    METRICS_TEXTFILE: Optional[str] = Field(None, env="METRICS_TEXTFILE")
+
+    # Endpoint S3 alternativo (MinIO, servidor local dos benchmarks); vazio usa o endpoint da AWS
+    S3_ENDPOINT_URL: Optional[str] = Field(None, env="S3_ENDPOINT_URL")
+
+    # Destino da camada refined (URI s3:// ou diretório local; vazio: s3://<S3_BUCKET>/refined)
+    REFINED_URI: Optional[str] = Field(None, env="REFINED_URI")
+
+    # Fetch assíncrono (aiohttp) no run: keep-alive (s) das conexões ociosas e limites de taxa
+    # em requisições/s, global e por host (0 desabilita), com as respectivas rajadas
+    HTTP_ASYNC: bool = Field(False, env="HTTP_ASYNC")
+    HTTP_KEEPALIVE_TIMEOUT: float = Field(30.0, env="HTTP_KEEPALIVE_TIMEOUT")
+    HTTP_RATE_LIMIT: float = Field(0.0, env="HTTP_RATE_LIMIT")
+    HTTP_RATE_BURST: int = Field(5, env="HTTP_RATE_BURST")
+    HTTP_HOST_RATE_LIMIT: float = Field(0.0, env="HTTP_HOST_RATE_LIMIT")
+    HTTP_HOST_RATE_BURST: int = Field(5, env="HTTP_HOST_RATE_BURST")
+
+    # Pipeline em streaming (run/backfill): páginas -> lotes de STREAM_BATCH_SIZE linhas ->
+    # Parquet gravado e enviado incrementalmente; memória limitada pelo lote
+    STREAMING: bool = Field(False, env="STREAMING")
+    STREAM_BATCH_SIZE: int = Field(50000, env="STREAM_BATCH_SIZE")
+
+    # Arquivo dos payloads brutos da B3 (zstd, endereçado por conteúdo): diretório local e/ou
+    # prefixo no S3_BUCKET (vazios desabilitam) e nível de compressão
+    ARCHIVE_DIR: Optional[str] = Field(None, env="ARCHIVE_DIR")
+    ARCHIVE_S3_PREFIX: Optional[str] = Field(None, env="ARCHIVE_S3_PREFIX")
+    ARCHIVE_ZSTD_LEVEL: int = Field(3, env="ARCHIVE_ZSTD_LEVEL")
+
+    # Modo daemon: intervalo mínimo/máximo (s) entre coletas, fator de backoff quando a carteira
+    # não muda e margem (min) em torno da abertura/fechamento em que vale o intervalo mínimo
+    DAEMON_MIN_INTERVAL: int = Field(60, env="DAEMON_MIN_INTERVAL")
+    DAEMON_MAX_INTERVAL: int = Field(900, env="DAEMON_MAX_INTERVAL")
+    DAEMON_BACKOFF: float = Field(2.0, env="DAEMON_BACKOFF")
+    DAEMON_EDGE_MINUTES: int = Field(30, env="DAEMON_EDGE_MINUTES")
+    # Endereço e porta do /health e /metrics do daemon (porta 0 desabilita)
+    DAEMON_HTTP_HOST: str = Field("127.0.0.1", env="DAEMON_HTTP_HOST")
+    DAEMON_HTTP_PORT: int = Field(9108, env="DAEMON_HTTP_PORT")
+
+    # Cache em disco (arquivo 0600) das credenciais temporárias do AWS_ROLE_ARN; vazio desabilita
+    AWS_CREDENTIALS_CACHE: Optional[str] = Field(None, env="AWS_CREDENTIALS_CACHE")
+
+    # Backend dos objetos do Storage: "s3" ou "local" (arquivos sob STORAGE_LOCAL_DIR)
+    STORAGE_BACKEND: str = Field("s3", env="STORAGE_BACKEND")
+    STORAGE_LOCAL_DIR: str = Field("./data", env="STORAGE_LOCAL_DIR")
+    # Spool write-behind (opcional; vazio desabilita): gravações vão para este diretório e um
+    # uploader em segundo plano as envia ao backend em lotes, com uploads simultâneos e retries
+    SPOOL_DIR: Optional[str] = Field(None, env="SPOOL_DIR")
+    SPOOL_UPLOAD_WORKERS: int = Field(4, env="SPOOL_UPLOAD_WORKERS")
+    SPOOL_BATCH_SIZE: int = Field(32, env="SPOOL_BATCH_SIZE")
+    # Espera (s) após a primeira falha de um upload, dobrada a cada nova falha até o máximo
+    SPOOL_RETRY_BACKOFF: float = Field(1.0, env="SPOOL_RETRY_BACKOFF")
+    SPOOL_RETRY_MAX_BACKOFF: float = Field(300.0, env="SPOOL_RETRY_MAX_BACKOFF")
+    # Segundos que um comando aguarda o spool esvaziar antes de sair (o restante segue no disco)
+    SPOOL_DRAIN_TIMEOUT: float = Field(30.0, env="SPOOL_DRAIN_TIMEOUT")
 
     class Config:
         # Arquivo de variáveis de ambiente default
         env_file = ".env.default"
         env_file_encoding = "utf-8"
 
-# Instância única para uso em toda a aplicação
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    Instância única das configurações, criada no primeiro uso (e não na importação),
+    depois que o ponto de entrada carregou o .env.
+    """
+    return Settings()
+
+
+class _LazySettings:
+    """
+    Encaminha leitura e escrita de atributos para get_settings().
+    """
+    def __getattr__(self, name):
+        return getattr(get_settings(), name)
+
+    def __setattr__(self, name, value):
+        setattr(get_settings(), name, value)
+
+
+# Instância única para uso em toda a aplicação (materializada no primeiro acesso)
+settings = _LazySettings()
@@ -0,0 +1,102 @@
+"""
+b3_scraper.domain.calendar
+Calendário de pregões da B3 (dias úteis menos feriados de bolsa) e horário do pregão.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import FrozenSet, List, Tuple
+
+# Horário de Brasília: UTC-3 fixo desde o fim do horário de verão (2019)
+B3_TIMEZONE = timezone(timedelta(hours=-3), "BRT")
+# Abertura e fechamento do pregão regular (horário de Brasília)
+SESSION_OPEN = time(10, 0)
+SESSION_CLOSE = time(17, 0)
+
+
+def easter(year: int) -> date:
+    """
+    Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher).
+    """
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+@lru_cache(maxsize=None)
+def b3_holidays(year: int) -> FrozenSet[date]:
+    """
+    Feriados em que a B3 não tem pregão:
+    - nacionais fixos, Carnaval, Sexta-feira Santa e Corpus Christi
+    - 24/12 e 31/12 (sem pregão)
+    - aniversário de São Paulo e Revolução Constitucionalista até 2021
+    - Dia da Consciência Negra a partir de 2024
+    """
+    easter_sunday = easter(year)
+    holidays = {
+        date(year, 1, 1),
+        easter_sunday - timedelta(days=48),  # Carnaval (segunda)
+        easter_sunday - timedelta(days=47),  # Carnaval (terça)
+        easter_sunday - timedelta(days=2),   # Sexta-feira Santa
+        date(year, 4, 21),
+        date(year, 5, 1),
+        easter_sunday + timedelta(days=60),  # Corpus Christi
+        date(year, 9, 7),
+        date(year, 10, 12),
+        date(year, 11, 2),
+        date(year, 11, 15),
+        date(year, 12, 24),
+        date(year, 12, 25),
+        date(year, 12, 31),
+    }
+    if year <= 2021:
+        holidays.update({date(year, 1, 25), date(year, 7, 9)})
+    if year >= 2024:
+        holidays.add(date(year, 11, 20))
+    return frozenset(holidays)
+
+
+def is_trading_day(day: date) -> bool:
+    """
+    Indica se há pregão na data informada.
+    """
+    return day.weekday() < 5 and day not in b3_holidays(day.year)
+
+
+def trading_days(start: date, end: date) -> List[date]:
+    """
+    Lista os dias de pregão entre start e end (inclusive), em ordem crescente.
+    """
+    days: List[date] = []
+    current = start
+    while current <= end:
+        if is_trading_day(current):
+            days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def next_trading_day(day: date) -> date:
+    """
+    Primeiro dia de pregão a partir de `day` (inclusive).
+    """
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day
+
+
+def session_bounds(day: date) -> Tuple[datetime, datetime]:
+    """
+    Abertura e fechamento do pregão regular de um dia, com fuso B3_TIMEZONE.
+    """
+    return (
+        datetime.combine(day, SESSION_OPEN, tzinfo=B3_TIMEZONE),
+        datetime.combine(day, SESSION_CLOSE, tzinfo=B3_TIMEZONE),
+    )
@@ -3,8 +3,9 @@ b3_scraper.domain.models
 Modelos de domínio para o scraper da B3.
 """
 from dataclasses import dataclass
-from decimal import Decimal
+from decimal import Context, Decimal
 from datetime import date
+from typing import Optional, Tuple
 
 
 @dataclass
@@ -23,4 +24,105 @@ class TradeRecord:
     type: str
     theoretical_quantity: Decimal
     participation_percentage: Decimal
-    record_date: date  # Data do pregão (DD/MM/YY)
\ No newline at end of file
+    record_date: date  # Data do pregão (DD/MM/YY)
+
+
+# Casas decimais das representações em inteiro escalado (mesmas da camada colunar)
+QTY_SCALE = 4
+PART_SCALE = 6
+
+
+def to_scaled(value: Decimal, scale: int) -> int:
+    """
+    Converte um Decimal em inteiro escalado (value * 10**scale) sem arredondamento.
+    :raises ValueError: se o valor tiver mais casas decimais que `scale` ou não for finito
+    """
+    sign, digits, exponent = value.as_tuple()
+    if not isinstance(exponent, int):
+        raise ValueError(f"Valor não finito: {value}")
+    coefficient = int("".join(map(str, digits)) or "0")
+    shift = exponent + scale
+    if shift >= 0:
+        scaled = coefficient * 10 ** shift
+    else:
+        scaled, remainder = divmod(coefficient, 10 ** -shift)
+        if remainder:
+            raise ValueError(f"{value} tem mais de {scale} casas decimais")
+    return -scaled if sign else scaled
+
+
+def from_scaled(value: int, scale: int) -> Decimal:
+    """
+    Converte um inteiro escalado de volta em Decimal exato.
+    """
+    return Decimal(value).scaleb(-scale, context=Context(prec=max(len(str(abs(value))), 1)))
+
+
+class CompactTradeRecord:
+    """
+    Versão compacta de TradeRecord: sem __dict__ (__slots__) e com quantidade e
+    participação guardadas como inteiros escalados por QTY_SCALE/PART_SCALE.
+    """
+    __slots__ = ("code", "stock", "type", "quantity_scaled", "percentage_scaled", "record_date")
+
+    def __init__(
+        self,
+        code: str,
+        stock: str,
+        type: str,
+        quantity_scaled: int,
+        percentage_scaled: int,
+        record_date: Optional[date],
+    ):
+        self.code = code
+        self.stock = stock
+        self.type = type
+        self.quantity_scaled = quantity_scaled
+        self.percentage_scaled = percentage_scaled
+        self.record_date = record_date
+
+    @property
+    def theoretical_quantity(self) -> Decimal:
+        return from_scaled(self.quantity_scaled, QTY_SCALE)
+
+    @property
+    def participation_percentage(self) -> Decimal:
+        return from_scaled(self.percentage_scaled, PART_SCALE)
+
+    @classmethod
+    def from_record(cls, record: TradeRecord) -> "CompactTradeRecord":
+        return cls(
+            code=record.code,
+            stock=record.stock,
+            type=record.type,
+            quantity_scaled=to_scaled(record.theoretical_quantity, QTY_SCALE),
+            percentage_scaled=to_scaled(record.participation_percentage, PART_SCALE),
+            record_date=record.record_date,
+        )
+
+    def to_record(self) -> TradeRecord:
+        return TradeRecord(
+            code=self.code,
+            stock=self.stock,
+            type=self.type,
+            theoretical_quantity=self.theoretical_quantity,
+            participation_percentage=self.participation_percentage,
+            record_date=self.record_date,
+        )
+
+    def _key(self) -> Tuple:
+        return (self.code, self.stock, self.type, self.quantity_scaled, self.percentage_scaled, self.record_date)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompactTradeRecord):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return (f"CompactTradeRecord(code={self.code!r}, stock={self.stock!r}, type={self.type!r}, "
+                f"theoretical_quantity={self.theoretical_quantity}, "
+                f"participation_percentage={self.participation_percentage}, record_date={self.record_date!r})")
+
@@ -0,0 +1,232 @@
+"""
+b3_scraper.infrastructure.archive
+Arquivo dos payloads brutos da B3 (JSON do GetPortfolioDay ou HTML da "Carteira do Dia"),
+para auditoria e reprocessamento sem acessar a B3:
+- blobs comprimidos com zstd e endereçados pelo SHA-256 do conteúdo
+  (blobs/<aa>/<sha256>.<json|html>.zst): payloads idênticos são gravados uma única vez;
+- índice por índice/data do pregão (index/<INDICE>/<YYYY-MM-DD>/<coleta>-<sha256>.json),
+  uma entrada por coleta, com segmento, tipo e horário da coleta.
+Os mesmos objetos podem ficar em um diretório local e/ou em um prefixo do S3.
+"""
+import hashlib
+import json
+import logging
+import os
+import posixpath
+import tempfile
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("json", "html")
+
+
+@dataclass
+class ArchiveEntry:
+    """
+    Entrada do índice do arquivo: um payload coletado de um índice em um pregão.
+    """
+    index: str
+    segment: str
+    record_date: str
+    sha256: str
+    kind: str
+    fetched_at: str
+    size: int
+
+
+class _LocalStore:
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(os.path.join(self.root, key))
+
+    def put(self, key: str, body: bytes) -> None:
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self.root, key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def list(self, prefix: str) -> Iterator[str]:
+        base = os.path.join(self.root, prefix)
+        for directory, _, files in os.walk(base):
+            for name in files:
+                if not name.endswith(".tmp"):
+                    yield posixpath.relpath(os.path.join(directory, name), self.root).replace(os.sep, "/")
+
+
+class _S3Store:
+    def __init__(self, client: Any, bucket: str, prefix: str):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put(self, key: str, body: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=body)
+
+    def get(self, key: str) -> Optional[bytes]:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def list(self, prefix: str) -> Iterator[str]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        start = len(self.prefix) + 1 if self.prefix else 0
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for obj in page.get("Contents", []):
+                yield obj["Key"][start:]
+
+
+def _canonical_json(data: dict) -> bytes:
+    # Serialização estável: o mesmo conteúdo sempre gera o mesmo hash
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class PayloadArchive:
+    """
+    Arquivo de payloads endereçado por conteúdo. Grava em todos os destinos configurados
+    e lê do primeiro que tiver o objeto (local antes do S3).
+    """
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        s3_client: Any = None,
+        bucket: Optional[str] = None,
+        s3_prefix: Optional[str] = None,
+        level: int = 3,
+    ):
+        """
+        :param directory: diretório local do arquivo; None desabilita
+        :param s3_client: cliente boto3 S3 (ver infrastructure.aws); None desabilita o S3
+        :param bucket: bucket S3 do arquivo
+        :param s3_prefix: prefixo do arquivo no bucket (ex.: "archive")
+        :param level: nível de compressão zstd
+        """
+        self.stores: List[Union[_LocalStore, _S3Store]] = []
+        if directory:
+            self.stores.append(_LocalStore(directory))
+        if s3_client is not None and bucket:
+            self.stores.append(_S3Store(s3_client, bucket, s3_prefix or ""))
+        if not self.stores:
+            raise ValueError("PayloadArchive precisa de um diretório local e/ou de um bucket S3")
+        self.level = level
+
+    @staticmethod
+    def blob_key(sha256: str, kind: str) -> str:
+        return f"blobs/{sha256[:2]}/{sha256}.{kind}.zst"
+
+    @staticmethod
+    def entry_key(index: str, record_date: str, fetched_at: str, sha256: str) -> str:
+        # O horário da coleta faz parte da chave: um conteúdo que volta a ser publicado
+        # (A, B, A) ganha uma nova entrada e é reconhecido como o mais recente
+        stamp = fetched_at.replace("-", "").replace(":", "")
+        return f"index/{index.upper()}/{record_date}/{stamp}-{sha256}.json"
+
+    def put_json(self, data: dict, index: str, segment: str, record_date: Optional[date] = None) -> ArchiveEntry:
+        """
+        Arquiva a resposta JSON (todas as páginas) da coleta de um índice.
+        :param record_date: data do pregão; default: a data do cabeçalho do payload
+        """
+        if record_date is None:
+            try:
+                record_date = datetime.strptime(data.get("header", {}).get("date", "").strip(), "%d/%m/%y").date()
+            except ValueError:
+                record_date = date.today()
+        return self._put(_canonical_json(data), "json", index, segment, record_date)
+
+    def put_html(self, html: str, index: str, segment: str, record_date: date) -> ArchiveEntry:
+        """
+        Arquiva o HTML da "Carteira do Dia" de um índice.
+        """
+        return self._put(html.encode("utf-8"), "html", index, segment, record_date)
+
+    def _put(self, payload: bytes, kind: str, index: str, segment: str, record_date: date) -> ArchiveEntry:
+        import zstandard
+
+        sha256 = hashlib.sha256(payload).hexdigest()
+        entry = ArchiveEntry(
+            index=index.upper(),
+            segment=segment,
+            record_date=record_date.isoformat(),
+            sha256=sha256,
+            kind=kind,
+            fetched_at=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            size=len(payload),
+        )
+        blob_key = self.blob_key(sha256, kind)
+        entry_key = self.entry_key(index, entry.record_date, entry.fetched_at, sha256)
+        compressed = None
+        for store in self.stores:
+            # Deduplicação: o blob só é gravado se ainda não existir; a entrada registra
+            # cada coleta
+            if not store.exists(blob_key):
+                compressed = compressed or zstandard.ZstdCompressor(level=self.level).compress(payload)
+                store.put(blob_key, compressed)
+            if not store.exists(entry_key):
+                store.put(entry_key, json.dumps(entry.__dict__).encode("utf-8"))
+        logger.debug("Archived %s payload of %s (%s): %s", kind, index, entry.record_date, sha256)
+        return entry
+
+    def entries(self, index: str, start: Optional[date] = None, end: Optional[date] = None) -> List[ArchiveEntry]:
+        """
+        Entradas de um índice entre start e end (inclusive), ordenadas por data e horário de coleta.
+        """
+        found = {}
+        for store in self.stores:
+            for key in store.list(f"index/{index.upper()}/"):
+                record_date = key.split("/")[2]
+                if (start and record_date < start.isoformat()) or (end and record_date > end.isoformat()):
+                    continue
+                if key not in found:
+                    body = store.get(key)
+                    if body is not None:
+                        found[key] = ArchiveEntry(**json.loads(body))
+        return sorted(found.values(), key=lambda entry: (entry.record_date, entry.fetched_at))
+
+    def get(self, entry: ArchiveEntry) -> Union[dict, str]:
+        """
+        Payload de uma entrada: dict (JSON) ou str (HTML). Confere o hash do conteúdo.
+        """
+        import zstandard
+
+        key = self.blob_key(entry.sha256, entry.kind)
+        for store in self.stores:
+            compressed = store.get(key)
+            if compressed is None:
+                continue
+            payload = zstandard.ZstdDecompressor().decompress(compressed)
+            if hashlib.sha256(payload).hexdigest() != entry.sha256:
+                raise ValueError(f"Blob corrompido no arquivo: {key}")
+            return json.loads(payload) if entry.kind == "json" else payload.decode("utf-8")
+        raise FileNotFoundError(f"Blob ausente no arquivo: {key}")
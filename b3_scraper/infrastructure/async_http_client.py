@@ -0,0 +1,236 @@
+"""
+b3_scraper.infrastructure.async_http_client
+Cliente HTTP assíncrono (aiohttp) equivalente ao HttpClient: mesmo retry/backoff do
+urllib3 Retry, pool de conexões com keep-alive configurável, limite de taxa por token
+bucket (global e por host) e coalescência de GETs idênticos simultâneos.
+"""
+import asyncio
+import json
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from b3_scraper.instrumentation import stage
+
+if TYPE_CHECKING:
+    import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Mesmos defaults do urllib3 Retry usado pelo HttpClient
+RETRY_AFTER_STATUS_CODES = frozenset({413, 429, 503})
+BACKOFF_MAX = 120.0
+
+
+class TokenBucket:
+    """
+    Token bucket para asyncio: até `burst` requisições imediatas e, depois, `rate` por segundo.
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        :param rate: tokens repostos por segundo (> 0)
+        :param burst: capacidade do balde
+        """
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """
+        Aguarda até haver um token disponível e o consome.
+        """
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class AsyncHttpClient:
+    """
+    Contraparte assíncrona do HttpClient. Use como context manager assíncrono
+    (ou chame close()); a sessão aiohttp é criada no event loop em uso.
+    """
+    def __init__(
+        self,
+        timeout: int,
+        max_retries: int = 3,
+        backoff_factor: float = 0.3,
+        status_forcelist: Optional[frozenset] = frozenset({500, 502, 503, 504}),
+        pool_maxsize: int = 10,
+        keepalive_timeout: float = 30.0,
+        rate_limit: Optional[float] = None,
+        rate_burst: int = 1,
+        host_rate_limit: Optional[float] = None,
+        host_rate_burst: int = 1,
+    ):
+        """
+        :param timeout: tempo máximo (em segundos) para conectar e entre leituras do socket
+        :param max_retries: número máximo de novas tentativas (erros de conexão/timeout e status_forcelist)
+        :param backoff_factor: fator de backoff exponencial entre tentativas (como no urllib3)
+        :param status_forcelist: códigos HTTP que disparam retry
+        :param pool_maxsize: conexões simultâneas por host
+        :param keepalive_timeout: segundos que uma conexão ociosa é mantida aberta
+        :param rate_limit: requisições por segundo somando todos os hosts; None ou 0 desabilita
+        :param rate_burst: requisições permitidas em rajada pelo limite global
+        :param host_rate_limit: requisições por segundo por host; None ou 0 desabilita
+        :param host_rate_burst: requisições permitidas em rajada por host
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.status_forcelist = status_forcelist or frozenset()
+        self.pool_maxsize = pool_maxsize
+        self.keepalive_timeout = keepalive_timeout
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.host_rate_limit = host_rate_limit
+        self.host_rate_burst = host_rate_burst
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._global_bucket: Optional[TokenBucket] = None
+        self._host_buckets: Dict[str, TokenBucket] = {}
+        self._inflight: Dict[Tuple, "asyncio.Future"] = {}
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        if self._session is None or self._session.closed:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=self.pool_maxsize,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            # Timeout por conexão e por leitura, como no requests: o tempo na fila do pool
+            # (gather de todas as páginas com limit_per_host) não conta
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout),
+            )
+            # Buckets dependem do event loop corrente (asyncio.Lock)
+            self._global_bucket = TokenBucket(self.rate_limit, self.rate_burst) if self.rate_limit else None
+            self._host_buckets = {}
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _throttle(self, url: str) -> None:
+        if self._global_bucket is not None:
+            await self._global_bucket.acquire()
+        if self.host_rate_limit:
+            host = urlsplit(url).netloc
+            bucket = self._host_buckets.get(host)
+            if bucket is None:
+                bucket = self._host_buckets[host] = TokenBucket(self.host_rate_limit, self.host_rate_burst)
+            await bucket.acquire()
+
+    def _backoff(self, consecutive_errors: int) -> float:
+        # urllib3 Retry.get_backoff_time: sem espera na primeira nova tentativa
+        if consecutive_errors <= 1:
+            return 0.0
+        return min(BACKOFF_MAX, self.backoff_factor * (2 ** (consecutive_errors - 1)))
+
+    async def _request(self, method: str, url: str, **kwargs) -> Tuple[int, bytes, str]:
+        """
+        Envia a requisição com retry/backoff, registrando a etapa "http.<método>".
+        :return: (status, corpo, encoding)
+        """
+        import aiohttp
+
+        session = self._get_session()
+        errors = 0
+        with stage(f"http.{method.lower()}") as span:
+            while True:
+                await self._throttle(url)
+                try:
+                    async with session.request(method, url, **kwargs) as response:
+                        body = await response.read()
+                        status = response.status
+                        retry_after = _retry_after(response.headers.get("Retry-After"))
+                        encoding = response.get_encoding() if body else "utf-8"
+                        if status not in self.status_forcelist or errors >= self.max_retries:
+                            span.add(bytes_in=len(body), retries=errors)
+                            response.raise_for_status()
+                            return status, body, encoding
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    if errors >= self.max_retries:
+                        span.add(retries=errors)
+                        raise
+                    errors += 1
+                    delay = self._backoff(errors)
+                    logger.debug("Retrying %s %s after %s (attempt %d)", method, url, e, errors)
+                else:
+                    errors += 1
+                    delay = self._backoff(errors)
+                    if status in RETRY_AFTER_STATUS_CODES and retry_after is not None:
+                        delay = retry_after
+                    logger.debug("Retrying %s %s after HTTP %d (attempt %d)", method, url, status, errors)
+                if delay:
+                    await asyncio.sleep(delay)
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> str:
+        """
+        Executa um GET e retorna o conteúdo de resposta como texto. GETs idênticos
+        (URL, parâmetros e cabeçalhos) em andamento compartilham a mesma requisição.
+        """
+        key = (url, json.dumps(params or {}, sort_keys=True, default=str), json.dumps(headers or {}, sort_keys=True))
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            logger.debug("AsyncHttpClient GET coalesced url=%s params=%s", url, params)
+            return await asyncio.shield(inflight)
+        logger.debug("AsyncHttpClient GET url=%s params=%s headers=%s", url, params, headers)
+        task = asyncio.ensure_future(self._get_text(url, params, headers))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _get_text(self, url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]]) -> str:
+        _, body, encoding = await self._request("GET", url, params=params, headers=headers)
+        return body.decode(encoding, errors="replace")
+
+    async def post(
+        self,
+        url: str,
+        data: Optional[Any] = None,
+        json: Optional[Any] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> str:
+        """
+        Executa um POST e retorna o conteúdo de resposta como texto (sem coalescência).
+        """
+        logger.debug("AsyncHttpClient POST url=%s data=%s json=%s headers=%s", url, data, json, headers)
+        _, body, encoding = await self._request("POST", url, data=data, json=json, headers=headers)
+        return body.decode(encoding, errors="replace")
@@ -0,0 +1,233 @@
+"""
+b3_scraper.infrastructure.aws
+Credenciais e clientes AWS compartilhados pelo processo:
+- com AWS_ROLE_ARN, o role é assumido uma única vez; as credenciais temporárias são
+  renovadas em segundo plano antes de expirar (e sob demanda pelo botocore, se preciso);
+- opcionalmente, as credenciais ficam em cache no disco (arquivo 0600), evitando o
+  assume-role a cada execução curta da CLI;
+- clientes boto3 (thread-safe) são reutilizados por todos os Storage do processo.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import boto3
+
+logger = logging.getLogger(__name__)
+
+SESSION_NAME = "b3-scraper-session"
+# Antecedência mínima de validade para reutilizar credenciais do cache em disco
+_MIN_REMAINING = timedelta(minutes=15)
+
+
+def _parse_expiry(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+class CredentialCache:
+    """
+    Cache em disco das credenciais temporárias, por ARN do role. O arquivo é gravado
+    com permissão 0600 e ignorado se estiver acessível a outros usuários.
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def _read_all(self) -> Dict[str, Dict[str, str]]:
+        try:
+            if os.stat(self.path).st_mode & 0o077:
+                logger.warning("Ignoring credential cache %s: permissions are not 0600", self.path)
+                return {}
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, role_arn: str) -> Optional[Dict[str, str]]:
+        """
+        Credenciais do role ainda válidas por pelo menos _MIN_REMAINING, ou None.
+        """
+        metadata = self._read_all().get(role_arn)
+        try:
+            if metadata and _parse_expiry(metadata["expiry_time"]) - datetime.now(timezone.utc) > _MIN_REMAINING:
+                return metadata
+        except (KeyError, ValueError):
+            pass
+        return None
+
+    def put(self, role_arn: str, metadata: Dict[str, str]) -> None:
+        entries = self._read_all()
+        entries[role_arn] = metadata
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            os.fchmod(fd, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not write credential cache %s: %s", self.path, e)
+
+
+class AssumedRoleProvider:
+    """
+    Credenciais renováveis (botocore RefreshableCredentials) de um role assumido via STS.
+    """
+    def __init__(self, role_arn: str, region: str, cache: Optional[CredentialCache] = None):
+        """
+        :param role_arn: ARN do role
+        :param region: região do endpoint STS
+        :param cache: cache em disco das credenciais; None desabilita
+        """
+        from botocore.credentials import RefreshableCredentials
+
+        self.role_arn = role_arn
+        self.region = region
+        self.cache = cache
+        self._stop = threading.Event()
+        metadata = cache.get(role_arn) if cache else None
+        if metadata:
+            logger.debug("Using cached credentials for role %s", role_arn)
+        else:
+            metadata = self._assume_role()
+        self.credentials = RefreshableCredentials.create_from_metadata(
+            metadata=metadata, refresh_using=self._assume_role, method="sts-assume-role"
+        )
+        self._refresher = threading.Thread(target=self._refresh_loop, name="aws-credentials", daemon=True)
+        self._refresher.start()
+
+    def _assume_role(self) -> Dict[str, str]:
+        import boto3
+
+        response = boto3.client("sts", region_name=self.region).assume_role(
+            RoleArn=self.role_arn, RoleSessionName=SESSION_NAME
+        )
+        creds = response["Credentials"]
+        metadata = {
+            "access_key": creds["AccessKeyId"],
+            "secret_key": creds["SecretAccessKey"],
+            "token": creds["SessionToken"],
+            "expiry_time": creds["Expiration"].astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+        logger.debug("Assumed role %s (expires at %s)", self.role_arn, metadata["expiry_time"])
+        if self.cache:
+            self.cache.put(self.role_arn, metadata)
+        return metadata
+
+    def _refresh_loop(self) -> None:
+        # Acorda logo após entrar na janela de renovação "advisory" do botocore; a renovação
+        # acontece aqui, fora do caminho das requisições ao S3
+        advisory = timedelta(seconds=getattr(self.credentials, "_advisory_refresh_timeout", 15 * 60))
+        while not self._stop.is_set():
+            refresh_at = self.credentials._expiry_time - advisory + timedelta(seconds=5)
+            wait = (refresh_at - datetime.now(timezone.utc)).total_seconds()
+            if self._stop.wait(max(wait, 5.0)):
+                return
+            try:
+                self.credentials.get_frozen_credentials()
+            except Exception as e:
+                logger.warning("Background refresh of role %s failed: %s", self.role_arn, e)
+
+    def frozen(self):
+        """
+        Credenciais atuais (access_key, secret_key, token), renovando se necessário.
+        """
+        return self.credentials.get_frozen_credentials()
+
+    def close(self) -> None:
+        self._stop.set()
+
+
+_lock = threading.Lock()
+_provider: Optional[AssumedRoleProvider] = None
+_session: Optional["boto3.Session"] = None
+_clients: Dict[Tuple[str, str, Optional[str], Optional[str]], Tuple[int, Any]] = {}
+
+
+def _reset_after_fork() -> None:
+    # Clientes boto3 e a thread de renovação não sobrevivem ao fork (ProcessPool do backfill)
+    global _lock, _provider, _session
+    _lock = threading.Lock()
+    _provider = None
+    _session = None
+    _clients.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def credential_provider() -> Optional[AssumedRoleProvider]:
+    """
+    Provedor compartilhado das credenciais do AWS_ROLE_ARN; None quando não há role a assumir.
+    """
+    global _provider, _session
+    role_arn = os.getenv("AWS_ROLE_ARN")
+    if not role_arn:
+        return None
+    with _lock:
+        if _provider is None or _provider.role_arn != role_arn:
+            from b3_scraper.config import settings
+
+            cache = CredentialCache(settings.AWS_CREDENTIALS_CACHE) if settings.AWS_CREDENTIALS_CACHE else None
+            if _provider is not None:
+                _provider.close()
+            _provider = AssumedRoleProvider(role_arn, settings.AWS_REGION, cache)
+            _session = None
+        return _provider
+
+
+def session() -> "boto3.Session":
+    """
+    Sessão boto3 do processo, com as credenciais renováveis do role quando houver.
+    """
+    global _session
+    provider = credential_provider()
+    with _lock:
+        if _session is None:
+            import boto3
+            import botocore.session
+
+            botocore_session = botocore.session.get_session()
+            if provider is not None:
+                botocore_session._credentials = provider.credentials
+            _session = boto3.Session(botocore_session=botocore_session)
+        return _session
+
+
+def client(
+    service: str,
+    region: str,
+    endpoint_url: Optional[str] = None,
+    max_pool_connections: int = 10,
+    addressing_style: Optional[str] = None,
+):
+    """
+    Cliente boto3 compartilhado (clientes são thread-safe). Um pedido com pool de conexões
+    maior que o do cliente existente cria um novo cliente, que passa a ser o compartilhado.
+    :param service: ex.: "s3"
+    :param region: região AWS
+    :param endpoint_url: endpoint alternativo (MinIO, servidor local de benchmark...)
+    :param max_pool_connections: conexões mínimas do pool HTTP do cliente
+    :param addressing_style: estilo de endereçamento S3 ("path", "virtual"); None usa o padrão
+    """
+    key = (service, region, endpoint_url, addressing_style)
+    boto_session = session()
+    with _lock:
+        existing = _clients.get(key)
+        if existing and existing[0] >= max_pool_connections:
+            return existing[1]
+        from botocore.config import Config
+
+        config = Config(
+            max_pool_connections=max_pool_connections,
+            s3={"addressing_style": addressing_style} if addressing_style else None,
+        )
+        created = boto_session.client(service, region_name=region, endpoint_url=endpoint_url, config=config)
+        _clients[key] = (max_pool_connections, created)
+        return created
@@ -0,0 +1,819 @@
+"""
+b3_scraper.infrastructure.backends
+Backends de objetos usados pelo Storage (listar, ler, gravar e remover chaves):
+- S3Backend: bucket S3 (ou endpoint compatível);
+- LocalBackend: diretório local, com gravações atômicas (fsync + rename);
+- SpoolBackend: write-behind sobre outro backend. As gravações vão para um spool local
+  durável e retornam em seguida; um uploader em segundo plano esvazia o spool no destino
+  em lotes, com concorrência e retries, retomando o que ficou pendente após um reinício.
+"""
+import fcntl
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from b3_scraper.instrumentation import register_gauges, stage, unregister_gauges
+
+logger = logging.getLogger(__name__)
+
+# Uma gravação no mesmo "tique" do mtime lido não altera o mtime do diretório do spool:
+# enquanto o mtime for mais recente que esta janela, o índice é relido a cada consulta
+_MTIME_RACY_NS = 1_000_000_000
+
+
+class ObjectNotFound(Exception):
+    """
+    A chave não existe no backend.
+    """
+    def __init__(self, key: str):
+        self.key = key
+        super().__init__(f"Objeto não encontrado: {key}")
+
+
+class ObjectAccessDenied(Exception):
+    """
+    Leitura da chave negada pelo backend. O S3 responde 403 (AccessDenied) também para
+    chaves inexistentes quando as credenciais não têm s3:ListBucket.
+    """
+    def __init__(self, key: str):
+        self.key = key
+        super().__init__(f"Acesso negado ao objeto: {key}")
+
+
+class StorageBackend:
+    """
+    Interface dos backends. list_objects devolve dicionários no formato do ListObjectsV2
+    (Key, Size, ETag, LastModified); open_sink devolve um arquivo somente-escrita com
+    complete() (publica o objeto) e abort() (descarta).
+    """
+    def uri(self, key: str) -> str:
+        raise NotImplementedError
+
+    def exists(self, prefix: str) -> bool:
+        """
+        Indica se há algum objeto sob o prefixo.
+        """
+        return bool(self.list_objects(prefix))
+
+    def list_objects(self, prefix: str) -> List[Dict]:
+        raise NotImplementedError
+
+    def get_bytes(self, key: str) -> bytes:
+        """
+        :raises ObjectNotFound: se a chave não existir
+        """
+        raise NotImplementedError
+
+    def put_bytes(self, key: str, data: bytes, content_type: str = 'application/octet-stream') -> None:
+        raise NotImplementedError
+
+    def put_file(self, key: str, path: str, content_type: str = 'application/octet-stream') -> None:
+        """
+        Envia o conteúdo de um arquivo local.
+        """
+        with open(path, 'rb') as f:
+            self.put_bytes(key, f.read(), content_type)
+
+    def delete_keys(self, keys: List[str]) -> List[str]:
+        """
+        Remove objetos (chaves inexistentes não são erro).
+        :return: chaves que não puderam ser removidas
+        """
+        raise NotImplementedError
+
+    def open_sink(self, key: str, part_size: int, content_type: str = 'application/octet-stream') -> Any:
+        raise NotImplementedError
+
+
+class MultipartSink(io.RawIOBase):
+    """
+    Arquivo somente-escrita que envia ao S3 em partes de `part_size` bytes à medida que
+    recebe dados (ex.: de um ParquetWriter): a memória fica limitada a uma parte.
+    O upload multipart só é iniciado quando a primeira parte enche; objetos menores
+    são enviados com um único PUT em complete(). abort() descarta tudo.
+    """
+    def __init__(self, s3: Any, bucket: str, key: str, part_size: int, content_type: str = 'application/octet-stream'):
+        super().__init__()
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        # O S3 exige partes de pelo menos 5 MiB (exceto a última)
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self.content_type = content_type
+        self._buffer = bytearray()
+        self._position = 0
+        self._upload_id: Optional[str] = None
+        self._parts: List[Dict] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def _upload_part(self, body: bytes) -> None:
+        with stage("s3.put") as span:
+            if self._upload_id is None:
+                self._upload_id = self.s3.create_multipart_upload(
+                    Bucket=self.bucket, Key=self.key, ContentType=self.content_type
+                )['UploadId']
+            number = len(self._parts) + 1
+            response = self.s3.upload_part(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=number, Body=body
+            )
+            self._parts.append({'PartNumber': number, 'ETag': response['ETag']})
+            span.add(bytes_out=len(body))
+
+    def complete(self) -> None:
+        """
+        Envia o restante e conclui o objeto.
+        """
+        if self._upload_id is None:
+            with stage("s3.put") as span:
+                self.s3.put_object(
+                    Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer), ContentType=self.content_type
+                )
+                span.add(bytes_out=len(self._buffer))
+        else:
+            if self._buffer:
+                self._upload_part(bytes(self._buffer))
+            self.s3.complete_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                MultipartUpload={'Parts': self._parts},
+            )
+        self._buffer = bytearray()
+        self.close()
+
+    def abort(self) -> None:
+        """
+        Descarta o objeto (aborta o upload multipart, se iniciado).
+        """
+        self._buffer = bytearray()
+        if self._upload_id is not None:
+            try:
+                self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            except Exception as e:
+                logger.warning("Failed to abort multipart upload of %s: %s", self.key, e)
+            self._upload_id = None
+        self.close()
+
+
+class S3Backend(StorageBackend):
+    """
+    Objetos em um bucket S3, com o cliente compartilhado do processo (infrastructure.aws).
+    """
+    def __init__(
+        self,
+        bucket: str,
+        region: str,
+        endpoint_url: Optional[str] = None,
+        upload_workers: int = 8,
+        multipart_threshold: int = 8 * 1024 * 1024,
+    ):
+        """
+        :param bucket: nome do bucket S3
+        :param region: região AWS
+        :param endpoint_url: endpoint S3 alternativo (MinIO, servidor local de benchmark...),
+            acessado com endereçamento por caminho
+        :param upload_workers: uploads simultâneos esperados (dimensiona o pool de conexões)
+        :param multipart_threshold: tamanho (bytes) a partir do qual o upload é multipart
+        """
+        # boto3/botocore são importados só quando o backend é criado (custo de inicialização)
+        from boto3.s3.transfer import TransferConfig
+        from b3_scraper.infrastructure import aws
+
+        self.bucket = bucket
+        self.transfer_config = TransferConfig(multipart_threshold=multipart_threshold, max_concurrency=4)
+        # Cliente S3 compartilhado pelo processo (role assumido uma vez, credenciais renovadas
+        # em segundo plano); o pool comporta os workers de upload e as partes multipart
+        self.s3 = aws.client(
+            's3',
+            region,
+            endpoint_url=endpoint_url,
+            max_pool_connections=max(1, upload_workers) * self.transfer_config.max_concurrency,
+            addressing_style='path' if endpoint_url else None,
+        )
+
+    def uri(self, key: str) -> str:
+        return f"s3://{self.bucket}/{key}"
+
+    def exists(self, prefix: str) -> bool:
+        response = self.s3.list_objects_v2(Bucket=self.bucket, Prefix=prefix, MaxKeys=1)
+        return response.get('KeyCount', 0) > 0
+
+    def list_objects(self, prefix: str) -> List[Dict]:
+        objects: List[Dict] = []
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            objects.extend(page.get('Contents', []))
+        return objects
+
+    def get_bytes(self, key: str) -> bytes:
+        from botocore.exceptions import ClientError
+
+        with stage("s3.get") as span:
+            try:
+                data = self.s3.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+            except ClientError as e:
+                code = e.response.get('Error', {}).get('Code')
+                if code in ('NoSuchKey', '404'):
+                    raise ObjectNotFound(key) from e
+                if code in ('AccessDenied', '403'):
+                    raise ObjectAccessDenied(key) from e
+                raise
+            span.add(bytes_in=len(data))
+        return data
+
+    def put_bytes(self, key: str, data: bytes, content_type: str = 'application/octet-stream') -> None:
+        with stage("s3.put") as span:
+            self.s3.upload_fileobj(
+                io.BytesIO(data),
+                self.bucket,
+                key,
+                ExtraArgs={'ContentType': content_type},
+                Config=self.transfer_config,
+            )
+            span.add(bytes_out=len(data))
+
+    def put_file(self, key: str, path: str, content_type: str = 'application/octet-stream') -> None:
+        with stage("s3.put") as span:
+            self.s3.upload_file(
+                path, self.bucket, key, ExtraArgs={'ContentType': content_type}, Config=self.transfer_config
+            )
+            span.add(bytes_out=os.path.getsize(path))
+
+    def delete_keys(self, keys: List[str]) -> List[str]:
+        failed: List[str] = []
+        for start in range(0, len(keys), 1000):
+            chunk = keys[start:start + 1000]
+            response = self.s3.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': key} for key in chunk], 'Quiet': True},
+            )
+            failed.extend(error['Key'] for error in response.get('Errors', []))
+        return failed
+
+    def open_sink(self, key: str, part_size: int, content_type: str = 'application/octet-stream') -> MultipartSink:
+        return MultipartSink(self.s3, self.bucket, key, part_size, content_type)
+
+
+def _fsync_directory(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class _FileSink(io.RawIOBase):
+    """
+    Arquivo somente-escrita gravado em um temporário; complete() faz fsync e chama
+    `commit(caminho_temporário)`, que deve movê-lo para o destino; abort() o remove.
+    """
+    def __init__(self, directory: str, commit):
+        super().__init__()
+        os.makedirs(directory, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        self._file = os.fdopen(fd, 'wb')
+        self._commit = commit
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def write(self, data) -> int:
+        return self._file.write(data)
+
+    def complete(self) -> None:
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._commit(self.tmp_path)
+        except BaseException:
+            self.abort()
+            raise
+        self.close()
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        self.close()
+
+
+class LocalBackend(StorageBackend):
+    """
+    Objetos como arquivos sob um diretório (chave "a/b/c.parquet" -> <raiz>/a/b/c.parquet).
+    Cada gravação vai para um temporário no mesmo diretório e é publicada com fsync + rename.
+    """
+    def __init__(self, root: str):
+        """
+        :param root: diretório raiz (criado se não existir)
+        """
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, *key.split('/')))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Chave fora da raiz do backend: {key}")
+        return path
+
+    def uri(self, key: str) -> str:
+        return self._path(key)
+
+    def list_objects(self, prefix: str) -> List[Dict]:
+        directory = self.root
+        if '/' in prefix:
+            directory = os.path.join(self.root, *prefix.rsplit('/', 1)[0].split('/'))
+        objects: List[Dict] = []
+        for base, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(base, name)
+                key = os.path.relpath(path, self.root).replace(os.sep, '/')
+                if not key.startswith(prefix):
+                    continue
+                try:
+                    info = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                objects.append({
+                    'Key': key,
+                    'Size': info.st_size,
+                    'ETag': f'"{info.st_mtime_ns:x}-{info.st_size:x}"',
+                    'LastModified': datetime.fromtimestamp(info.st_mtime, timezone.utc),
+                })
+        return sorted(objects, key=lambda obj: obj['Key'])
+
+    def get_bytes(self, key: str) -> bytes:
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError as e:
+            raise ObjectNotFound(key) from e
+        except PermissionError as e:
+            raise ObjectAccessDenied(key) from e
+
+    def _publish(self, key: str, tmp_path: str) -> None:
+        path = self._path(key)
+        os.replace(tmp_path, path)
+        _fsync_directory(os.path.dirname(path))
+
+    def put_bytes(self, key: str, data: bytes, content_type: str = 'application/octet-stream') -> None:
+        sink = self.open_sink(key, 0, content_type)
+        sink.write(data)
+        sink.complete()
+
+    def put_file(self, key: str, path: str, content_type: str = 'application/octet-stream') -> None:
+        sink = self.open_sink(key, 0, content_type)
+        with open(path, 'rb') as f:
+            shutil.copyfileobj(f, sink)
+        sink.complete()
+
+    def delete_keys(self, keys: List[str]) -> List[str]:
+        failed: List[str] = []
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Failed to delete %s: %s", key, e)
+                failed.append(key)
+        return failed
+
+    def open_sink(self, key: str, part_size: int, content_type: str = 'application/octet-stream') -> _FileSink:
+        return _FileSink(os.path.dirname(self._path(key)), lambda tmp_path: self._publish(key, tmp_path))
+
+
+@dataclass
+class _SpoolEntry:
+    """
+    Operação pendente no spool: <id>.json (metadados, gravado por último) e, para "put",
+    <id>.data com o conteúdo. O id começa pelo instante da gravação (ordem de commit).
+    """
+    id: str
+    op: str
+    key: str
+    content_type: str
+    size: int
+    created_at: float
+
+    @property
+    def directory(self) -> str:
+        return self.key.rsplit('/', 1)[0] if '/' in self.key else ''
+
+
+class SpoolBackend(StorageBackend):
+    """
+    Write-behind sobre outro backend (normalmente S3Backend). Gravações e remoções viram
+    entradas no diretório do spool (fsync + rename) e retornam imediatamente; leituras e
+    listagens enxergam as entradas pendentes sobre o conteúdo do destino.
+    O uploader em segundo plano envia lotes de até `batch_size` entradas com `workers`
+    threads. Entradas de um mesmo diretório são aplicadas na ordem de commit (o manifesto
+    de uma partição nunca chega antes do Parquet) e só a mais recente de cada chave é
+    enviada. Falhas são repetidas indefinidamente com backoff exponencial; nada é
+    descartado. Vários processos podem gravar no mesmo spool; um lock de arquivo elege
+    o único que faz upload.
+    """
+    def __init__(
+        self,
+        directory: str,
+        target: StorageBackend,
+        workers: int = 4,
+        batch_size: int = 32,
+        retry_backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        poll_interval: float = 1.0,
+        start: bool = True,
+    ):
+        """
+        :param directory: diretório do spool (criado se não existir)
+        :param target: backend de destino
+        :param workers: uploads simultâneos
+        :param batch_size: entradas por lote do uploader
+        :param retry_backoff: espera (s) após a primeira falha de uma entrada, dobrada a cada nova falha
+        :param max_backoff: espera máxima (s) entre tentativas
+        :param poll_interval: intervalo (s) em que o uploader procura entradas de outros processos
+        :param start: inicia o uploader em segundo plano
+        """
+        self.directory = os.path.abspath(directory)
+        self.target = target
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.uploaded = 0
+        self.failures = 0
+        self._counter = 0
+        self._lock = threading.Lock()
+        # id -> (falhas consecutivas, instante da próxima tentativa)
+        self._retries: Dict[str, tuple] = {}
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._lock_file = None
+        self._thread: Optional[threading.Thread] = None
+        # Índice das entradas pendentes (id -> entrada, na ordem de commit; chave -> entrada
+        # mais recente), relido só quando o mtime do diretório muda
+        self._index_lock = threading.Lock()
+        self._entries: Dict[str, _SpoolEntry] = {}
+        self._by_key: Dict[str, _SpoolEntry] = {}
+        self._index_mtime: Optional[int] = None
+        os.makedirs(self.directory, exist_ok=True)
+        self._gauges_registered = False
+        self._register_gauges()
+        if start:
+            self.start()
+
+    # Entradas
+
+    def _new_id(self) -> str:
+        with self._lock:
+            self._counter += 1
+            counter = self._counter
+        return f"{time.time_ns():020d}-{os.getpid()}-{counter:06d}"
+
+    def _path(self, entry_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{entry_id}{suffix}")
+
+    def _write_file(self, path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _commit(self, op: str, key: str, content_type: str = '', data_tmp_path: Optional[str] = None) -> None:
+        """
+        Registra a entrada: o conteúdo (já em disco, com fsync) é renomeado e só então o
+        JSON de metadados é gravado; uma entrada sem JSON nunca é enviada.
+        """
+        entry_id = self._new_id()
+        size = 0
+        if data_tmp_path is not None:
+            size = os.path.getsize(data_tmp_path)
+            os.replace(data_tmp_path, self._path(entry_id, ".data"))
+        meta = {'op': op, 'key': key, 'content_type': content_type, 'size': size, 'created_at': time.time()}
+        self._write_file(self._path(entry_id, ".json"), json.dumps(meta).encode('utf-8'))
+        _fsync_directory(self.directory)
+        logger.debug("Spooled %s %s as %s", op, key, entry_id)
+        self._wake.set()
+
+    def _read_entry(self, entry_id: str) -> Optional[_SpoolEntry]:
+        try:
+            with open(self._path(entry_id, ".json"), encoding='utf-8') as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            # Enviada (e removida) por outro processo durante a listagem
+            return None
+        return _SpoolEntry(
+            id=entry_id,
+            op=meta['op'],
+            key=meta['key'],
+            content_type=meta.get('content_type', ''),
+            size=meta.get('size', 0),
+            created_at=meta.get('created_at', 0.0),
+        )
+
+    def _index(self) -> Tuple[Dict[str, _SpoolEntry], Dict[str, _SpoolEntry]]:
+        """
+        Índice das entradas pendentes: (id -> entrada, na ordem de commit; chave -> entrada
+        mais recente). Se o diretório mudou desde a última consulta (mtime), lista os nomes
+        e lê só os metadados das entradas novas: os de uma entrada não mudam após o commit.
+        """
+        with self._index_lock:
+            mtime = os.stat(self.directory).st_mtime_ns
+            if mtime != self._index_mtime:
+                ids = {name[:-len(".json")] for name in os.listdir(self.directory) if name.endswith(".json")}
+                entries = {entry_id: self._entries[entry_id] for entry_id in ids if entry_id in self._entries}
+                for entry_id in ids.difference(entries):
+                    entry = self._read_entry(entry_id)
+                    if entry is not None:
+                        entries[entry_id] = entry
+                # Dicionários novos a cada releitura: quem recebeu os anteriores não os vê mudar
+                self._entries = dict(sorted(entries.items()))
+                self._by_key = self._latest(self._entries.values())
+                self._index_mtime = mtime if time.time_ns() - mtime > _MTIME_RACY_NS else None
+            return self._entries, self._by_key
+
+    def pending(self) -> List[_SpoolEntry]:
+        """
+        Entradas pendentes, na ordem de commit.
+        """
+        return list(self._index()[0].values())
+
+    def _latest(self, entries: Iterable[_SpoolEntry]) -> Dict[str, _SpoolEntry]:
+        return {entry.key: entry for entry in entries}
+
+    def _remove(self, entry: _SpoolEntry) -> None:
+        for suffix in (".json", ".data"):
+            try:
+                os.remove(self._path(entry.id, suffix))
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._retries.pop(entry.id, None)
+
+    # Interface StorageBackend (com as entradas pendentes sobrepostas ao destino)
+
+    def uri(self, key: str) -> str:
+        return self.target.uri(key)
+
+    def exists(self, prefix: str) -> bool:
+        latest = {key: entry for key, entry in self._index()[1].items() if key.startswith(prefix)}
+        if any(entry.op == 'put' for entry in latest.values()):
+            return True
+        if not latest:
+            return self.target.exists(prefix)
+        return bool(self.list_objects(prefix))
+
+    def list_objects(self, prefix: str) -> List[Dict]:
+        latest = {key: entry for key, entry in self._index()[1].items() if key.startswith(prefix)}
+        objects = {obj['Key']: obj for obj in self.target.list_objects(prefix)}
+        for key, entry in latest.items():
+            if entry.op == 'delete':
+                objects.pop(key, None)
+            else:
+                objects[key] = {
+                    'Key': key,
+                    'Size': entry.size,
+                    'ETag': f'"spool-{entry.id}"',
+                    'LastModified': datetime.fromtimestamp(entry.created_at, timezone.utc),
+                }
+        return [objects[key] for key in sorted(objects)]
+
+    def get_bytes(self, key: str) -> bytes:
+        entry = self._index()[1].get(key)
+        if entry is None:
+            return self.target.get_bytes(key)
+        if entry.op == 'delete':
+            raise ObjectNotFound(key)
+        try:
+            with open(self._path(entry.id, ".data"), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            # Enviada entre a listagem e a leitura
+            return self.target.get_bytes(key)
+
+    def put_bytes(self, key: str, data: bytes, content_type: str = 'application/octet-stream') -> None:
+        sink = self.open_sink(key, 0, content_type)
+        sink.write(data)
+        sink.complete()
+
+    def delete_keys(self, keys: List[str]) -> List[str]:
+        for key in keys:
+            self._commit('delete', key)
+        return []
+
+    def open_sink(self, key: str, part_size: int, content_type: str = 'application/octet-stream') -> _FileSink:
+        return _FileSink(
+            self.directory,
+            lambda tmp_path: self._commit('put', key, content_type, tmp_path),
+        )
+
+    # Uploader
+
+    def start(self) -> None:
+        self._register_gauges()
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._upload_loop, name="spool-uploader", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        """
+        Interrompe o uploader (as entradas pendentes continuam no spool) e retira as
+        medidas deste spool do relatório.
+        """
+        if self._gauges_registered:
+            unregister_gauges(self.gauges)
+            self._gauges_registered = False
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def drain(self, timeout: Optional[float] = None) -> int:
+        """
+        Aguarda o spool esvaziar (enviado por este ou por outro processo).
+        :param timeout: espera máxima em segundos (None: indefinida)
+        :return: entradas ainda pendentes
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = len(self.pending())
+            if not remaining or (deadline is not None and time.monotonic() >= deadline):
+                return remaining
+            self._wake.set()
+            time.sleep(0.05 if deadline is None else min(0.05, max(0.0, deadline - time.monotonic())))
+
+    def _is_leader(self) -> bool:
+        if self._lock_file is not None:
+            return True
+        lock_file = open(os.path.join(self.directory, ".uploader.lock"), 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        self._cleanup()
+        logger.info("Spool uploader started for %s (%d pending entries)", self.directory, len(self.pending()))
+        return True
+
+    def _cleanup(self) -> None:
+        """
+        Remove restos de gravações interrompidas (temporários e conteúdos sem metadados)
+        com mais de uma hora, para não apagar gravações em andamento de outros processos.
+        """
+        committed = {entry.id for entry in self.pending()}
+        threshold = time.time() - 3600
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            orphan = name.endswith(".tmp") or (name.endswith(".data") and name[:-len(".data")] not in committed)
+            try:
+                if orphan and os.path.getmtime(path) < threshold:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _upload_loop(self) -> None:
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="spool-upload") as executor:
+            while not self._stopped.is_set():
+                wait = self.poll_interval
+                try:
+                    if self._is_leader():
+                        wait = self._upload_batch(executor)
+                except Exception as e:
+                    logger.error("Spool uploader error: %s", e)
+                self._wake.wait(wait)
+                self._wake.clear()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _upload_batch(self, executor: ThreadPoolExecutor) -> float:
+        """
+        Envia um lote de entradas prontas.
+        :return: segundos até a próxima verificação
+        """
+        entries = self.pending()
+        latest = self._latest(entries)
+        # Versões superadas por uma entrada mais recente da mesma chave não precisam ser enviadas
+        for entry in entries:
+            if latest[entry.key].id != entry.id:
+                self._remove(entry)
+        entries = [entry for entry in entries if latest[entry.key].id == entry.id]
+        if not entries:
+            return self.poll_interval
+
+        now = time.monotonic()
+        batch: List[_SpoolEntry] = []
+        blocked = set()
+        next_attempt = now + self.poll_interval
+        for entry in entries:
+            # Só a entrada mais antiga de cada diretório é elegível (ordem de commit)
+            if entry.directory in blocked:
+                continue
+            blocked.add(entry.directory)
+            with self._lock:
+                _, due = self._retries.get(entry.id, (0, now))
+            if due > now:
+                next_attempt = min(next_attempt, due)
+                continue
+            batch.append(entry)
+            if len(batch) >= self.batch_size:
+                break
+        if not batch:
+            return max(0.0, next_attempt - now)
+
+        with stage("spool.upload") as span:
+            outcomes = list(executor.map(self._apply, batch))
+            span.add(bytes_out=sum(entry.size for entry, ok in zip(batch, outcomes) if ok),
+                     retries=outcomes.count(False))
+        # Há mais trabalho: volta imediatamente se algo foi enviado
+        return 0.0 if any(outcomes) else max(0.0, min(next_attempt, self._next_due()) - time.monotonic())
+
+    def _next_due(self) -> float:
+        with self._lock:
+            dues = [due for _, due in self._retries.values()]
+        return min(dues) if dues else time.monotonic() + self.poll_interval
+
+    def _apply(self, entry: _SpoolEntry) -> bool:
+        """
+        Aplica uma entrada no destino e a remove do spool.
+        :return: False se falhou (reagendada com backoff)
+        """
+        try:
+            if entry.op == 'delete':
+                failed = self.target.delete_keys([entry.key])
+                if failed:
+                    raise OSError(f"falha ao remover {entry.key}")
+            else:
+                self.target.put_file(entry.key, self._path(entry.id, ".data"), entry.content_type)
+        except Exception as e:
+            with self._lock:
+                attempts = self._retries.get(entry.id, (0, 0.0))[0] + 1
+                delay = min(self.max_backoff, self.retry_backoff * (2 ** (attempts - 1)))
+                self._retries[entry.id] = (attempts, time.monotonic() + delay)
+                self.failures += 1
+            logger.warning("Spool upload of %s failed (attempt %d, retrying in %.0fs): %s",
+                           self.target.uri(entry.key), attempts, delay, e)
+            return False
+        with self._lock:
+            self.uploaded += 1
+        self._remove(entry)
+        logger.debug("Spool %s %s", entry.op, self.target.uri(entry.key))
+        return True
+
+    # Métricas
+
+    def _register_gauges(self) -> None:
+        # Séries rotuladas pelo diretório: dois spools no mesmo processo não se sobrescrevem
+        if not self._gauges_registered:
+            register_gauges(self.gauges, labels={'spool': self.directory})
+            self._gauges_registered = True
+
+    def gauges(self) -> Dict[str, float]:
+        """
+        Profundidade e idade do spool e contadores do uploader deste processo.
+        """
+        entries = self.pending()
+        oldest = min((entry.created_at for entry in entries), default=None)
+        return {
+            'spool_pending_entries': len(entries),
+            'spool_pending_bytes': sum(entry.size for entry in entries),
+            'spool_oldest_entry_age_seconds': round(time.time() - oldest, 3) if oldest is not None else 0,
+            'spool_uploaded_total': self.uploaded,
+            'spool_upload_failures_total': self.failures,
+        }
@@ -0,0 +1,227 @@
+"""
+b3_scraper.infrastructure.columnar
+Representação colunar (Apache Arrow) dos registros da carteira.
+Os números no formato brasileiro são normalizados em lote com pyarrow.compute e
+convertidos diretamente em decimais de precisão fixa.
+"""
+import hashlib
+import logging
+from datetime import date
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from b3_scraper.domain.models import PART_SCALE, QTY_SCALE, TradeRecord
+
+logger = logging.getLogger(__name__)
+
+# Casas decimais preservadas de "theoricalQty" e "part" (ver domain.models); valores com mais casas
+# são arredondados (half-even, o padrão de Decimal)
+QTY_TYPE = pa.decimal128(22, QTY_SCALE)
+PART_TYPE = pa.decimal128(12, PART_SCALE)
+TEXT_TYPE = pa.dictionary(pa.int32(), pa.string())
+
+# Esquema dos Parquets gravados em raw/ (record_date no formato YYYY-MM-DD)
+SCHEMA = pa.schema([
+    ("code", TEXT_TYPE),
+    ("stock", TEXT_TYPE),
+    ("type", TEXT_TYPE),
+    ("theoretical_quantity", QTY_TYPE),
+    ("participation_percentage", PART_TYPE),
+    ("record_date", TEXT_TYPE),
+])
+
+
+def _text_column(values: Sequence[Optional[str]]) -> pa.Array:
+    array = pa.array(values, type=pa.string())
+    return pc.utf8_trim_whitespace(array).dictionary_encode()
+
+
+def _normalize_numbers(values: Sequence[Optional[str]]) -> pa.Array:
+    """
+    Converte, em lote, "1.234,56" / "12,345%" em "1234.56" / "12.345".
+    """
+    array = pa.array(values, type=pa.string())
+    array = pc.utf8_trim_whitespace(pc.replace_substring(array, "%", ""))
+    array = pc.replace_substring(array, ".", "")
+    return pc.replace_substring(array, ",", ".")
+
+
+def _round_excess(array: pa.Array, scale: int) -> Tuple[pa.Array, pa.Array]:
+    """
+    Valida números normalizados (ver _normalize_numbers), arredondando os que têm mais
+    casas que `scale`; só valores que não são números são marcados como inválidos.
+    :return: (números com no máximo `scale` casas, máscara de válidos)
+    """
+    within_scale = pc.fill_null(pc.match_substring_regex(array, rf"^[+-]?\d+(\.\d{{0,{scale}}})?$"), False)
+    if pc.all(within_scale).as_py():
+        return array, within_scale
+    valid = pc.fill_null(pc.match_substring_regex(array, r"^[+-]?\d+(\.\d*)?$"), False)
+    values = array.to_pylist()
+    for position in pc.indices_nonzero(pc.and_(valid, pc.invert(within_scale))).to_pylist():
+        values[position] = str(_round_decimal(Decimal(values[position]), scale))
+    return pa.array(values, type=pa.string()), valid
+
+
+def _round_decimal(value: Optional[Decimal], scale: int) -> Optional[Decimal]:
+    if value is None or value.as_tuple().exponent >= -scale:
+        return value
+    return value.quantize(Decimal(1).scaleb(-scale), rounding=ROUND_HALF_EVEN)
+
+
+def _date_column(record_date: Optional[date], length: int) -> pa.Array:
+    if record_date is None:
+        return pa.nulls(length, type=TEXT_TYPE)
+    # Data única do pregão: dicionário de um valor com índices zerados
+    return pa.DictionaryArray.from_arrays(
+        pa.array(np.zeros(length, dtype=np.int32)),
+        pa.array([record_date.isoformat()], type=pa.string()),
+    )
+
+
+def table_from_json_results(results: List[dict], record_date: Optional[date]) -> pa.Table:
+    """
+    Monta a tabela a partir de "results" do GetPortfolioDay.
+    Linhas com números inválidos são descartadas (com aviso), como em Parser.parse_json.
+    :param results: itens do JSON com cod/asset/type/theoricalQty/part
+    :param record_date: data do pregão (header.date)
+    """
+    qty, qty_valid = _round_excess(_normalize_numbers([item.get("theoricalQty") for item in results]), QTY_SCALE)
+    part, part_valid = _round_excess(_normalize_numbers([item.get("part") for item in results]), PART_SCALE)
+    valid = pc.and_(qty_valid, part_valid)
+
+    table = pa.table({
+        "code": _text_column([item.get("cod", "") for item in results]),
+        "stock": _text_column([item.get("asset", "") for item in results]),
+        "type": _text_column([item.get("type", "") for item in results]),
+        "theoretical_quantity": qty,
+        "participation_percentage": part,
+        "record_date": _date_column(record_date, len(results)),
+    })
+    invalid = len(results) - pc.sum(valid).as_py() if results else 0
+    if invalid:
+        for position in pc.indices_nonzero(pc.invert(valid)).to_pylist():
+            logger.warning("Erro ao converter números no JSON: %s", results[position])
+        table = table.filter(valid)
+
+    return table.set_column(
+        3, "theoretical_quantity", table["theoretical_quantity"].cast(QTY_TYPE)
+    ).set_column(
+        4, "participation_percentage", table["participation_percentage"].cast(PART_TYPE)
+    )
+
+
+def table_from_records(records: List[TradeRecord]) -> pa.Table:
+    """
+    Converte uma lista de TradeRecord na tabela colunar (decimais com mais casas que a
+    escala são arredondados, como em table_from_json_results).
+    """
+    return pa.table({
+        "code": pa.array([r.code for r in records], type=pa.string()).dictionary_encode(),
+        "stock": pa.array([r.stock for r in records], type=pa.string()).dictionary_encode(),
+        "type": pa.array([r.type for r in records], type=pa.string()).dictionary_encode(),
+        "theoretical_quantity": pa.array(
+            [_round_decimal(r.theoretical_quantity, QTY_SCALE) for r in records], type=QTY_TYPE
+        ),
+        "participation_percentage": pa.array(
+            [_round_decimal(r.participation_percentage, PART_SCALE) for r in records], type=PART_TYPE
+        ),
+        "record_date": pa.array(
+            [r.record_date.isoformat() if r.record_date else None for r in records], type=pa.string()
+        ).dictionary_encode(),
+    }, schema=SCHEMA)
+
+
+def records_from_table(table: pa.Table) -> List[TradeRecord]:
+    """
+    Visão em objetos da tabela colunar, para quem precisa de List[TradeRecord].
+    """
+    columns = table.to_pydict()
+    return [
+        TradeRecord(
+            code=code,
+            stock=stock,
+            type=type_,
+            theoretical_quantity=qty,
+            participation_percentage=part,
+            record_date=date.fromisoformat(record_date) if record_date else None,
+        )
+        for code, stock, type_, qty, part, record_date in zip(
+            columns["code"], columns["stock"], columns["type"],
+            columns["theoretical_quantity"], columns["participation_percentage"], columns["record_date"],
+        )
+    ]
+
+
+
+def conform(table: pa.Table, columns: Optional[Sequence[str]] = None) -> pa.Table:
+    """
+    Ajusta ao esquema SCHEMA uma tabela lida de Parquets gravados por versões
+    anteriores (strings sem dictionary encoding, decimais com precisão inferida).
+    :param columns: subconjunto (projeção) de SCHEMA presente na tabela; default: todas
+    """
+    schema = pa.schema([SCHEMA.field(name) for name in columns]) if columns is not None else SCHEMA
+    arrays = []
+    for field in schema:
+        column = table[field.name]
+        if pa.types.is_dictionary(field.type):
+            column = column.cast(pa.string()).dictionary_encode()
+        else:
+            column = column.cast(field.type)
+        arrays.append(column)
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def deduplicate(table: pa.Table) -> pa.Table:
+    """
+    Remove linhas repetidas de (code, record_date), mantendo a última ocorrência,
+    e ordena o resultado por record_date/code.
+    """
+    if table.num_rows == 0:
+        return table
+    keys = pa.table({
+        "code": table["code"].cast(pa.string()),
+        "record_date": table["record_date"].cast(pa.string()),
+        "position": pa.array(np.arange(table.num_rows, dtype=np.int64)),
+    }).combine_chunks()  # group_by exige colunas com o mesmo particionamento em chunks
+    last = keys.group_by(["code", "record_date"]).aggregate([("position", "max")])
+    order = pc.sort_indices(last, sort_keys=[("record_date", "ascending"), ("code", "ascending")])
+    return table.take(pc.take(last["position_max"], order))
+
+
+class Fingerprint:
+    """
+    Impressão digital incremental (ver fingerprint): como a soma independe da ordem,
+    os lotes de uma partição podem ser acumulados à medida que são gravados.
+    """
+    def __init__(self):
+        self.rows = 0
+        self._total = 0
+
+    def update(self, table: pa.Table) -> None:
+        if table.num_rows == 0:
+            return
+        columns = [table[name].cast(pa.string()) for name in SCHEMA.names]
+        rows = pc.binary_join_element_wise(*columns, "\x1f")
+        for row in rows.to_pylist():
+            self._total += int.from_bytes(hashlib.sha256((row or "").encode("utf-8")).digest()[:16], "big")
+        self.rows += table.num_rows
+
+    def hexdigest(self) -> str:
+        if self.rows == 0:
+            return "0:0"
+        return f"{self.rows}:{self._total % (1 << 128):032x}"
+
+
+def fingerprint(table: pa.Table) -> str:
+    """
+    Impressão digital estável do conjunto de registros: independe da ordem das linhas
+    e da codificação física (dictionary, chunks), mas muda com qualquer valor.
+    Soma (mod 2**128) dos SHA-256 de cada linha normalizada, mais a contagem de linhas.
+    """
+    digest = Fingerprint()
+    digest.update(table)
+    return digest.hexdigest()
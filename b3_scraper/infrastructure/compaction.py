@@ -0,0 +1,109 @@
+"""
+b3_scraper.infrastructure.compaction
+Compactação das partições raw: junta os vários trade_records_<timestamp>.parquet de
+um dia (polls intradiários, reexecuções) em um único arquivo deduplicado.
+"""
+import io
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from b3_scraper.infrastructure.columnar import conform, deduplicate
+from b3_scraper.infrastructure.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+_KEY_TIMESTAMP = re.compile(r"trade_records_(\d{8}T\d{6}Z)")
+
+
+@dataclass
+class CompactionResult:
+    """
+    Resultado da compactação de uma partição:
+    - status: "compacted", "skipped" (nenhum ou um único arquivo) ou "failed"
+    """
+    partition: str
+    status: str
+    files_in: int = 0
+    rows_in: int = 0
+    rows_out: int = 0
+    key: Optional[str] = None
+    error: Optional[str] = None
+
+
+class Compactor:
+    """
+    Compacta partições ano=/mes=/dia= gravadas pelo Storage, em paralelo.
+    A troca é segura: o arquivo compactado é gravado antes de os originais serem removidos,
+    e arquivos que chegarem durante a compactação não são apagados.
+    """
+    def __init__(self, storage: Storage, row_group_size: int = 128 * 1024, workers: int = 4):
+        """
+        :param storage: Storage com o bucket/prefixo das partições
+        :param row_group_size: linhas por row group do arquivo compactado
+        :param workers: partições compactadas simultaneamente
+        """
+        self.storage = storage
+        self.row_group_size = row_group_size
+        self.workers = max(1, workers)
+
+    def compact_range(self, start: date, end: date, prefix: Optional[str] = None) -> List[CompactionResult]:
+        """
+        Compacta as partições de todos os dias entre start e end (inclusive).
+        """
+        partitions = []
+        current = start
+        while current <= end:
+            partitions.append(self.storage.partition_prefix(current.isoformat(), prefix))
+            current += timedelta(days=1)
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(partitions) or 1)) as executor:
+            return list(executor.map(self.compact_partition, partitions))
+
+    def compact_partition(self, partition: str) -> CompactionResult:
+        """
+        Compacta uma partição (ex.: "raw/ibov/ano=2025/mes=07/dia=21/").
+        """
+        result = CompactionResult(partition=partition, status="skipped")
+        try:
+            keys = sorted(
+                obj['Key'] for obj in self.storage.list_objects(partition)
+                if obj['Key'].endswith('.parquet')
+            )
+            result.files_in = len(keys)
+            if len(keys) <= 1:
+                return result
+
+            # Ordem das chaves = ordem cronológica (timestamp no nome); a última gravação prevalece
+            tables = [conform(pq.read_table(io.BytesIO(self.storage.get_bytes(key)))) for key in keys]
+            combined = pa.concat_tables(tables)
+            compacted = deduplicate(combined)
+            result.rows_in = combined.num_rows
+            result.rows_out = compacted.num_rows
+
+            buf = io.BytesIO()
+            pq.write_table(compacted, buf, row_group_size=self.row_group_size)
+            # O arquivo compactado leva o timestamp da gravação mais recente que ele contém:
+            # fica logo após as entradas na ordem das chaves, e um poll gravado durante a
+            # compactação (timestamp maior, não removido) continua prevalecendo sobre ele
+            match = _KEY_TIMESTAMP.search(keys[-1].rsplit("/", 1)[-1])
+            timestamp = match.group(1) if match else datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+            result.key = f"{partition}trade_records_{timestamp}_compacted.parquet"
+            self.storage.put_bytes(result.key, buf.getvalue())
+
+            failed = self.storage.delete_keys([key for key in keys if key != result.key])
+            if failed:
+                logger.warning("Could not delete %d compacted files in %s: %s", len(failed), partition, failed)
+            result.status = "compacted"
+            logger.info("Compacted %d files (%d rows) into %s (%d rows)",
+                        result.files_in, result.rows_in, result.key, result.rows_out)
+        except Exception as e:
+            logger.error("Failed to compact partition %s: %s", partition, e)
+            result.status = "failed"
+            result.error = str(e)
+        return result
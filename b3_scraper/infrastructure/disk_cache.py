@@ -0,0 +1,136 @@
+"""
+b3_scraper.infrastructure.disk_cache
+Cache em disco limitado por tamanho, com despejo LRU (menos recentemente usado).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """
+    Armazena entradas (conteúdo + metadados JSON) em um diretório local.
+    Cada chave vira um par de arquivos "<sha256>.bin"/"<sha256>.json"; o mtime do
+    .bin registra o último acesso e orienta o despejo quando max_bytes é excedido.
+    """
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        :param directory: diretório do cache (criado se não existir)
+        :param max_bytes: tamanho máximo somado dos conteúdos armazenados
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, digest)
+        return f"{base}.bin", f"{base}.json"
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def path(self, key: str) -> Optional[str]:
+        """
+        Caminho local do conteúdo da chave (marcando o acesso), ou None se ausente.
+        """
+        body_path, _ = self._paths(key)
+        try:
+            os.utime(body_path)
+        except FileNotFoundError:
+            return None
+        return body_path
+
+    def meta(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Metadados da chave, ou None se ausente/corrompido.
+        """
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return meta if os.path.exists(body_path) else None
+
+    def get(self, key: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """
+        :return: (conteúdo, metadados) ou None se a chave não estiver no cache
+        """
+        meta = self.meta(key)
+        body_path = self.path(key) if meta is not None else None
+        if body_path is None:
+            return None
+        try:
+            with open(body_path, "rb") as f:
+                return f.read(), meta
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, body: bytes, meta: Dict[str, Any]) -> None:
+        """
+        Grava (ou substitui) a entrada e despeja as menos usadas se necessário.
+        """
+        body_path, _ = self._paths(key)
+        self._write_atomic(body_path, body)
+        self.update_meta(key, meta)
+        self._evict()
+
+    def update_meta(self, key: str, meta: Dict[str, Any]) -> None:
+        """
+        Substitui apenas os metadados de uma entrada existente.
+        """
+        _, meta_path = self._paths(key)
+        self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def delete(self, key: str) -> None:
+        """
+        Remove a entrada (conteúdo e metadados), se existir.
+        """
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.directory):
+                if not name.endswith(".bin"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, name))
+                total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            for _, size, name in sorted(entries):
+                base = os.path.join(self.directory, name[:-len(".bin")])
+                for path in (f"{base}.bin", f"{base}.json"):
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+                logger.debug("Evicted cache entry %s (%d bytes)", name, size)
+                if total <= self.max_bytes:
+                    break
@@ -0,0 +1,180 @@
+"""
+b3_scraper.infrastructure.html_table
+Extratores da tabela "Carteira do Dia" a partir do HTML, um por backend de parsing.
+Todos devolvem os textos com a mesma semântica de BeautifulSoup.get_text(strip=True).
+"""
+from html.parser import HTMLParser
+from typing import Iterable, List, NamedTuple, Optional
+
+
+class TableData(NamedTuple):
+    """
+    Conteúdo bruto da página:
+    - header_text: texto do primeiro <h2> (None se ausente)
+    - headers: textos dos <th> do <thead> (None se a tabela não tiver <thead>)
+    - rows: textos dos <td> de cada <tr> do <tbody> (None se não houver <table>)
+    """
+    header_text: Optional[str]
+    headers: Optional[List[str]]
+    rows: Optional[List[List[str]]]
+
+
+def _join_stripped(strings: Iterable[str]) -> str:
+    return "".join(text.strip() for text in strings if text.strip())
+
+
+def extract_bs4(html: str) -> TableData:
+    """
+    Extração via BeautifulSoup + html.parser (árvore completa em memória).
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    header_tag = soup.find("h2")
+    header_text = header_tag.get_text(strip=True) if header_tag else None
+
+    table = soup.find("table")
+    if not table:
+        return TableData(header_text, None, None)
+    thead = table.find("thead")
+    if not thead:
+        return TableData(header_text, None, [])
+    headers = [th.get_text(strip=True) for th in thead.find_all("th")]
+    rows = [
+        [td.get_text(strip=True) for td in row.find_all("td")]
+        for row in table.find("tbody").find_all("tr")
+    ]
+    return TableData(header_text, headers, rows)
+
+
+def extract_lxml(html: str) -> TableData:
+    """
+    Extração via lxml (parser em C); percorre apenas a tabela alvo.
+    """
+    import lxml.html
+
+    root = lxml.html.fromstring(html)
+    header_tag = root.find(".//h2")
+    header_text = _join_stripped(header_tag.itertext()) if header_tag is not None else None
+
+    table = root.find(".//table")
+    if table is None:
+        return TableData(header_text, None, None)
+    thead = table.find(".//thead")
+    if thead is None:
+        return TableData(header_text, None, [])
+    headers = [_join_stripped(th.itertext()) for th in thead.iterfind(".//th")]
+    tbody = table.find(".//tbody")
+    rows = [
+        [_join_stripped(td.itertext()) for td in row.iterfind(".//td")]
+        for row in tbody.iterfind(".//tr")
+    ]
+    return TableData(header_text, headers, rows)
+
+
+class _TableEventParser(HTMLParser):
+    """
+    Parser orientado a eventos: acompanha o primeiro <h2> e a primeira <table>
+    e coleta os textos das células em uma única passada, sem montar árvore.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.header_text: Optional[str] = None
+        self.headers: Optional[List[str]] = None
+        self.rows: Optional[List[List[str]]] = None
+        self._pending: List[str] = []
+        self._h2_depth = 0
+        self._h2_parts: Optional[List[str]] = None
+        self._table_depth = 0
+        self._table_done = False
+        self._section: Optional[str] = None  # "thead" ou "tbody" em andamento
+        self._seen_thead = False
+        self._seen_tbody = False
+        self._cell_parts: Optional[List[str]] = None
+        self._row: Optional[List[str]] = None
+
+    def _flush(self) -> None:
+        # BeautifulSoup separa os textos a cada tag; reproduz o strip por trecho
+        if not self._pending:
+            return
+        text = "".join(self._pending).strip()
+        self._pending = []
+        if not text:
+            return
+        if self._h2_parts is not None:
+            self._h2_parts.append(text)
+        if self._cell_parts is not None:
+            self._cell_parts.append(text)
+
+    def handle_data(self, data: str) -> None:
+        if self._h2_parts is not None or self._cell_parts is not None:
+            self._pending.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag == "h2":
+            if self.header_text is None and self._h2_parts is None:
+                self._h2_parts = []
+            if self._h2_parts is not None:
+                self._h2_depth += 1
+        if self._table_done:
+            return
+        if tag == "table":
+            if self._table_depth == 0:
+                self.rows = []
+            self._table_depth += 1
+            return
+        if self._table_depth == 0:
+            return
+        if tag == "thead" and not self._seen_thead and self._section is None:
+            self._seen_thead = True
+            self._section = "thead"
+            self.headers = []
+        elif tag == "tbody" and not self._seen_tbody and self._section is None:
+            self._seen_tbody = True
+            self._section = "tbody"
+        elif tag == "th" and self._section == "thead" and self._cell_parts is None:
+            self._cell_parts = []
+        elif tag == "tr" and self._section == "tbody":
+            self._row = []
+            self.rows.append(self._row)
+        elif tag == "td" and self._section == "tbody" and self._row is not None and self._cell_parts is None:
+            self._cell_parts = []
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag == "h2" and self._h2_parts is not None:
+            self._h2_depth -= 1
+            if self._h2_depth == 0:
+                self.header_text = "".join(self._h2_parts)
+                self._h2_parts = None
+        if self._table_done or self._table_depth == 0:
+            return
+        if tag == "table":
+            self._table_depth -= 1
+            if self._table_depth == 0:
+                self._table_done = True
+        elif tag == "th" and self._section == "thead" and self._cell_parts is not None:
+            self.headers.append("".join(self._cell_parts))
+            self._cell_parts = None
+        elif tag == "td" and self._row is not None and self._cell_parts is not None:
+            self._row.append("".join(self._cell_parts))
+            self._cell_parts = None
+        elif tag == "tr":
+            self._row = None
+        elif tag in ("thead", "tbody") and self._section == tag:
+            self._section = None
+
+
+def extract_stream(html: str) -> TableData:
+    """
+    Extração em passada única com o parser de eventos da biblioteca padrão.
+    """
+    parser = _TableEventParser()
+    parser.feed(html)
+    parser.close()
+    if parser.rows is None:
+        return TableData(parser.header_text, None, None)
+    if parser.headers is None:
+        return TableData(parser.header_text, None, [])
+    return TableData(parser.header_text, parser.headers, parser.rows)
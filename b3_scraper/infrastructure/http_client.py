@@ -4,15 +4,63 @@
 b3_scraper.infrastructure.http_client
 Cliente HTTP com retry/backoff para requisições ao site da B3.
 """
+import hashlib
+import json
 import logging
+import time
+from dataclasses import dataclass
 from typing import Optional, Dict, Any
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from b3_scraper.infrastructure.disk_cache import DiskCache
+from b3_scraper.instrumentation import stage
+
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class CachedResponse:
+    """
+    Resposta de um GET com informação de origem:
+    - "fresh": servida do cache dentro do TTL, sem requisição
+    - "not_modified": servidor respondeu 304 à requisição condicional
+    - "unchanged": servidor devolveu 200 com conteúdo idêntico ao do cache
+    - "new": conteúdo novo (ou cache desabilitado)
+    """
+    text: str
+    status: str
+    content_hash: str
+
+    @property
+    def from_cache(self) -> bool:
+        return self.status in ("fresh", "not_modified")
+
+    @property
+    def changed(self) -> bool:
+        return self.status == "new"
+
+
+class ResponseCache:
+    """
+    Cache em disco de respostas GET, chaveado por URL + parâmetros, com TTL e
+    limite de tamanho (LRU). Guarda ETag/Last-Modified para revalidação condicional.
+    """
+    def __init__(self, directory: str, ttl: float, max_bytes: int):
+        """
+        :param directory: diretório local do cache
+        :param ttl: segundos em que uma resposta é servida sem consultar o servidor
+        :param max_bytes: tamanho máximo do cache em disco
+        """
+        self.ttl = ttl
+        self.store = DiskCache(directory, max_bytes)
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict[str, Any]]) -> str:
+        return f"{url}?{json.dumps(params or {}, sort_keys=True, default=str)}"
+
 class HttpClient:
     """
     Wrapper em torno de requests.Session que adiciona retry/backoff.
@@ -22,15 +70,21 @@ class HttpClient:
         timeout: int,
         max_retries: int = 3,
         backoff_factor: float = 0.3,
-        status_forcelist: Optional[frozenset] = frozenset({500, 502, 503, 504})
+        status_forcelist: Optional[frozenset] = frozenset({500, 502, 503, 504}),
+        pool_maxsize: int = 10,
+        cache: Optional[ResponseCache] = None,
     ):
         """
         :param timeout: tempo máximo de espera para cada requisição (em segundos)
         :param max_retries: número máximo de tentativas em caso de falha
         :param backoff_factor: fator de backoff exponencial entre tentativas
         :param status_forcelist: códigos HTTP que disparam retry
+        :param pool_maxsize: conexões mantidas por host; deve acompanhar o número de workers
+            que compartilham esta sessão
+        :param cache: cache de respostas GET (opcional)
         """
         self.timeout = timeout
+        self.cache = cache
         self.session = requests.Session()
         retry_strategy = Retry(
             total=max_retries,
@@ -38,10 +92,29 @@ class HttpClient:
             status_forcelist=status_forcelist,
             allowed_methods={"GET", "POST"}
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        adapter = HTTPAdapter(
+            max_retries=retry_strategy,
+            pool_connections=pool_maxsize,
+            pool_maxsize=pool_maxsize,
+        )
         self.session.mount("https://", adapter)
         self.session.mount("http://", adapter)
 
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Envia a requisição registrando tempo, bytes e retries na etapa "http.<método>".
+        """
+        with stage(f"http.{method.lower()}") as span:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            retries = getattr(response.raw, "retries", None)
+            body = response.request.body or b""
+            span.add(
+                bytes_in=len(response.content),
+                bytes_out=len(body),
+                retries=len(retries.history) if retries is not None else 0,
+            )
+        return response
+
     def get(
         self,
         url: str,
@@ -51,10 +124,69 @@ class HttpClient:
         """
         Executa um GET e retorna o conteúdo de resposta como texto.
         """
-        logger.debug("HttpClient GET url=%s params=%s headers=%s", url, params, headers)
-        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        return self.get_response(url, params=params, headers=headers).text
+
+    def get_response(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> CachedResponse:
+        """
+        Executa um GET passando pelo cache, quando configurado.
+        Dentro do TTL a resposta vem do disco; depois dele, a requisição é condicional
+        (If-None-Match/If-Modified-Since) e, sem suporte do servidor, o conteúdo é
+        comparado pelo hash.
+        :return: CachedResponse indicando se o conteúdo veio do cache ou é novo
+        """
+        if self.cache is None:
+            logger.debug("HttpClient GET url=%s params=%s headers=%s", url, params, headers)
+            response = self._request("GET", url, params=params, headers=headers)
+            response.raise_for_status()
+            return CachedResponse(response.text, "new", hashlib.sha256(response.content).hexdigest())
+
+        key = self.cache.key(url, params)
+        cached = self.cache.store.get(key)
+        meta = cached[1] if cached else None
+        if cached and time.time() - meta["stored_at"] < self.cache.ttl:
+            logger.debug("HttpClient cache hit url=%s params=%s", url, params)
+            return CachedResponse(cached[0].decode("utf-8"), "fresh", meta["content_hash"])
+
+        request_headers = dict(headers or {})
+        if meta and meta.get("etag"):
+            request_headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            request_headers["If-Modified-Since"] = meta["last_modified"]
+        logger.debug("HttpClient GET url=%s params=%s headers=%s", url, params, request_headers)
+        response = self._request("GET", url, params=params, headers=request_headers)
+
+        if response.status_code == 304 and cached:
+            self.cache.store.update_meta(key, {**meta, "stored_at": time.time()})
+            return CachedResponse(cached[0].decode("utf-8"), "not_modified", meta["content_hash"])
+        if response.status_code == 304:
+            # 304 sem conteúdo em cache (validadores vindos de `headers` ou entrada despejada):
+            # o corpo vazio não pode ser guardado; descarta a entrada e repete sem condicionais
+            logger.warning("HttpClient got 304 without a cached body for url=%s; retrying unconditionally", url)
+            self.cache.store.delete(key)
+            request_headers = {
+                name: value for name, value in request_headers.items()
+                if name.lower() not in ("if-none-match", "if-modified-since")
+            }
+            response = self._request("GET", url, params=params, headers=request_headers)
+            if response.status_code == 304:
+                raise requests.HTTPError(f"304 Not Modified sem conteúdo em cache: {url}", response=response)
         response.raise_for_status()
-        return response.text
+
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        status = "unchanged" if meta and meta["content_hash"] == content_hash else "new"
+        text = response.text
+        self.cache.store.put(key, text.encode("utf-8"), {
+            "stored_at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_hash": content_hash,
+        })
+        return CachedResponse(text, status, content_hash)
 
     def post(
         self,
@@ -67,6 +199,6 @@ class HttpClient:
         Executa um POST e retorna o conteúdo de resposta como texto.
         """
         logger.debug("HttpClient POST url=%s data=%s json=%s headers=%s", url, data, json, headers)
-        response = self.session.post(url, data=data, json=json, headers=headers, timeout=self.timeout)
+        response = self._request("POST", url, data=data, json=json, headers=headers)
         response.raise_for_status()
         return response.text
\ No newline at end of file
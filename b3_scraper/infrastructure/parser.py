@@ -4,51 +4,99 @@ Parser que converte HTML bruto do IBOV em objetos TradeRecord.
 """
 import logging
 import re
-from typing import List
+from typing import Iterable, Iterator, List, Optional, TYPE_CHECKING
 from decimal import Decimal
-from datetime import datetime
-
-from bs4 import BeautifulSoup
+from datetime import date, datetime
 
+from b3_scraper.config import settings
 from b3_scraper.domain.models import TradeRecord
+from b3_scraper.infrastructure.html_table import extract_bs4, extract_lxml, extract_stream
+from b3_scraper.instrumentation import stage
+
+if TYPE_CHECKING:
+    import pyarrow as pa
 
 logger = logging.getLogger(__name__)
 
+# Extratores de HTML disponíveis para Parser.parse
+_EXTRACTORS = {
+    "bs4": extract_bs4,
+    "lxml": extract_lxml,
+    "stream": extract_stream,
+}
+
 class Parser:
     """
     Converte HTML de tabela IBOV em uma lista de TradeRecord.
     """
+    def __init__(self, backend: str = None):
+        """
+        :param backend: extrator de HTML usado por parse(): "lxml", "stream" (parser de
+            eventos da biblioteca padrão), "bs4" (BeautifulSoup) ou "auto" (lxml se
+            instalado, senão stream). Default: settings.PARSER_BACKEND.
+        O backend só é resolvido (e sua dependência importada) no primeiro parse() ou em
+        check(): os caminhos JSON não carregam lxml/bs4.
+        """
+        backend = (backend or settings.PARSER_BACKEND).lower()
+        if backend != "auto" and backend not in _EXTRACTORS:
+            raise ValueError(f"Backend de parsing desconhecido: {backend}")
+        self.backend = backend
+        self._resolved = False
+
+    def check(self) -> str:
+        """
+        Resolve o backend ("auto" -> lxml, se instalado, senão stream) e importa sua dependência.
+        :return: backend efetivo
+        :raises ImportError: se a dependência do backend escolhido não estiver instalada
+        """
+        if self._resolved:
+            return self.backend
+        backend = self.backend
+        if backend == "auto":
+            try:
+                import lxml.html  # noqa: F401
+                backend = "lxml"
+            except ImportError:
+                backend = "stream"
+        elif backend == "lxml":
+            import lxml.html  # noqa: F401
+        elif backend == "bs4":
+            import bs4  # noqa: F401
+        self.backend = backend
+        self._resolved = True
+        return backend
+
     def parse(self, html: str) -> List[TradeRecord]:
         """
         :param html: conteúdo HTML da página IBOV
         :return: lista de TradeRecord extraídos do HTML
         """
-        soup = BeautifulSoup(html, "html.parser")
+        with stage("parse.html") as span:
+            records = self._parse_html(html)
+            span.add(bytes_in=len(html), rows=len(records))
+        return records
+
+    def _parse_html(self, html: str) -> List[TradeRecord]:
+        table = _EXTRACTORS[self.check()](html)
 
         # Extrai a data do cabeçalho (formato "Carteira do Dia - DD/MM/YY")
-        header_tag = soup.find("h2")
-        if header_tag:
-            full_text = header_tag.get_text(strip=True)
-            m = re.search(r"(\d{2}/\d{2}/\d{2})", full_text)
+        record_date = None
+        if table.header_text is not None:
+            m = re.search(r"(\d{2}/\d{2}/\d{2})", table.header_text)
             if m:
                 record_date = datetime.strptime(m.group(1), "%d/%m/%y").date()
             else:
-                logger.warning("Formato de data inesperado no HTML: %s", full_text)
-                record_date = None
-        else:
-            record_date = None
+                logger.warning("Formato de data inesperado no HTML: %s", table.header_text)
 
-        table = soup.find("table")
-        if not table:
+        if table.rows is None:
             logger.error("Nenhuma tabela encontrada no HTML")
             return []
 
         # Cabeçalhos para mapear colunas
-        thead = table.find("thead")
-        if not thead:
+        if table.headers is None:
             logger.error("Tabela sem <thead>")
             return []
-        headers = [th.get_text(strip=True) for th in thead.find_all("th")]
+        headers = table.headers
 
         try:
             idx_code = headers.index("Código")
@@ -61,20 +109,19 @@ class Parser:
             return []
 
         records: List[TradeRecord] = []
-        for row in table.find("tbody").find_all("tr"):
-            cells = row.find_all("td")
+        for cells in table.rows:
             # Extrai valores das células
-            code = cells[idx_code].get_text(strip=True)
-            stock = cells[idx_stock].get_text(strip=True)
-            type_ = cells[idx_type].get_text(strip=True)
+            code = cells[idx_code]
+            stock = cells[idx_stock]
+            type_ = cells[idx_type]
             # Normaliza e converte números: de "1.234,56" para Decimal("1234.56")
-            qty_text = cells[idx_qty].get_text(strip=True).replace(".", "").replace(",", ".")
-            part_text = cells[idx_part].get_text(strip=True).replace("%", "").replace(".", "").replace(",", ".")
+            qty_text = cells[idx_qty].replace(".", "").replace(",", ".")
+            part_text = cells[idx_part].replace("%", "").replace(".", "").replace(",", ".")
             try:
                 theoretical_quantity = Decimal(qty_text)
                 participation_percentage = Decimal(part_text)
             except Exception as e:
-                logger.warning("Erro ao converter numérico em linha: %s – %s", row, e)
+                logger.warning("Erro ao converter numérico em linha: %s – %s", cells, e)
                 continue
 
             record = TradeRecord(
@@ -93,37 +140,58 @@ class Parser:
     def parse_json(self, data: dict) -> List[TradeRecord]:
         """
         Converte resposta JSON do IBOV em lista de TradeRecord.
+        Visão em objetos de parse_json_table, para quem precisa de registros individuais.
+        """
+        from b3_scraper.infrastructure.columnar import records_from_table
+
+        return records_from_table(self.parse_json_table(data))
+
+    def parse_json_table(self, data: dict) -> "pa.Table":
         """
+        Converte resposta JSON do IBOV em uma tabela Arrow (colunas tipadas, strings
+        com dictionary encoding e decimais de precisão fixa), pronta para Storage.save_table.
+        """
+        from b3_scraper.infrastructure.columnar import table_from_json_results
+
+        record_date = self._json_record_date(data)
+        with stage("parse.table") as span:
+            table = table_from_json_results(data.get("results", []), record_date)
+            span.add(rows=table.num_rows)
+        return table
+
+    def iter_json_tables(self, pages: Iterable[dict], batch_size: int) -> Iterator["pa.Table"]:
+        """
+        Converte páginas JSON (ex.: Scraper.iter_json_pages) em tabelas Arrow de até
+        `batch_size` linhas, consumindo as páginas sob demanda.
+        """
+        from b3_scraper.infrastructure.columnar import table_from_json_results
+
+        batch_size = max(1, batch_size)
+        pending: List[dict] = []
+        record_date = None
+        for page in pages:
+            # Todas as páginas trazem o mesmo cabeçalho; a data vem da primeira
+            if record_date is None:
+                record_date = self._json_record_date(page)
+            pending.extend(page.get("results") or [])
+            while len(pending) >= batch_size:
+                batch, pending = pending[:batch_size], pending[batch_size:]
+                with stage("parse.table") as span:
+                    table = table_from_json_results(batch, record_date)
+                    span.add(rows=table.num_rows)
+                yield table
+        if pending:
+            with stage("parse.table") as span:
+                table = table_from_json_results(pending, record_date)
+                span.add(rows=table.num_rows)
+            yield table
+
+    @staticmethod
+    def _json_record_date(data: dict) -> Optional[date]:
         # Extrai a data do pregão do JSON (formato "DD/MM/YY")
         date_str = data.get("header", {}).get("date", "").strip()
         try:
-            record_date = datetime.strptime(date_str, "%d/%m/%y").date()
+            return datetime.strptime(date_str, "%d/%m/%y").date()
         except ValueError:
             logger.warning("Formato de data inesperado no JSON: %s", date_str)
-            record_date = None
-
-        records: List[TradeRecord] = []
-        for item in data.get("results", []):
-            code = item.get("cod", "").strip()
-            stock = item.get("asset", "").strip()
-            type_ = item.get("type", "").strip()
-            # Normaliza e converte números para Decimal
-            qty_text = item.get("theoricalQty", "").replace(".", "").replace(",", ".")
-            part_text = item.get("part", "").replace(".", "").replace(",", ".")
-            try:
-                theoretical_quantity = Decimal(qty_text)
-                participation_percentage = Decimal(part_text)
-            except Exception:
-                logger.warning("Erro ao converter números no JSON: %s", item)
-                continue
-            records.append(
-                TradeRecord(
-                    code=code,
-                    stock=stock,
-                    type=type_,
-                    theoretical_quantity=theoretical_quantity,
-                    participation_percentage=participation_percentage,
-                    record_date=record_date,
-                )
-            )
-        return records
\ No newline at end of file
+            return None
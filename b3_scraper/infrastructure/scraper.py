@@ -4,15 +4,22 @@
 b3_scraper.infrastructure.scraper
 Classe responsável por baixar o HTML do pregão IBOV da B3.
 """
+import asyncio
 import logging
-from typing import Optional, Dict, Any
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterator, List
 from urllib.parse import urljoin
 
 import json
 import base64
+from datetime import date
 from b3_scraper.config import settings
 
+from b3_scraper.infrastructure.async_http_client import AsyncHttpClient
 from b3_scraper.infrastructure.http_client import HttpClient
+from b3_scraper.instrumentation import stage
 
 logger = logging.getLogger(__name__)
 
@@ -26,14 +33,17 @@ class Scraper:
         base_url: str,
         path: str,
         default_params: Optional[Dict[str, Any]] = None,
+        async_http_client: Optional[AsyncHttpClient] = None,
     ):
         """
         :param http_client: instância de HttpClient para fazer as requisições
         :param base_url: URL base do site (ex: https://sistemaswebb3-listados.b3.com.br)
         :param path: caminho relativo à base_url (ex: /indexPage/day/IBOV)
         :param default_params: parâmetros de query padrão (ex: language)
+        :param async_http_client: cliente usado pelos métodos assíncronos (afetch, afetch_json...)
         """
         self.http_client = http_client
+        self.async_http_client = async_http_client
         self.base_url = base_url
         self.path = path
         self.default_params = default_params or {"language": "pt-br"}
@@ -47,24 +57,242 @@ class Scraper:
         merged_params = {**self.default_params, **(params or {})}
         url = urljoin(self.base_url, self.path)
         logger.info("Fetching URL %s with params %s", url, merged_params)
-        html = self.http_client.get(url, params=merged_params)
+        with stage("fetch.html") as span:
+            html = self.http_client.get(url, params=merged_params)
+            span.add(bytes_in=len(html))
         logger.debug("Fetched %d characters", len(html))
         return html
 
-    def fetch_json(self, page_number: int = 1, page_size: int = None) -> dict:
+    def fetch_json(
+        self,
+        page_number: int = 1,
+        page_size: int = None,
+        index: str = None,
+        segment: str = None,
+        trade_date: Optional[date] = None,
+    ) -> dict:
         """
-        Faz o fetch do endpoint JSON do pregão IBOV.
+        Faz o fetch do endpoint JSON do pregão de um índice.
+        :param index: índice consultado (default: settings.INDEX)
+        :param segment: segmento de mercado (default: settings.SEGMENT)
+        :param trade_date: data do pregão desejada (campo "date" do payload); quando
+            omitida, a B3 retorna a carteira vigente. Confira header.date na resposta.
         """
+        url = self._json_url(page_number, page_size, index, segment, trade_date)
+        logger.info("Fetching JSON URL %s", url)
+        return self._decode_json(self.http_client.get(url))
+
+    def _json_url(
+        self,
+        page_number: int,
+        page_size: Optional[int],
+        index: Optional[str],
+        segment: Optional[str],
+        trade_date: Optional[date],
+    ) -> str:
         payload_dict = {
             "language": "pt-br",
             "pageNumber": page_number,
             "pageSize": page_size or settings.PAGE_SIZE,
-            "index": settings.INDEX,
-            "segment": settings.SEGMENT,
+            "index": index or settings.INDEX,
+            "segment": segment or settings.SEGMENT,
         }
+        if trade_date is not None:
+            payload_dict["date"] = trade_date.strftime("%d/%m/%Y")
         payload = json.dumps(payload_dict)
         encoded = base64.b64encode(payload.encode("utf-8")).decode("utf-8")
-        url = urljoin(self.base_url, f"indexProxy/indexCall/GetPortfolioDay/{encoded}")
+        return urljoin(self.base_url, f"indexProxy/indexCall/GetPortfolioDay/{encoded}")
+
+    @staticmethod
+    def _decode_json(response_text: str) -> dict:
+        with stage("json.decode") as span:
+            data = json.loads(response_text)
+            span.add(bytes_in=len(response_text), rows=len(data.get("results") or []))
+        return data
+
+    def fetch_json_all(
+        self,
+        page_size: int = None,
+        max_workers: int = None,
+        index: str = None,
+        segment: str = None,
+        trade_date: Optional[date] = None,
+    ) -> dict:
+        """
+        Faz o fetch de todas as páginas do endpoint JSON do pregão.
+        A primeira página informa o total de páginas/registros; as demais são
+        buscadas em paralelo (compartilhando a sessão do HttpClient) e os
+        resultados são concatenados na ordem das páginas.
+        :param page_size: registros por página (default: settings.PAGE_SIZE)
+        :param max_workers: limite de requisições simultâneas (default: settings.FETCH_WORKERS)
+        :param index: índice consultado (default: settings.INDEX)
+        :param segment: segmento de mercado (default: settings.SEGMENT)
+        :param trade_date: data do pregão desejada (ver fetch_json)
+        :return: JSON da primeira página com "results" contendo todas as páginas
+        """
+        page_size = page_size or settings.PAGE_SIZE
+        max_workers = max_workers or settings.FETCH_WORKERS
+        with stage("fetch") as span:
+            data = self._fetch_json_pages(page_size, max_workers, index, segment, trade_date)
+            span.add(rows=len(data.get("results") or []))
+        return data
+
+    def iter_json_pages(
+        self,
+        page_size: int = None,
+        max_workers: int = None,
+        index: str = None,
+        segment: str = None,
+        trade_date: Optional[date] = None,
+    ) -> Iterator[dict]:
+        """
+        Versão em streaming de fetch_json_all: entrega as páginas em ordem, uma a uma,
+        com no máximo `max_workers` páginas buscadas à frente do consumidor. A memória
+        fica limitada ao tamanho das páginas, não ao total de registros.
+        :return: respostas JSON de cada página
+        """
+        page_size = page_size or settings.PAGE_SIZE
+        max_workers = max_workers or settings.FETCH_WORKERS
+        first = self.fetch_json(
+            page_number=1, page_size=page_size, index=index, segment=segment, trade_date=trade_date
+        )
+        total_pages = self._total_pages(first, page_size)
+        yield first
+        first = None
+        if total_pages <= 1:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, total_pages - 1)) as executor:
+            pending = deque()
+            next_page = 2
+            while next_page <= total_pages or pending:
+                while next_page <= total_pages and len(pending) < max_workers:
+                    pending.append(executor.submit(
+                        self.fetch_json, page_number=next_page, page_size=page_size, index=index,
+                        segment=segment, trade_date=trade_date,
+                    ))
+                    next_page += 1
+                yield pending.popleft().result()
+
+    def _fetch_json_pages(
+        self,
+        page_size: int,
+        max_workers: int,
+        index: Optional[str],
+        segment: Optional[str],
+        trade_date: Optional[date],
+    ) -> dict:
+        first = self.fetch_json(
+            page_number=1, page_size=page_size, index=index, segment=segment, trade_date=trade_date
+        )
+        total_pages = self._total_pages(first, page_size)
+        if total_pages <= 1:
+            return first
+
+        logger.info("Fetching %d remaining pages with up to %d workers", total_pages - 1, max_workers)
+        pages: List[dict] = [first]
+        with ThreadPoolExecutor(max_workers=min(max_workers, total_pages - 1)) as executor:
+            # map preserva a ordem de submissão, garantindo o merge na ordem das páginas
+            pages.extend(executor.map(
+                lambda number: self.fetch_json(
+                    page_number=number, page_size=page_size, index=index, segment=segment,
+                    trade_date=trade_date,
+                ),
+                range(2, total_pages + 1),
+            ))
+
+        return self._merge_pages(pages)
+
+    @staticmethod
+    def _merge_pages(pages: List[dict]) -> dict:
+        first = pages[0]
+        merged = dict(first)
+        merged["results"] = [item for page in pages for item in page.get("results", [])]
+        merged["page"] = {
+            **first.get("page", {}),
+            "pageNumber": 1,
+            "pageSize": len(merged["results"]),
+            "totalPages": 1,
+        }
+        logger.info("Merged %d records from %d pages", len(merged["results"]), len(pages))
+        return merged
+
+    async def afetch(self, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Versão assíncrona de fetch (usa async_http_client).
+        """
+        merged_params = {**self.default_params, **(params or {})}
+        url = urljoin(self.base_url, self.path)
+        logger.info("Fetching URL %s with params %s", url, merged_params)
+        with stage("fetch.html") as span:
+            html = await self._async_client().get(url, params=merged_params)
+            span.add(bytes_in=len(html))
+        return html
+
+    async def afetch_json(
+        self,
+        page_number: int = 1,
+        page_size: int = None,
+        index: str = None,
+        segment: str = None,
+        trade_date: Optional[date] = None,
+    ) -> dict:
+        """
+        Versão assíncrona de fetch_json (usa async_http_client).
+        """
+        url = self._json_url(page_number, page_size, index, segment, trade_date)
         logger.info("Fetching JSON URL %s", url)
-        response_text = self.http_client.get(url)
-        return json.loads(response_text)
\ No newline at end of file
+        return self._decode_json(await self._async_client().get(url))
+
+    async def afetch_json_all(
+        self,
+        page_size: int = None,
+        index: str = None,
+        segment: str = None,
+        trade_date: Optional[date] = None,
+    ) -> dict:
+        """
+        Versão assíncrona de fetch_json_all: as páginas restantes são buscadas
+        concorrentemente; a concorrência efetiva é limitada pelo pool e pelos limites
+        de taxa do AsyncHttpClient.
+        """
+        page_size = page_size or settings.PAGE_SIZE
+        with stage("fetch") as span:
+            first = await self.afetch_json(
+                page_number=1, page_size=page_size, index=index, segment=segment, trade_date=trade_date
+            )
+            total_pages = self._total_pages(first, page_size)
+            if total_pages <= 1:
+                data = first
+            else:
+                rest = await asyncio.gather(*(
+                    self.afetch_json(
+                        page_number=number, page_size=page_size, index=index, segment=segment,
+                        trade_date=trade_date,
+                    )
+                    for number in range(2, total_pages + 1)
+                ))
+                data = self._merge_pages([first, *rest])
+            span.add(rows=len(data.get("results") or []))
+        return data
+
+    def _async_client(self) -> AsyncHttpClient:
+        if self.async_http_client is None:
+            raise RuntimeError("Scraper sem async_http_client: use os métodos síncronos")
+        return self.async_http_client
+
+    @staticmethod
+    def _total_pages(data: dict, page_size: int) -> int:
+        """
+        Lê o total de páginas do bloco "page" da resposta; na ausência de
+        "totalPages", calcula a partir de "totalRecords".
+        """
+        page_info = data.get("page") or {}
+        total_pages = page_info.get("totalPages")
+        if total_pages is None and page_info.get("totalRecords") is not None:
+            total_pages = math.ceil(int(page_info["totalRecords"]) / page_size)
+        try:
+            return max(int(total_pages or 1), 1)
+        except (TypeError, ValueError):
+            logger.warning("Informação de paginação inesperada no JSON: %s", page_info)
+            return 1
@@ -0,0 +1,181 @@
+"""
+b3_scraper.infrastructure.snapshot
+Snapshot local da carteira mais recente de cada índice, em Arrow IPC (formato de arquivo,
+sem compressão), para consumidores locais de baixa latência (dashboards, scripts de risco):
+- <DIRETÓRIO>/<INDICE>.arrow: registros da última coleta, substituído atomicamente (rename);
+- <DIRETÓRIO>/<INDICE>.version: contador de versões do snapshot, gravado após o arquivo.
+Leitores mapeiam o arquivo em memória (zero-copy) e relêem só quando a versão muda.
+"""
+import logging
+import os
+import re
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9._-]+$")
+
+
+def _name(index: str) -> str:
+    name = index.upper()
+    if not _SAFE_NAME.match(name):
+        raise ValueError(f"Nome de índice inválido para snapshot: {index}")
+    return name
+
+
+def _write_atomic(directory: str, path: str, write) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_version(directory: str, index: str) -> int:
+    """
+    Versão atual do snapshot de um índice (0 se nunca publicado). Leitura de poucos bytes,
+    adequada para polling frequente.
+    """
+    try:
+        with open(os.path.join(directory, f"{_name(index)}.version"), encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+class SnapshotPublisher:
+    """
+    Publica o snapshot de cada índice. Um único publicador por diretório (processo da
+    coleta); leitores podem estar em qualquer processo.
+    """
+    def __init__(self, directory: str):
+        """
+        :param directory: diretório dos snapshots (criado se não existir)
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def version(self, index: str) -> int:
+        return read_version(self.directory, index)
+
+    def publish(self, index: str, table: "pa.Table") -> int:
+        """
+        Grava a tabela como o snapshot do índice e incrementa a versão.
+        O arquivo é escrito ao lado e trocado por rename: leitores veem o snapshot
+        anterior ou o novo, nunca um arquivo parcial.
+        :return: nova versão
+        """
+        import pyarrow as pa
+
+        name = _name(index)
+        with self._lock:
+            version = self.version(name) + 1
+            metadata = dict(table.schema.metadata or {})
+            metadata.update({
+                b"index": name.encode("utf-8"),
+                b"version": str(version).encode("utf-8"),
+                b"published_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ").encode("utf-8"),
+            })
+            # Um único record batch: o leitor recebe colunas contíguas
+            table = table.combine_chunks().replace_schema_metadata(metadata)
+
+            def write_table(f) -> None:
+                with pa.ipc.new_file(f, table.schema) as writer:
+                    writer.write_table(table)
+
+            _write_atomic(self.directory, os.path.join(self.directory, f"{name}.arrow"), write_table)
+            _write_atomic(
+                self.directory,
+                os.path.join(self.directory, f"{name}.version"),
+                lambda f: f.write(str(version).encode("utf-8")),
+            )
+        logger.debug("Published snapshot %s version %d (%d rows)", name, version, table.num_rows)
+        return version
+
+
+@dataclass
+class Snapshot:
+    """
+    Snapshot mapeado em memória; a tabela referencia diretamente o arquivo mapeado
+    (continua válida mesmo após a publicação de uma nova versão).
+    """
+    index: str
+    version: int
+    published_at: str
+    table: "pa.Table"
+
+
+class SnapshotReader:
+    """
+    Leitor dos snapshots: latest() só remapeia o arquivo quando a versão muda.
+    """
+    def __init__(self, directory: str):
+        """
+        :param directory: diretório dos snapshots
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._cached: Dict[str, Snapshot] = {}
+
+    def version(self, index: str) -> int:
+        return read_version(self.directory, index)
+
+    def indices(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len(".arrow")] for name in names if name.endswith(".arrow"))
+
+    def read(self, index: str) -> Snapshot:
+        """
+        Mapeia o snapshot atual do índice (zero-copy).
+        :raises FileNotFoundError: se o índice nunca foi publicado
+        """
+        import pyarrow as pa
+
+        name = _name(index)
+        source = pa.memory_map(os.path.join(self.directory, f"{name}.arrow"))
+        table = pa.ipc.open_file(source).read_all()
+        metadata = table.schema.metadata or {}
+        return Snapshot(
+            index=name,
+            version=int(metadata.get(b"version", b"0")),
+            published_at=metadata.get(b"published_at", b"").decode("utf-8"),
+            table=table,
+        )
+
+    def latest(self, index: str) -> Snapshot:
+        """
+        Snapshot mais recente, reaproveitando o mapeamento anterior se a versão não mudou.
+        """
+        name = _name(index)
+        version = self.version(name)
+        with self._lock:
+            cached = self._cached.get(name)
+            if cached is not None and cached.version >= version:
+                return cached
+        snapshot = self.read(name)
+        with self._lock:
+            self._cached[name] = snapshot
+        return snapshot
+
+    def changed(self, index: str, since_version: int) -> bool:
+        """
+        Indica se há uma versão mais nova que `since_version`.
+        """
+        return self.version(index) > since_version
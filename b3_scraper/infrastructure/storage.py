@@ -1,77 +1,491 @@
 """
 b3_scraper.infrastructure.storage
-Persistência de registros, enviando arquivos Parquet ao S3.
+Persistência de registros, enviando arquivos Parquet ao S3 (ou a outro backend de
+infrastructure.backends: diretório local, spool write-behind).
 """
 import logging
 import json
-from datetime import datetime
-from typing import List
-import os
-
-import boto3
-from botocore.exceptions import BotoCoreError, ClientError
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import io
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 from b3_scraper.domain.models import TradeRecord
+from b3_scraper.infrastructure.backends import ObjectAccessDenied, ObjectNotFound, S3Backend, StorageBackend
+from b3_scraper.infrastructure.columnar import (
+    SCHEMA,
+    Fingerprint,
+    conform,
+    deduplicate,
+    fingerprint,
+    table_from_records,
+)
+from b3_scraper.infrastructure.disk_cache import DiskCache
+from b3_scraper.instrumentation import stage
 
 logger = logging.getLogger(__name__)
 
+
+@dataclass
+class PartitionResult:
+    """
+    Resultado da gravação de uma partição (um arquivo Parquet por data de pregão):
+    - status: "written", "unchanged" (mesma impressão digital da última gravação; nada
+      foi enviado) ou "failed"
+    """
+    prefix: str
+    record_date: str
+    key: str
+    rows: int
+    status: str = "written"
+    fingerprint: Optional[str] = None
+    error: Optional[Exception] = None
+
+
+class StorageError(Exception):
+    """
+    Falha na gravação de uma ou mais partições; as demais foram gravadas normalmente.
+    """
+    def __init__(self, results: List[PartitionResult]):
+        self.results = results
+        self.failures: Dict[str, Exception] = {
+            result.key: result.error for result in results if result.error is not None
+        }
+        super().__init__(
+            f"{len(self.failures)} de {len(results)} partições falharam: "
+            + "; ".join(f"{key}: {error}" for key, error in self.failures.items())
+        )
+
+
+class _PartitionStream:
+    """
+    Gravação incremental de uma partição: ParquetWriter sobre o sink do backend (ex.:
+    backends.MultipartSink), com a impressão digital acumulada lote a lote.
+    """
+    def __init__(self, result: PartitionResult, sink: Any, row_group_size: int):
+        self.result = result
+        self.sink = sink
+        self.row_group_size = row_group_size
+        self.fingerprint = Fingerprint()
+        self.writer: Optional[pq.ParquetWriter] = None
+
+    def write(self, group: pa.Table) -> None:
+        self.fingerprint.update(group)
+        with stage("parquet.serialize") as span:
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.sink, group.schema)
+            elif group.schema != self.writer.schema:
+                group = group.cast(self.writer.schema)
+            before = self.sink.tell()
+            self.writer.write_table(group, row_group_size=self.row_group_size)
+            span.add(bytes_out=self.sink.tell() - before, rows=group.num_rows)
+        self.result.rows += group.num_rows
+
+    def close_writer(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def abort(self) -> None:
+        try:
+            self.close_writer()
+        finally:
+            self.sink.abort()
+
+
 class Storage:
     """
-    Faz upload de listas de TradeRecord para um bucket S3 como arquivo Parquet.
+    Faz upload de listas de TradeRecord (ou tabelas colunares) para um bucket S3 como arquivos Parquet.
+    O acesso aos objetos passa pelo backend (S3Backend por padrão).
     """
-    def __init__(self, bucket: str, region: str, prefix: str):
+    def __init__(
+        self,
+        bucket: str,
+        region: str,
+        prefix: str,
+        upload_workers: int = 8,
+        multipart_threshold: int = 8 * 1024 * 1024,
+        skip_unchanged: bool = True,
+        cache: Optional[DiskCache] = None,
+        endpoint_url: Optional[str] = None,
+        backend: Optional[StorageBackend] = None,
+    ):
         """
         :param bucket: nome do bucket S3
         :param region: região AWS
         :param prefix: prefixo/pasta dentro do bucket
+        :param upload_workers: partições serializadas/enviadas em paralelo; também define
+            o tamanho do pool de conexões do cliente S3
+        :param multipart_threshold: tamanho (bytes) a partir do qual o upload é multipart
+        :param skip_unchanged: não regrava partições cujo conteúdo tem a mesma impressão
+            digital registrada no manifesto da última gravação
+        :param cache: cache local dos Parquets lidos por load (validado pelo ETag); None desabilita
+        :param endpoint_url: endpoint S3 alternativo (MinIO, servidor local de benchmark...),
+            acessado com endereçamento por caminho
+        :param backend: backend de objetos (LocalBackend, SpoolBackend...); default: S3Backend
+            com bucket/region/endpoint_url
         """
         self.bucket = bucket
+        self.cache = cache
+        self.skip_unchanged = skip_unchanged
         self.prefix = prefix.rstrip('/')
-        # Inicializa cliente S3
-        # self.s3 = boto3.client('s3', region_name=region)
-        # Exchange environment role ARN if provided
-        role_arn = os.getenv('AWS_ROLE_ARN')
-        if role_arn:
-            sts = boto3.client('sts', region_name=region)
-            assumed = sts.assume_role(RoleArn=role_arn, RoleSessionName='b3-scraper-session')
-            creds = assumed['Credentials']
-            self.s3 = boto3.client(
-                's3',
-                region_name=region,
-                aws_access_key_id=creds['AccessKeyId'],
-                aws_secret_access_key=creds['SecretAccessKey'],
-                aws_session_token=creds['SessionToken']
-            )
-            logger.debug("Assumed role %s and created S3 client with temporary credentials", role_arn)
+        self.upload_workers = max(1, upload_workers)
+        self.multipart_threshold = multipart_threshold
+        self.backend = backend or S3Backend(
+            bucket,
+            region,
+            endpoint_url=endpoint_url,
+            upload_workers=self.upload_workers,
+            multipart_threshold=multipart_threshold,
+        )
+
+    def partition_prefix(self, record_date: str, prefix: Optional[str] = None) -> str:
+        """
+        Prefixo da partição Hive de uma data.
+        :param record_date: data no formato YYYY-MM-DD
+        :param prefix: prefixo alternativo ao informado no construtor
+        :return: ex.: "raw/ibov/ano=2025/mes=07/dia=21/"
+        """
+        prefix = (prefix or self.prefix).rstrip('/')
+        return f"{prefix}/ano={record_date[0:4]}/mes={record_date[5:7]}/dia={record_date[8:10]}/"
+
+    def partition_exists(self, record_date: str, prefix: Optional[str] = None) -> bool:
+        """
+        Indica se já existe algum arquivo Parquet gravado na partição da data.
+        :param record_date: data no formato YYYY-MM-DD
+        :param prefix: prefixo alternativo ao informado no construtor
+        """
+        return self.backend.exists(f"{self.partition_prefix(record_date, prefix)}trade_records_")
+
+    def list_objects(self, prefix: str) -> List[Dict]:
+        """
+        Lista (com paginação) os objetos sob um prefixo.
+        :return: dicionários do ListObjectsV2 (Key, Size, ETag, LastModified...)
+        """
+        return self.backend.list_objects(prefix)
+
+    def get_bytes(self, key: str) -> bytes:
+        """
+        Baixa o conteúdo de um objeto.
+        :raises ObjectNotFound: se a chave não existir
+        :raises ObjectAccessDenied: se a leitura for negada (403)
+        """
+        return self.backend.get_bytes(key)
+
+    def put_bytes(self, key: str, data: bytes, content_type: str = 'application/octet-stream') -> None:
+        """
+        Envia um objeto (multipart acima de multipart_threshold).
+        """
+        self.backend.put_bytes(key, data, content_type)
+
+    def delete_keys(self, keys: List[str]) -> List[str]:
+        """
+        Remove objetos em lotes de até 1000 chaves.
+        :return: chaves que não puderam ser removidas
+        """
+        return self.backend.delete_keys(keys)
+
+    def load(
+        self,
+        start_date: date,
+        end_date: date,
+        codes: Optional[List[str]] = None,
+        columns: Optional[List[str]] = None,
+        prefix: Optional[str] = None,
+    ) -> pa.Table:
+        """
+        Lê os registros gravados entre start_date e end_date (inclusive).
+        Somente as partições ano=/mes=/dia= do intervalo são listadas; o filtro de tickers
+        e a projeção de colunas são aplicados pelo leitor Parquet. Uma partição pode ter um
+        arquivo por gravação (polls do daemon, backfill --force, reprocess): como na
+        compactação, vale a última gravação de cada (code, record_date), e o resultado
+        sai ordenado por record_date/code.
+        :param codes: tickers a manter (default: todos)
+        :param columns: colunas de columnar.SCHEMA a ler (default: todas)
+        :param prefix: prefixo alternativo ao informado no construtor
+        :return: tabela no esquema columnar.SCHEMA (projetado em `columns`)
+        """
+        columns = list(columns) if columns is not None else list(SCHEMA.names)
+        unknown = [name for name in columns if name not in SCHEMA.names]
+        if unknown:
+            raise ValueError(f"Colunas desconhecidas: {unknown}")
+        filters = [('code', 'in', list(codes))] if codes else None
+        # A deduplicação precisa das colunas-chave, mesmo que não tenham sido pedidas
+        read_columns = columns + [name for name in ('code', 'record_date') if name not in columns]
+
+        def read(obj: Dict) -> pa.Table:
+            source = self._open_cached(obj)
+            with stage("parquet.read") as span:
+                table = conform(pq.read_table(source, columns=read_columns, filters=filters), read_columns)
+                span.add(rows=table.num_rows)
+            return table
+
+        objects = self._objects_between(start_date, end_date, prefix)
+        logger.debug("Loading %d Parquet files between %s and %s", len(objects), start_date, end_date)
+        if len(objects) <= 1:
+            tables = [read(obj) for obj in objects]
         else:
-            self.s3 = boto3.client('s3', region_name=region)
+            with ThreadPoolExecutor(max_workers=min(self.upload_workers, len(objects))) as executor:
+                tables = list(executor.map(read, objects))
+        if not tables:
+            return pa.schema([SCHEMA.field(name) for name in columns]).empty_table()
+        return deduplicate(pa.concat_tables(tables)).select(columns)
 
-    def save_records(self, records: List[TradeRecord]) -> None:
+    def _objects_between(self, start_date: date, end_date: date, prefix: Optional[str]) -> List[Dict]:
+        """
+        Arquivos Parquet das partições do intervalo, listando um prefixo ano=/mes= por mês.
+        """
+        prefix = (prefix or self.prefix).rstrip('/')
+        objects: List[Dict] = []
+        year, month = start_date.year, start_date.month
+        while (year, month) <= (end_date.year, end_date.month):
+            for obj in self.list_objects(f"{prefix}/ano={year:04d}/mes={month:02d}/"):
+                key = obj['Key']
+                day = key[len(prefix):].split('/dia=', 1)[-1][:2]
+                if key.endswith('.parquet') and day.isdigit() \
+                        and start_date <= date(year, month, int(day)) <= end_date:
+                    objects.append(obj)
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return sorted(objects, key=lambda obj: obj['Key'])
+
+    def _open_cached(self, obj: Dict):
+        """
+        Fonte de leitura de um objeto listado: o arquivo local quando o ETag em cache
+        coincide com o da listagem; caso contrário baixa (e guarda no cache, se houver).
+        """
+        key = obj['Key']
+        if self.cache is None:
+            return pa.BufferReader(self.get_bytes(key))
+        cache_key = self.backend.uri(key)
+        meta = self.cache.meta(cache_key)
+        if meta is not None and meta.get('etag') == obj.get('ETag'):
+            path = self.cache.path(cache_key)
+            try:
+                if path is not None:
+                    return pa.memory_map(path)
+            except OSError:
+                # Despejado entre a consulta e a abertura: baixa novamente
+                pass
+        body = self.get_bytes(key)
+        self.cache.put(cache_key, body, {'etag': obj.get('ETag'), 'key': key})
+        return pa.BufferReader(body)
+
+    def save_records(self, records: List[TradeRecord], prefix: Optional[str] = None) -> List[PartitionResult]:
         """
         Persiste os registros no bucket S3 em arquivos Parquet particionados por data.
         :param records: lista de TradeRecord
+        :param prefix: prefixo alternativo ao informado no construtor (ex.: outro índice)
+        :return: resultado de cada partição (ver save_table)
+        """
+        return self.save_table(table_from_records(records), prefix=prefix)
+
+    def save_table(self, table: pa.Table, prefix: Optional[str] = None) -> List[PartitionResult]:
+        """
+        Persiste uma tabela colunar (ver infrastructure.columnar) no bucket S3,
+        um arquivo Parquet por data de pregão. As partições são serializadas e
+        enviadas em paralelo; uma falha não interrompe as demais.
+        :param table: tabela com o esquema columnar.SCHEMA
+        :param prefix: prefixo alternativo ao informado no construtor (ex.: outro índice)
+        :return: resultado de cada partição
+        :raises StorageError: se alguma partição falhar (após tentar todas)
+        """
+        results = self._write_partitions(self._partitions(table, prefix))
+        if any(result.error is not None for result in results):
+            raise StorageError(results)
+        return results
+
+    def save_many(self, batches: List[Tuple[str, pa.Table]]) -> List[List[PartitionResult]]:
+        """
+        Persiste vários lotes (ex.: um por índice) em uma única passada: as partições
+        de todos os lotes compartilham o mesmo pool de upload e cliente S3.
+        :param batches: pares (prefixo, tabela colunar)
+        :return: resultados das partições de cada lote, na mesma ordem dos lotes
+            (falhas ficam em PartitionResult.error; nenhuma exceção é propagada)
+        """
+        partitions = []
+        owners = []
+        grouped: List[List[PartitionResult]] = [[] for _ in batches]
+        for position, (prefix, table) in enumerate(batches):
+            try:
+                batch_partitions = self._partitions(table, prefix)
+            except Exception as e:
+                logger.error("Failed to prepare records under prefix %s: %s", prefix, e)
+                grouped[position].append(PartitionResult(prefix, "", "", 0, status="failed", error=e))
+                continue
+            partitions.extend(batch_partitions)
+            owners.extend([position] * len(batch_partitions))
+
+        for owner, result in zip(owners, self._write_partitions(partitions)):
+            grouped[owner].append(result)
+        return grouped
+
+    def save_stream(
+        self,
+        batches: Iterable[pa.Table],
+        prefix: Optional[str] = None,
+        row_group_size: Optional[int] = None,
+    ) -> List[PartitionResult]:
+        """
+        Persiste lotes de uma tabela colunar (ex.: Parser.iter_json_tables) sem materializá-la:
+        cada lote vira row groups do Parquet da sua partição, enviado ao S3 em partes à
+        medida que é serializado. A memória fica limitada ao lote e a uma parte do upload
+        por partição aberta. Com skip_unchanged, a impressão digital (acumulada lote a lote)
+        é comparada ao manifesto ao final e, se coincidir, o upload é abortado.
+        Se o iterador de lotes falhar, todos os uploads em andamento são abortados.
+        :param batches: tabelas com o esquema columnar.SCHEMA
+        :param prefix: prefixo alternativo ao informado no construtor (ex.: outro índice)
+        :param row_group_size: linhas por row group (default: o tamanho de cada lote)
+        :return: resultado de cada partição
+        :raises StorageError: se alguma partição falhar ao concluir o upload
+        """
+        streams: Dict[str, _PartitionStream] = {}
+        try:
+            for batch in batches:
+                for result, group in self._partitions(batch, prefix):
+                    stream = streams.get(result.record_date)
+                    if stream is None:
+                        result.rows = 0
+                        sink = self.backend.open_sink(result.key, self.multipart_threshold)
+                        stream = streams[result.record_date] = _PartitionStream(result, sink, row_group_size or group.num_rows)
+                    stream.write(group)
+        except BaseException:
+            for stream in streams.values():
+                stream.abort()
+            raise
+
+        results = [self._finish_stream(stream) for stream in streams.values()]
+        if any(result.error is not None for result in results):
+            raise StorageError(results)
+        return results
+
+    def _finish_stream(self, stream: _PartitionStream) -> PartitionResult:
         """
-        df = pd.DataFrame([record.__dict__ for record in records])
-        df['record_date'] = pd.to_datetime(df['record_date']).dt.strftime('%Y-%m-%d')
+        Conclui (ou aborta, se inalterada) a gravação de uma partição em streaming e grava o manifesto.
+        """
+        result = stream.result
+        try:
+            stream.close_writer()
+            result.fingerprint = stream.fingerprint.hexdigest()
+            if self.skip_unchanged:
+                manifest = self._last_manifest(result)
+                if manifest and manifest.get('fingerprint') == result.fingerprint:
+                    stream.sink.abort()
+                    result.status = "unchanged"
+                    result.key = manifest.get('key', result.key)
+                    logger.info("Partition %s unchanged since %s; upload aborted",
+                                result.record_date, manifest.get('written_at'))
+                    return result
+            stream.sink.complete()
+            self._write_manifest(result)
+            logger.info("Successfully streamed %d records for date %s as Parquet to %s",
+                        result.rows, result.record_date, self.backend.uri(result.key))
+        except Exception as e:
+            logger.error("Failed to stream Parquet records for date %s: %s", result.record_date, e)
+            stream.sink.abort()
+            result.status = "failed"
+            result.error = e
+        return result
+
+    def _partitions(self, table: pa.Table, prefix: Optional[str]) -> List[Tuple[PartitionResult, pa.Table]]:
+        """
+        Separa a tabela por data de pregão, definindo a chave S3 de cada partição.
+        """
+        prefix = (prefix or self.prefix).rstrip('/')
+        dates = table['record_date'].cast(pa.string())
+        undated = table.num_rows - pc.sum(pc.is_valid(dates)).as_py() if table.num_rows else 0
+        if undated:
+            logger.warning("Discarding %d records without record_date", undated)
         timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
         # Particionamento alterado de date=YYYY-MM-DD para ano=YYYY/mes=MM/dia=DD para compatibilizar com Glue/Athena.
-        for record_date, group in df.groupby('record_date'):
-            buf = io.BytesIO()
-            group.to_parquet(buf, index=False)
-            buf.seek(0)
-            key = (f"{self.prefix}/ano={record_date[0:4]}/mes={record_date[5:7]}/dia={record_date[8:10]}/"
-                   f"trade_records_{timestamp}.parquet")
-            try:
-                self.s3.put_object(
-                    Bucket=self.bucket,
-                    Key=key,
-                    Body=buf.getvalue(),
-                    ContentType='application/octet-stream'
-                )
-                logger.info("Successfully uploaded %d records for date %s as Parquet to s3://%s/%s", len(group), record_date, self.bucket, key)
-            except (BotoCoreError, ClientError) as e:
-                logger.error("Failed to upload Parquet records for date %s to S3: %s", record_date, e)
-                raise
\ No newline at end of file
+        partitions = []
+        for record_date in sorted(pc.unique(pc.drop_null(dates)).to_pylist()):
+            group = table.filter(pc.equal(dates, record_date))
+            key = f"{self.partition_prefix(record_date, prefix)}trade_records_{timestamp}.parquet"
+            partitions.append((PartitionResult(prefix, record_date, key, group.num_rows), group))
+        return partitions
+
+    def _write_partitions(self, partitions: List[Tuple[PartitionResult, pa.Table]]) -> List[PartitionResult]:
+        if len(partitions) <= 1:
+            return [self._write_partition(result, group) for result, group in partitions]
+        with ThreadPoolExecutor(max_workers=min(self.upload_workers, len(partitions))) as executor:
+            return list(executor.map(lambda item: self._write_partition(*item), partitions))
+
+    def manifest_key(self, record_date: str, prefix: Optional[str] = None) -> str:
+        """
+        Chave do manifesto da partição (o "_" inicial faz Glue/Athena ignorarem o arquivo).
+        """
+        return f"{self.partition_prefix(record_date, prefix)}_manifest.json"
+
+    def read_manifest(self, record_date: str, prefix: Optional[str] = None) -> Optional[Dict]:
+        """
+        Manifesto da última gravação da partição, ou None se não existir. Um 403 também
+        conta como ausente: sem s3:ListBucket o S3 responde AccessDenied para chaves que
+        não existem, e a primeira gravação de uma partição não deve falhar por isso.
+        """
+        key = self.manifest_key(record_date, prefix)
+        try:
+            return json.loads(self.get_bytes(key))
+        except ObjectNotFound:
+            return None
+        except ObjectAccessDenied:
+            logger.warning("Access denied reading manifest %s; treating it as missing", self.backend.uri(key))
+            return None
+
+    def _last_manifest(self, result: PartitionResult) -> Optional[Dict]:
+        """
+        Manifesto usado por skip_unchanged. Se não puder ser lido (ex.: S3 instável com o
+        spool write-behind), a partição é gravada de novo em vez de falhar.
+        """
+        try:
+            return self.read_manifest(result.record_date, result.prefix)
+        except Exception as e:
+            logger.warning("Could not read manifest of partition %s (%s); writing it anyway", result.record_date, e)
+            return None
+
+    def _write_manifest(self, result: PartitionResult) -> None:
+        self.put_bytes(
+            self.manifest_key(result.record_date, result.prefix),
+            json.dumps({
+                'fingerprint': result.fingerprint,
+                'key': result.key,
+                'rows': result.rows,
+                'written_at': datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }).encode('utf-8'),
+            content_type='application/json',
+        )
+
+    def _write_partition(self, result: PartitionResult, group: pa.Table) -> PartitionResult:
+        """
+        Serializa uma partição em Parquet e envia ao S3 (multipart acima de multipart_threshold).
+        Quando skip_unchanged está ativo e a impressão digital coincide com a do manifesto,
+        nada é enviado.
+        """
+        try:
+            result.fingerprint = fingerprint(group)
+            if self.skip_unchanged:
+                manifest = self._last_manifest(result)
+                if manifest and manifest.get('fingerprint') == result.fingerprint:
+                    result.status = "unchanged"
+                    result.key = manifest.get('key', result.key)
+                    logger.info("Partition %s unchanged since %s; skipping upload",
+                                result.record_date, manifest.get('written_at'))
+                    return result
+
+            with stage("parquet.serialize") as span:
+                buf = io.BytesIO()
+                pq.write_table(group, buf)
+                span.add(bytes_out=buf.tell(), rows=group.num_rows)
+            self.put_bytes(result.key, buf.getvalue())
+            self._write_manifest(result)
+            logger.info("Successfully uploaded %d records for date %s as Parquet to %s", result.rows, result.record_date, self.backend.uri(result.key))
+        except Exception as e:
+            # Falhas (inclusive S3UploadFailedError do multipart) ficam na partição e são agregadas pelo chamador
+            logger.error("Failed to upload Parquet records for date %s: %s", result.record_date, e)
+            result.status = "failed"
+            result.error = e
+        return result
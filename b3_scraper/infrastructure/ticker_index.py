@@ -0,0 +1,219 @@
+"""
+b3_scraper.infrastructure.ticker_index
+Índice local de séries históricas por ticker: um arquivo binário de largura fixa por
+código (data, quantidade teórica e participação como inteiros escalados) e um
+index.json com o intervalo de datas e estatísticas min/max de cada código.
+"""
+import fcntl
+import json
+import logging
+import os
+import re
+import struct
+import tempfile
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from b3_scraper.domain.models import PART_SCALE, QTY_SCALE, CompactTradeRecord, to_scaled
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# Linha do arquivo de um ticker: dias desde 1970-01-01, quantidade e participação escaladas
+ROW = struct.Struct("<iqq")
+EPOCH = date(1970, 1, 1)
+INDEX_FILE = "index.json"
+LOCK_FILE = ".lock"
+
+_SAFE_CODE = re.compile(r"^[A-Za-z0-9._-]+$")
+
+
+class TickerIndex:
+    """
+    Séries históricas por ticker, mantidas incrementalmente a cada coleta.
+    Consultar um ticker lê apenas o seu arquivo, qualquer que seja o número de pregões
+    armazenados; atualizar um pregão novo só acrescenta uma linha ao final de cada arquivo.
+    """
+    def __init__(self, directory: str):
+        """
+        :param directory: diretório do índice (criado se não existir), ex.: ".ticker_index/ibov"
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index: Dict[str, Dict[str, Any]] = self._load_index()
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_index(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, sort_keys=True)
+        os.replace(tmp_path, os.path.join(self.directory, INDEX_FILE))
+
+    def _path(self, code: str) -> str:
+        return os.path.join(self.directory, f"{code}.bin")
+
+    def codes(self) -> List[str]:
+        return sorted(self._index)
+
+    def stats(self, code: str) -> Optional[Dict[str, Any]]:
+        """
+        Intervalo de datas, número de pregões e min/max de um ticker, ou None se ausente.
+        """
+        return self._index.get(code)
+
+    def update(self, table: "pa.Table") -> int:
+        """
+        Incorpora uma tabela colunar (ver infrastructure.columnar) ao índice.
+        Pregões posteriores ao último armazenado são acrescentados ao final do arquivo;
+        um pregão já armazenado é substituído e datas anteriores (backfill) são intercaladas.
+        Seguro com várias instâncias/processos no mesmo diretório.
+        :return: número de linhas incorporadas
+        """
+        columns = table.select(
+            ["code", "stock", "type", "theoretical_quantity", "participation_percentage", "record_date"]
+        ).to_pydict()
+        rows: Dict[str, Dict[int, tuple]] = {}
+        names: Dict[str, tuple] = {}
+        for code, stock, type_, qty, part, record_date in zip(
+            columns["code"], columns["stock"], columns["type"], columns["theoretical_quantity"],
+            columns["participation_percentage"], columns["record_date"],
+        ):
+            if not code or not record_date or qty is None or part is None:
+                continue
+            if not _SAFE_CODE.match(code):
+                logger.warning("Skipping ticker with unsupported code %r", code)
+                continue
+            day = (date.fromisoformat(record_date) - EPOCH).days
+            rows.setdefault(code, {})[day] = (day, to_scaled(qty, QTY_SCALE), to_scaled(part, PART_SCALE))
+            names[code] = (stock, type_)
+
+        # Backfill/reprocess atualizam o mesmo diretório a partir de várias threads e
+        # processos: o lock de arquivo serializa as escritas e o index.json é relido
+        with self._lock, open(os.path.join(self.directory, LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            self._index = self._load_index()
+            for code, new_rows in rows.items():
+                self._update_code(code, sorted(new_rows.values()), *names[code])
+            self._save_index()
+        return sum(len(new_rows) for new_rows in rows.values())
+
+    def _update_code(self, code: str, new_rows: List[tuple], stock: str, type_: str) -> None:
+        entry = self._index.get(code)
+        path = self._path(code)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            size = 0
+        # Arquivo do tamanho registrado no index.json: nenhuma gravação interrompida
+        # (queda entre o arquivo e o index.json) a reconciliar
+        consistent = entry is not None and size == entry["rows"] * ROW.size
+        if consistent and new_rows[0][0] >= entry["last_day"]:
+            # Caso comum (pregão novo ou nova coleta do último pregão): grava só o final do
+            # arquivo, substituindo a linha do último pregão quando ele é coletado de novo
+            replace_last = new_rows[0][0] == entry["last_day"]
+            with open(path, "r+b") as f:
+                f.seek(-ROW.size if replace_last else 0, os.SEEK_END)
+                last = ROW.unpack(f.read(ROW.size)) if replace_last else None
+                unchanged = last is not None and [last] == new_rows
+                if not unchanged:
+                    f.seek(-ROW.size if replace_last else 0, os.SEEK_END)
+                    f.write(b"".join(ROW.pack(*row) for row in new_rows))
+                    f.truncate()
+            if unchanged:
+                stats = dict(entry)
+            elif last is not None and self._loses_extreme(entry, last, new_rows[0]):
+                # A linha substituída era o mínimo/máximo e o novo valor não o cobre: recalcula
+                stats = self._stats(self._read(code))
+            else:
+                kept = dict(entry, rows=entry["rows"] - int(replace_last))
+                stats = self._merge_stats(kept, new_rows)
+        else:
+            existing = {row[0]: row for row in self._read(code)}
+            existing.update((row[0], row) for row in new_rows)
+            merged = [existing[day] for day in sorted(existing)]
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(b"".join(ROW.pack(*row) for row in merged))
+            os.replace(tmp_path, path)
+            stats = self._stats(merged)
+
+        stats.update(stock=stock, type=type_)
+        self._index[code] = stats
+
+    @staticmethod
+    def _loses_extreme(entry: Dict[str, Any], old: tuple, new: tuple) -> bool:
+        return any(
+            (old[position] == entry[f"{name}_min"] and new[position] > old[position])
+            or (old[position] == entry[f"{name}_max"] and new[position] < old[position])
+            for position, name in ((1, "quantity"), (2, "percentage"))
+        )
+
+    @staticmethod
+    def _stats(rows: List[tuple]) -> Dict[str, Any]:
+        quantities = [row[1] for row in rows]
+        percentages = [row[2] for row in rows]
+        return {
+            "first_day": rows[0][0],
+            "last_day": rows[-1][0],
+            "first_date": (EPOCH + timedelta(days=rows[0][0])).isoformat(),
+            "last_date": (EPOCH + timedelta(days=rows[-1][0])).isoformat(),
+            "rows": len(rows),
+            "quantity_min": min(quantities),
+            "quantity_max": max(quantities),
+            "percentage_min": min(percentages),
+            "percentage_max": max(percentages),
+        }
+
+    def _merge_stats(self, entry: Dict[str, Any], new_rows: List[tuple]) -> Dict[str, Any]:
+        stats = self._stats(new_rows)
+        stats.update(
+            first_day=entry["first_day"],
+            first_date=entry["first_date"],
+            rows=entry["rows"] + len(new_rows),
+            quantity_min=min(entry["quantity_min"], stats["quantity_min"]),
+            quantity_max=max(entry["quantity_max"], stats["quantity_max"]),
+            percentage_min=min(entry["percentage_min"], stats["percentage_min"]),
+            percentage_max=max(entry["percentage_max"], stats["percentage_max"]),
+        )
+        return stats
+
+    def _read(self, code: str) -> List[tuple]:
+        try:
+            with open(self._path(code), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        rows = ROW.iter_unpack(data[:len(data) - len(data) % ROW.size])
+        # Linhas do mesmo pregão (gravação interrompida antes do index.json): vale a última
+        by_day = {row[0]: row for row in rows}
+        return [by_day[day] for day in sorted(by_day)]
+
+    def history(self, code: str, start: Optional[date] = None, end: Optional[date] = None) -> List[CompactTradeRecord]:
+        """
+        Série histórica de um ticker, em ordem de data (quantidade/participação escaladas,
+        ver domain.models.CompactTradeRecord).
+        :param start: primeiro pregão (inclusive); default: início da série
+        :param end: último pregão (inclusive); default: fim da série
+        """
+        entry = self._index.get(code)
+        if entry is None:
+            return []
+        rows = self._read(code)
+        days = [row[0] for row in rows]
+        low = bisect_left(days, (start - EPOCH).days) if start else 0
+        high = bisect_right(days, (end - EPOCH).days) if end else len(rows)
+        return [
+            CompactTradeRecord(code, entry["stock"], entry["type"], qty, part, EPOCH + timedelta(days=day))
+            for day, qty, part in rows[low:high]
+        ]
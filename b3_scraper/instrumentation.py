@@ -0,0 +1,341 @@
+"""
+b3_scraper.instrumentation
+Instrumentação leve das etapas do pipeline (fetch, decode, parse, serialização, upload):
+tempo de parede, bytes de entrada/saída, retries, linhas e pico de memória por etapa.
+Sem uma execução ativa (start_run), stage() não registra nada.
+"""
+import cProfile
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class StageMetrics:
+    """
+    Métricas acumuladas de uma etapa em uma execução:
+    - peak_memory_bytes: com tracemalloc ativo (--profile ou PYTHONTRACEMALLOC=1), maior pico
+      de memória alocada durante a etapa; senão, o RSS máximo do processo até o fim da etapa
+      (marca d'água do processo, não da etapa; ver Recorder.report()["stage_peak_memory_scope"])
+    """
+    calls: int = 0
+    seconds: float = 0.0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    rows: int = 0
+    retries: int = 0
+    errors: int = 0
+    peak_memory_bytes: int = 0
+
+
+class Span:
+    """
+    Contadores de uma ocorrência da etapa, preenchidos pelo código instrumentado.
+    """
+    __slots__ = ("bytes_in", "bytes_out", "rows", "retries")
+
+    def __init__(self):
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.rows = 0
+        self.retries = 0
+
+    def add(self, bytes_in: int = 0, bytes_out: int = 0, rows: int = 0, retries: int = 0) -> None:
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.rows += rows
+        self.retries += retries
+
+
+class _PeakFrame:
+    """
+    Pico de memória (tracemalloc) de uma etapa em andamento.
+    """
+    __slots__ = ("peak",)
+
+    def __init__(self, peak: int):
+        self.peak = peak
+
+
+# Etapas em andamento (aninhadas e/ou em outras threads): antes de cada reset_peak() o pico
+# corrente é repassado a todas elas, para que o reset de uma etapa não apague o das outras
+_peak_lock = threading.Lock()
+_open_frames: List[_PeakFrame] = []
+_traced_high_water = 0
+
+
+def _fold_peak() -> None:
+    # Chamado com _peak_lock
+    global _traced_high_water
+    peak = tracemalloc.get_traced_memory()[1]
+    _traced_high_water = max(_traced_high_water, peak)
+    for frame in _open_frames:
+        frame.peak = max(frame.peak, peak)
+
+
+def _enter_peak() -> Optional[_PeakFrame]:
+    if not tracemalloc.is_tracing():
+        return None
+    with _peak_lock:
+        _fold_peak()
+        tracemalloc.reset_peak()
+        frame = _PeakFrame(tracemalloc.get_traced_memory()[0])
+        _open_frames.append(frame)
+    return frame
+
+
+def _exit_peak(frame: Optional[_PeakFrame]) -> int:
+    if frame is None:
+        return _process_peak()
+    with _peak_lock:
+        if tracemalloc.is_tracing():
+            _fold_peak()
+        _open_frames[:] = [other for other in _open_frames if other is not frame]
+    return frame.peak
+
+
+def _peak_memory() -> int:
+    if tracemalloc.is_tracing():
+        with _peak_lock:
+            _fold_peak()
+            return _traced_high_water
+    return _process_peak()
+
+
+def _process_peak() -> int:
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KiB; macOS, bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Recorder:
+    """
+    Agrega as métricas das etapas de uma execução (seguro entre threads).
+    """
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.stages: Dict[str, StageMetrics] = {}
+        self.info: Dict[str, Any] = {}
+        self._untraced_stages = 0
+
+    def record(self, name: str, seconds: float, span: Span, failed: bool, peak: int = 0, traced: bool = False) -> None:
+        """
+        :param peak: pico de memória da etapa (tracemalloc) ou do processo
+        :param traced: se o pico foi medido com tracemalloc durante a etapa
+        """
+        with self._lock:
+            self._untraced_stages += int(not traced)
+            metrics = self.stages.setdefault(name, StageMetrics())
+            metrics.calls += 1
+            metrics.seconds += seconds
+            metrics.bytes_in += span.bytes_in
+            metrics.bytes_out += span.bytes_out
+            metrics.rows += span.rows
+            metrics.retries += span.retries
+            metrics.errors += int(failed)
+            metrics.peak_memory_bytes = max(metrics.peak_memory_bytes, peak)
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Relatório estruturado da execução (serializável em JSON).
+        """
+        with self._lock:
+            stages = {name: asdict(metrics) for name, metrics in sorted(self.stages.items())}
+            stage_scope = "process_high_water_mark" if self._untraced_stages else "stage"
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "duration_seconds": round(time.perf_counter() - self._started, 6),
+            "peak_memory_bytes": _peak_memory(),
+            "stage_peak_memory_scope": stage_scope,
+            "info": self.info,
+            "stages": stages,
+            "gauges": gauges(),
+        }
+
+    def write_report(self, path: str) -> None:
+        """
+        Grava o relatório JSON da execução.
+        """
+        _write_atomic(path, json.dumps(self.report(), indent=2, default=str))
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Grava as métricas no formato textfile do node_exporter (gravação atômica,
+        para o coletor nunca ler um arquivo parcial).
+        """
+        _write_atomic(path, self.prometheus())
+
+    def prometheus(self) -> str:
+        """
+        Métricas no formato de exposição (texto) do Prometheus.
+        """
+        report = self.report()
+        lines = [
+            "# HELP b3_scraper_run_duration_seconds Duração da última execução.",
+            "# TYPE b3_scraper_run_duration_seconds gauge",
+            f"b3_scraper_run_duration_seconds {report['duration_seconds']}",
+            "# HELP b3_scraper_last_run_timestamp_seconds Início da última execução (epoch).",
+            "# TYPE b3_scraper_last_run_timestamp_seconds gauge",
+            f"b3_scraper_last_run_timestamp_seconds {self.started_at.timestamp():.0f}",
+        ]
+        for field in StageMetrics.__dataclass_fields__:
+            metric = f"b3_scraper_stage_{field}"
+            if field == "peak_memory_bytes" and report["stage_peak_memory_scope"] != "stage":
+                lines.append(f"# HELP {metric} RSS máximo do processo ao fim da etapa (sem tracemalloc).")
+            lines.append(f"# TYPE {metric} gauge")
+            for name, metrics in report["stages"].items():
+                lines.append(f'{metric}{{stage="{name}"}} {metrics[field]}')
+        # As séries de uma mesma medida (um spool por diretório) ficam sob um único TYPE
+        series_by_name: Dict[str, List[str]] = {}
+        for series, value in sorted(report["gauges"].items()):
+            series_by_name.setdefault(series.split("{", 1)[0], []).append(f"b3_scraper_{series} {value}")
+        for name, series_lines in series_by_name.items():
+            lines.append(f"# TYPE b3_scraper_{name} gauge")
+            lines.extend(series_lines)
+        return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path: str, content: str) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+_recorder: Optional[Recorder] = None
+# Funções que informam valores instantâneos (ex.: profundidade do spool de upload) e os
+# rótulos das suas séries
+_gauge_providers: List[Tuple[Callable[[], Dict[str, float]], Dict[str, str]]] = []
+
+
+def register_gauges(provider: Callable[[], Dict[str, float]], labels: Optional[Dict[str, str]] = None) -> None:
+    """
+    Registra uma função que devolve medidas instantâneas {nome: valor}, incluídas no
+    relatório e nas métricas Prometheus (como b3_scraper_<nome>).
+    :param provider: função sem argumentos
+    :param labels: rótulos das séries (ex.: {"spool": diretório}), para que várias
+                   instâncias da mesma fonte não sobrescrevam as medidas umas das outras
+    """
+    _gauge_providers.append((provider, dict(labels or {})))
+
+
+def unregister_gauges(provider: Callable[[], Dict[str, float]]) -> None:
+    """
+    Remove uma função registrada com register_gauges (ex.: ao fechar o spool).
+    """
+    _gauge_providers[:] = [(registered, labels) for registered, labels in _gauge_providers if registered != provider]
+
+
+def _series(name: str, labels: Dict[str, str]) -> str:
+    if not labels:
+        return name
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return name + "{" + ",".join(f'{label}="{value}"' for label, value in zip(labels, escaped)) + "}"
+
+
+def gauges() -> Dict[str, float]:
+    """
+    Medidas instantâneas de todas as fontes registradas, por série (nome{rótulos}).
+    """
+    values: Dict[str, float] = {}
+    for provider, labels in list(_gauge_providers):
+        try:
+            measured = provider()
+        except Exception:
+            # Uma medida indisponível não impede o relatório
+            continue
+        for name, value in measured.items():
+            values[_series(name, labels)] = value
+    return values
+
+
+def start_run() -> Recorder:
+    """
+    Inicia a coleta de métricas de uma nova execução.
+    """
+    global _recorder
+    _recorder = Recorder()
+    return _recorder
+
+
+def current() -> Optional[Recorder]:
+    return _recorder
+
+
+@contextmanager
+def profile(prefix: str, top: int = 50) -> Iterator[None]:
+    """
+    Perfila o bloco com cProfile e tracemalloc, gravando "<prefix>.prof" (abra com
+    pstats/snakeviz) e "<prefix>.tracemalloc.txt" (maiores alocações por linha).
+    """
+    global _traced_high_water
+    os.makedirs(os.path.dirname(os.path.abspath(prefix)), exist_ok=True)
+    tracemalloc.start()
+    with _peak_lock:
+        _traced_high_water = 0
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(f"{prefix}.prof")
+        snapshot = tracemalloc.take_snapshot()
+        # As etapas reiniciam o pico do tracemalloc: vale a marca acumulada em _fold_peak
+        current_bytes = tracemalloc.get_traced_memory()[0]
+        peak_bytes = _peak_memory()
+        tracemalloc.stop()
+        lines = [f"current={current_bytes} peak={peak_bytes}"]
+        lines.extend(str(statistic) for statistic in snapshot.statistics("lineno")[:top])
+        with open(f"{prefix}.tracemalloc.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+@contextmanager
+def stage(name: str) -> Iterator[Span]:
+    """
+    Cronometra uma etapa; o Span devolvido recebe bytes/linhas/retries.
+    Exemplo:
+        with stage("http.get") as span:
+            response = ...
+            span.add(bytes_in=len(response.content))
+    """
+    span = Span()
+    recorder = _recorder
+    if recorder is None:
+        yield span
+        return
+    frame = _enter_peak()
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield span
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        recorder.record(name, seconds, span, failed, _exit_peak(frame), traced=frame is not None)
@@ -1,19 +1,188 @@
-from dotenv import load_dotenv
-load_dotenv()
-
 """
 b3_scraper.interfaces.cli
 Interface de linha de comando para executar o scraper da B3 (IBOV).
+As dependências pesadas (pyarrow, boto3, requests...) são importadas apenas
+pelos comandos que as usam.
 """
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 import argparse
 import logging
 import sys
+from datetime import date
+
+from dotenv import load_dotenv
 
+from b3_scraper import instrumentation
 from b3_scraper.logger import configure_logging
 from b3_scraper.config import settings
-from b3_scraper.application.orchestrator import run
+
+# Módulos de custo relevante de importação, listados no relatório --timing
+HEAVY_MODULES = ("pydantic", "requests", "aiohttp", "pyarrow", "numpy", "pandas", "boto3", "bs4", "lxml")
+
+
+class _Timing:
+    """
+    Cronometra as etapas de inicialização/execução para o relatório --timing.
+    """
+    def __init__(self):
+        self.stages = [("import cli", time.perf_counter() - _IMPORT_STARTED)]
+        self._last = time.perf_counter()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    def report(self) -> str:
+        lines = ["Startup timing:"]
+        lines.extend(f"  {stage:<24}{seconds * 1000:9.1f} ms" for stage, seconds in self.stages)
+        lines.append(f"  {'total':<24}{sum(seconds for _, seconds in self.stages) * 1000:9.1f} ms")
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        lines.append(f"  heavy modules loaded: {', '.join(loaded) or 'none'}")
+        return "\n".join(lines)
+
+
+def _run(args, targets) -> int:
+    """
+    Comando padrão: coleta a carteira do dia dos índices informados.
+    """
+    from b3_scraper.application.orchestrator import run
+
+    results = run(targets)
+    for result in results:
+        if result.status == "failed":
+            logging.getLogger().error("Índice %s (segmento %s) falhou: %s", result.index, result.segment, result.error)
+        elif result.status == "unchanged":
+            logging.getLogger().info("Índice %s (segmento %s): carteira inalterada", result.index, result.segment)
+        else:
+            logging.getLogger().info("Índice %s (segmento %s): %d registros", result.index, result.segment, result.records)
+    return 1 if any(result.status == "failed" for result in results) else 0
+
+
+def _backfill(args, targets) -> int:
+    """
+    Reconstrói as partições dos pregões entre --start e --end.
+    """
+    from b3_scraper.application.backfill import backfill
+
+    results = backfill(
+        start=args.start,
+        end=args.end,
+        targets=targets,
+        workers=args.workers,
+        executor=args.executor,
+        checkpoint_path=args.checkpoint,
+        force=args.force,
+    )
+    summary = {}
+    for result in results:
+        summary[result.status] = summary.get(result.status, 0) + 1
+    logging.getLogger().info("Backfill concluído: %s", summary or "nada a fazer")
+    return 1 if any(result.status in ("failed", "mismatch") for result in results) else 0
+
+
+def _compact(args, targets) -> int:
+    """
+    Compacta as partições raw dos índices informados entre --start e --end.
+    """
+    from b3_scraper.application.orchestrator import build_storage, prefix_for
+    from b3_scraper.infrastructure.compaction import Compactor
+
+    compactor = Compactor(
+        build_storage(),
+        row_group_size=settings.COMPACTION_ROW_GROUP_SIZE,
+        workers=args.workers,
+    )
+    failed = False
+    for index, _ in targets:
+        results = compactor.compact_range(args.start, args.end, prefix=prefix_for(index))
+        compacted = [result for result in results if result.status == "compacted"]
+        logging.getLogger().info(
+            "Índice %s: %d partições compactadas (%d arquivos -> %d)",
+            index, len(compacted), sum(result.files_in for result in compacted), len(compacted),
+        )
+        failed = failed or any(result.status == "failed" for result in results)
+    return 1 if failed else 0
+
+
+def _refine(args, targets) -> int:
+    """
+    Gera a camada refined a partir das partições raw (somente as novas/alteradas).
+    """
+    from b3_scraper.application.orchestrator import prefix_for
+    from b3_scraper.application.refine import Refiner
+
+    if len(targets) > 1:
+        # A saída refined é única (partições record_date=/acao_partition=): um índice por vez
+        logging.getLogger().error("refine processa um único índice por vez; informe apenas um --index")
+        return 1
+    raw_uri = args.raw or f"s3://{settings.S3_BUCKET}/{prefix_for(targets[0][0])}"
+    refined_uri = args.refined or settings.REFINED_URI or f"s3://{settings.S3_BUCKET}/refined"
+    results = Refiner(raw_uri, refined_uri).refine(full=args.full)
+    refined = [result for result in results if result.status == "ok"]
+    logging.getLogger().info(
+        "Refine concluído: %d partições processadas (%d linhas refined)",
+        len(refined), sum(result.rows_out for result in refined),
+    )
+    return 1 if any(result.status == "failed" for result in results) else 0
+
+
+def _reprocess(args, targets) -> int:
+    """
+    Reconstrói as partições raw entre --start e --end a partir do arquivo de payloads.
+    """
+    from b3_scraper.application.reprocess import reprocess
+
+    results = reprocess(start=args.start, end=args.end, targets=targets, workers=args.workers)
+    summary = {}
+    for result in results:
+        summary[result.status] = summary.get(result.status, 0) + 1
+    logging.getLogger().info("Reprocessamento concluído: %s", summary or "nada a fazer")
+    return 1 if any(result.status == "failed" for result in results) else 0
+
+
+def _daemon(args, targets) -> int:
+    """
+    Coleta continuamente os índices durante o pregão, até SIGTERM/SIGINT.
+    """
+    import signal
+
+    from b3_scraper.application.daemon import Daemon, PollPolicy
+
+    policy = PollPolicy(
+        min_interval=args.min_interval,
+        max_interval=args.max_interval,
+        backoff=settings.DAEMON_BACKOFF,
+        edge_minutes=settings.DAEMON_EDGE_MINUTES,
+    )
+    daemon = Daemon(targets, policy, http_host=settings.DAEMON_HTTP_HOST, http_port=args.port)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: daemon.stop())
+    daemon.serve_forever()
+    return 0
+
+
+def _spool(args, targets) -> int:
+    """
+    Envia as entradas pendentes do spool write-behind (SPOOL_DIR) e informa o que restou.
+    """
+    from b3_scraper.application.orchestrator import drain_spool
+
+    if not settings.SPOOL_DIR:
+        logging.getLogger().error("SPOOL_DIR não definido")
+        return 1
+    remaining = drain_spool(args.timeout)
+    logging.getLogger().info("Spool: %d entradas pendentes", remaining)
+    return 1 if remaining else 0
+
 
 def main():
+    timing = _Timing()
+    # .env é carregado aqui (não na importação), antes do primeiro acesso a settings
+    load_dotenv()
     parser = argparse.ArgumentParser(
         description="Scraper de dados do pregão da B3 (IBOV)."
     )
@@ -21,36 +190,220 @@ def main():
         "--verbose", "-v", action="store_true",
         help="Ativa logging em nível DEBUG."
     )
+    parser.add_argument(
+        "--timing", action="store_true",
+        help="Exibe (em stderr) o tempo de cada etapa da inicialização e da execução."
+    )
+    parser.add_argument(
+        "--report", type=str, default=settings.RUN_REPORT_PATH,
+        help="Grava o relatório JSON de métricas por etapa neste arquivo (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--metrics-textfile", type=str, default=settings.METRICS_TEXTFILE,
+        help="Grava as métricas no formato textfile do Prometheus (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--profile", type=str, default=None, metavar="PREFIX",
+        help="Perfila a execução com cProfile/tracemalloc (gera PREFIX.prof e PREFIX.tracemalloc.txt)."
+    )
     parser.add_argument(
         "--page-size", type=int, default=settings.PAGE_SIZE,
         help="Número de registros por página (default: %(default)s)."
     )
     parser.add_argument(
-        "--index", type=str, default=settings.INDEX,
-        help="Índice para consulta (default: %(default)s)."
+        "--fetch-workers", type=int, default=settings.FETCH_WORKERS,
+        help="Páginas buscadas em paralelo (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--http-cache-dir", type=str, default=settings.HTTP_CACHE_DIR,
+        help="Diretório do cache local de respostas HTTP (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--async-http", action="store_true", default=settings.HTTP_ASYNC,
+        help="Busca os índices/páginas com o cliente HTTP assíncrono (aiohttp)."
+    )
+    parser.add_argument(
+        "--rate-limit", type=float, default=settings.HTTP_RATE_LIMIT,
+        help="Requisições por segundo à B3 no modo --async-http; 0 desabilita (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--stream", action="store_true", default=settings.STREAMING,
+        help="Pipeline em streaming: memória limitada por --batch-size em vez do total de registros."
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=settings.STREAM_BATCH_SIZE,
+        help="Linhas por lote no modo --stream (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--index", type=str, action="append", default=None,
+        help="Índice(s) para consulta, separados por vírgula e opcionalmente como INDICE:SEGMENTO; "
+             f"pode ser repetido (ex.: --index IBOV,IBXX,SMLL:1) (default: {settings.INDEX})."
     )
     parser.add_argument(
         "--segment", type=str, default=settings.SEGMENT,
         help="Segmento de mercado (default: %(default)s)."
     )
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("run", help="Coleta a carteira do dia (comando padrão).")
+    backfill_parser = subparsers.add_parser(
+        "backfill", help="Reconstrói partições históricas para um intervalo de pregões."
+    )
+    backfill_parser.add_argument(
+        "--start", type=date.fromisoformat, required=True,
+        help="Primeiro dia do intervalo (YYYY-MM-DD)."
+    )
+    backfill_parser.add_argument(
+        "--end", type=date.fromisoformat, default=date.today(),
+        help="Último dia do intervalo, inclusive (YYYY-MM-DD, default: hoje)."
+    )
+    backfill_parser.add_argument(
+        "--workers", type=int, default=settings.BACKFILL_WORKERS,
+        help="Pregões processados em paralelo (default: %(default)s)."
+    )
+    backfill_parser.add_argument(
+        "--executor", choices=("thread", "process"), default="thread",
+        help="Tipo de pool usado no backfill (default: %(default)s)."
+    )
+    backfill_parser.add_argument(
+        "--checkpoint", type=str, default=settings.BACKFILL_CHECKPOINT,
+        help="Arquivo de checkpoint para retomar o backfill (default: %(default)s)."
+    )
+    backfill_parser.add_argument(
+        "--force", action="store_true",
+        help="Regrava partições existentes e ignora o checkpoint."
+    )
+    compact_parser = subparsers.add_parser(
+        "compact", help="Compacta os arquivos Parquet de cada partição diária em um único arquivo."
+    )
+    compact_parser.add_argument(
+        "--start", type=date.fromisoformat, required=True,
+        help="Primeiro dia do intervalo (YYYY-MM-DD)."
+    )
+    compact_parser.add_argument(
+        "--end", type=date.fromisoformat, default=date.today(),
+        help="Último dia do intervalo, inclusive (YYYY-MM-DD, default: hoje)."
+    )
+    compact_parser.add_argument(
+        "--workers", type=int, default=settings.COMPACTION_WORKERS,
+        help="Partições compactadas em paralelo (default: %(default)s)."
+    )
+    refine_parser = subparsers.add_parser(
+        "refine", help="Gera a camada refined (agregação por ação/data) a partir das partições raw."
+    )
+    refine_parser.add_argument(
+        "--raw", type=str, default=None,
+        help="Raiz das partições raw, URI s3:// ou diretório local (default: s3://<S3_BUCKET>/<prefixo do índice>)."
+    )
+    refine_parser.add_argument(
+        "--refined", type=str, default=None,
+        help="Destino da camada refined, URI s3:// ou diretório local (default: REFINED_URI)."
+    )
+    refine_parser.add_argument(
+        "--full", action="store_true",
+        help="Reprocessa todas as partições raw, ignorando o estado incremental."
+    )
+    reprocess_parser = subparsers.add_parser(
+        "reprocess", help="Reconstrói partições a partir dos payloads arquivados, sem acessar a B3."
+    )
+    reprocess_parser.add_argument(
+        "--start", type=date.fromisoformat, required=True,
+        help="Primeiro dia do intervalo (YYYY-MM-DD)."
+    )
+    reprocess_parser.add_argument(
+        "--end", type=date.fromisoformat, default=date.today(),
+        help="Último dia do intervalo, inclusive (YYYY-MM-DD, default: hoje)."
+    )
+    reprocess_parser.add_argument(
+        "--workers", type=int, default=settings.BACKFILL_WORKERS,
+        help="Processos usados no reprocessamento (default: %(default)s)."
+    )
+    daemon_parser = subparsers.add_parser(
+        "daemon", help="Coleta continuamente durante o pregão, com intervalo adaptativo e /health e /metrics."
+    )
+    daemon_parser.add_argument(
+        "--min-interval", type=int, default=settings.DAEMON_MIN_INTERVAL,
+        help="Intervalo mínimo entre coletas de um índice, em segundos (default: %(default)s)."
+    )
+    daemon_parser.add_argument(
+        "--max-interval", type=int, default=settings.DAEMON_MAX_INTERVAL,
+        help="Intervalo máximo quando a carteira não muda, em segundos (default: %(default)s)."
+    )
+    daemon_parser.add_argument(
+        "--port", type=int, default=settings.DAEMON_HTTP_PORT,
+        help="Porta do /health e /metrics; 0 desabilita (default: %(default)s)."
+    )
+    spool_parser = subparsers.add_parser(
+        "spool", help="Envia ao backend as gravações pendentes do spool write-behind (SPOOL_DIR)."
+    )
+    spool_parser.add_argument(
+        "--timeout", type=float, default=None,
+        help="Espera máxima em segundos (default: até esvaziar)."
+    )
     args = parser.parse_args()
+    if args.stream and args.async_http:
+        # O streaming busca as páginas com o cliente síncrono: --rate-limit seria ignorado
+        parser.error("--stream não suporta --async-http (o limite de taxa não seria aplicado)")
+    if args.async_http and args.http_cache_dir:
+        # O cliente assíncrono não consulta o cache de respostas
+        parser.error("--async-http não suporta --http-cache-dir (o cache seria ignorado)")
+    timing.mark("settings + arguments")
 
-    # Configura logging
+    # Configura logging (uma única vez, aqui)
     if args.verbose:
         configure_logging(level="DEBUG")
     else:
         configure_logging()
+    timing.mark("logging")
 
     # Sobrescreve configurações se fornecidas via CLI
     settings.PAGE_SIZE = args.page_size
-    settings.INDEX = args.index
+    settings.FETCH_WORKERS = args.fetch_workers
+    settings.HTTP_CACHE_DIR = args.http_cache_dir
+    settings.HTTP_ASYNC = args.async_http
+    settings.HTTP_RATE_LIMIT = args.rate_limit
+    settings.STREAMING = args.stream
+    settings.STREAM_BATCH_SIZE = args.batch_size
     settings.SEGMENT = args.segment
+    from b3_scraper.application.orchestrator import parse_targets
+
+    targets = parse_targets(args.index or [settings.INDEX], default_segment=args.segment)
+    timing.mark("import application")
 
+    commands = {None: _run, "run": _run, "backfill": _backfill, "compact": _compact, "refine": _refine,
+                "reprocess": _reprocess, "daemon": _daemon, "spool": _spool}
+    recorder = instrumentation.start_run()
+    recorder.info["command"] = args.command or "run"
     try:
-        run()
+        if args.profile:
+            with instrumentation.profile(args.profile):
+                exit_code = commands[args.command](args, targets)
+        else:
+            exit_code = commands[args.command](args, targets)
     except Exception as e:
         logging.getLogger().error("Falha na execução: %s", e)
-        sys.exit(1)
+        exit_code = 1
+    if settings.SPOOL_DIR and args.command not in ("spool", "refine"):
+        # Dá ao uploader a chance de esvaziar o spool; o que restar segue no disco
+        from b3_scraper.application.orchestrator import drain_spool
+
+        try:
+            drain_spool(settings.SPOOL_DRAIN_TIMEOUT)
+        except Exception as e:
+            logging.getLogger().warning("Falha ao esvaziar o spool: %s", e)
+    recorder.info["exit_code"] = exit_code
+    try:
+        if args.report:
+            recorder.write_report(args.report)
+        if args.metrics_textfile:
+            recorder.write_prometheus(args.metrics_textfile)
+    except OSError as e:
+        logging.getLogger().warning("Não foi possível gravar as métricas da execução: %s", e)
+    for name, metrics in sorted(recorder.stages.items()):
+        logging.getLogger().debug("Stage %s: %s", name, metrics)
+    if args.timing:
+        timing.mark(f"command {args.command or 'run'}")
+        print(timing.report(), file=sys.stderr)
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
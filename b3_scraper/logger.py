@@ -14,6 +14,8 @@ BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
 def configure_logging(level: str = None):
     """
     Configura o logger root com handlers de console e arquivo.
+    Idempotente: chamadas repetidas substituem os handlers instalados anteriormente
+    (apenas ajustando o nível) em vez de duplicá-los.
     :param level: nível de log (ex.: 'DEBUG', 'INFO'). Se None, lê de LOG_LEVEL.
     """
     level = level or os.getenv("LOG_LEVEL", "INFO")
@@ -25,6 +27,9 @@ def configure_logging(level: str = None):
     # Configura o logger root
     logger = logging.getLogger()
     logger.setLevel(numeric_level)
+    for handler in [h for h in logger.handlers if getattr(h, "_b3_scraper", False)]:
+        logger.removeHandler(handler)
+        handler.close()
 
     # Formato padrão para todos os handlers
     formatter = logging.Formatter(
@@ -35,6 +40,7 @@ def configure_logging(level: str = None):
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(numeric_level)
     console_handler.setFormatter(formatter)
+    console_handler._b3_scraper = True
     logger.addHandler(console_handler)
 
     # Handler rotativo para arquivo
@@ -46,4 +52,5 @@ def configure_logging(level: str = None):
     )
     file_handler.setLevel(numeric_level)
     file_handler.setFormatter(formatter)
+    file_handler._b3_scraper = True
     logger.addHandler(file_handler)
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+benchmarks.bench_import
+Mede o tempo de importação da CLI em um interpretador limpo e falha (exit 1) se
+ultrapassar o orçamento ou se alguma dependência pesada for carregada na importação,
+ou se o caminho de coleta (orquestrador + Parser()) carregar algo além do cliente HTTP.
+Também executado pelo pytest (tests/test_import_budget.py).
+
+Uso:
+    python -m benchmarks.bench_import --budget-ms 250 --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+# Dependências que só podem ser carregadas pelos comandos que as usam
+FORBIDDEN = ("pyarrow", "numpy", "pandas", "boto3", "botocore", "requests", "aiohttp", "bs4", "lxml")
+# No caminho de coleta (orquestrador + Parser(), antes do fetch) só o cliente HTTP síncrono
+# é necessário; lxml/bs4 pertencem ao parse de HTML e aiohttp ao HTTP_ASYNC
+RUN_PATH_ALLOWED = ("requests",)
+# Raiz do repositório: a sonda importa b3_scraper a partir dela, qualquer que seja o cwd
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = (
+    "import json, sys, time\n"
+    "started = time.perf_counter()\n"
+    "import b3_scraper.interfaces.cli\n"
+    "elapsed = time.perf_counter() - started\n"
+    "print(json.dumps({'ms': elapsed * 1000, 'modules': sorted(sys.modules)}))\n"
+)
+
+RUN_PATH_PROBE = (
+    "import json, sys, time\n"
+    "started = time.perf_counter()\n"
+    "import b3_scraper.application.orchestrator\n"
+    "from b3_scraper.infrastructure.parser import Parser\n"
+    "Parser()\n"
+    "elapsed = time.perf_counter() - started\n"
+    "print(json.dumps({'ms': elapsed * 1000, 'modules': sorted(sys.modules)}))\n"
+)
+
+
+def measure(probe: str = _PROBE) -> dict:
+    """
+    Executa a sonda (default: importação da CLI) em um subprocesso novo e devolve o
+    tempo (ms) e os módulos carregados.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", probe], check=True, capture_output=True, text=True, cwd=_ROOT
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def heavy_modules(modules: List[str], allowed: Tuple[str, ...] = ()) -> List[str]:
+    """
+    Dependências de FORBIDDEN (exceto `allowed`) presentes em uma lista de módulos carregados.
+    """
+    return sorted({
+        name.split(".")[0] for name in modules
+        if name.split(".")[0] in FORBIDDEN and name.split(".")[0] not in allowed
+    })
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="Tempo máximo de importação (melhor execução).")
+    parser.add_argument("--repeat", type=int, default=5, help="Execuções; vale a mais rápida.")
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(max(1, args.repeat))]
+    best = min(run["ms"] for run in runs)
+    loaded = heavy_modules(runs[0]["modules"])
+    print(json.dumps({"module": "b3_scraper.interfaces.cli", "best_ms": round(best, 1),
+                      "budget_ms": args.budget_ms, "heavy_modules": loaded}))
+    if loaded:
+        print(f"Importação da CLI carregou dependências pesadas: {', '.join(loaded)}", file=sys.stderr)
+        return 1
+    if best > args.budget_ms:
+        print(f"Importação da CLI levou {best:.1f} ms (orçamento: {args.budget_ms:.1f} ms)", file=sys.stderr)
+        return 1
+
+    run_path = heavy_modules(measure(RUN_PATH_PROBE)["modules"], RUN_PATH_ALLOWED)
+    print(json.dumps({"module": "b3_scraper.application.orchestrator + Parser()", "heavy_modules": run_path}))
+    if run_path:
+        print(f"Caminho de coleta carregou dependências pesadas: {', '.join(run_path)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
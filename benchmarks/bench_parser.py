@@ -0,0 +1,58 @@
+"""
+benchmarks.bench_parser
+Compara os backends de Parser.parse em páginas "Carteira do Dia" sintéticas.
+
+Uso:
+    python -m benchmarks.bench_parser --rows 1000 10000 100000
+"""
+import argparse
+import json
+import time
+from typing import List
+
+from b3_scraper.infrastructure.parser import Parser
+
+from benchmarks.generators import synthetic_html
+
+
+def bench(backends: List[str], rows: int, repeat: int) -> List[dict]:
+    html = synthetic_html(rows)
+    results = []
+    reference = None
+    for backend in backends:
+        try:
+            parser = Parser(backend=backend)
+            parser.check()
+        except ImportError as e:
+            results.append({"backend": backend, "rows": rows, "error": str(e)})
+            continue
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            records = parser.parse(html)
+            timings.append(time.perf_counter() - start)
+        if reference is None:
+            reference = records
+        results.append({
+            "backend": parser.backend,
+            "rows": rows,
+            "best_s": min(timings),
+            "rows_per_s": rows / min(timings),
+            "same_output": records == reference,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de Parser.parse.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--backends", nargs="+", default=["bs4", "lxml", "stream"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for rows in args.rows:
+        for result in bench(args.backends, rows, args.repeat):
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
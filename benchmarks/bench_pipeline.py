@@ -0,0 +1,241 @@
+"""
+benchmarks.bench_pipeline
+Benchmarks das etapas do pipeline com cargas sintéticas (benchmarks.generators):
+- parse_html: Parser.parse sobre a "Carteira do Dia"
+- parse_json: Parser.parse_json sobre o GetPortfolioDay
+- serialize: serialização de Storage.save_records (tabela colunar + Parquet em memória)
+- save_records: Storage.save_records contra o S3 local (benchmarks.servers.S3Server)
+- load: Storage.load de uma partição gravada duas vezes (confere que cada ticker vem uma vez)
+- run: orchestrator.run() ponta a ponta contra o servidor B3 local e o S3 local
+- run_stream: idem, no modo streaming (STREAMING, Storage.save_stream)
+
+Cada resultado é uma linha JSON (com o commit atual), para acumular em um arquivo e
+comparar entre commits.
+
+Uso:
+    python -m benchmarks.bench_pipeline --rows 100 10000 1000000 --output results.jsonl
+    python -m benchmarks.bench_pipeline --compare results.jsonl --tolerance 0.25
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Credenciais/bucket fictícios: os benchmarks só falam com os servidores locais
+os.environ.setdefault("S3_BUCKET", "bench")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+os.environ.pop("AWS_ROLE_ARN", None)
+
+from b3_scraper.config import settings  # noqa: E402
+from b3_scraper.infrastructure.parser import Parser  # noqa: E402
+
+from benchmarks.generators import synthetic_html, synthetic_json  # noqa: E402
+from benchmarks.servers import B3Server, S3Server  # noqa: E402
+
+BENCHMARKS = ("parse_html", "parse_json", "serialize", "save_records", "load", "run", "run_stream")
+
+
+def _timed(function: Callable[[], object], repeat: int) -> Tuple[List[float], object]:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def _storage(s3: S3Server, skip_unchanged: bool = False):
+    from b3_scraper.infrastructure.storage import Storage
+
+    return Storage(
+        bucket=settings.S3_BUCKET,
+        region=settings.AWS_REGION,
+        prefix="bench/raw",
+        skip_unchanged=skip_unchanged,
+        endpoint_url=s3.url,
+    )
+
+
+def bench_parse_html(rows: int, repeat: int, **_) -> List[float]:
+    html = synthetic_html(rows)
+    parser = Parser()
+    return _timed(lambda: parser.parse(html), repeat)[0]
+
+
+def bench_parse_json(rows: int, repeat: int, **_) -> List[float]:
+    data = synthetic_json(rows)
+    parser = Parser()
+    return _timed(lambda: parser.parse_json(data), repeat)[0]
+
+
+def bench_serialize(rows: int, repeat: int, **_) -> List[float]:
+    import pyarrow.parquet as pq
+    from b3_scraper.infrastructure.columnar import table_from_records
+
+    records = Parser().parse_json(synthetic_json(rows))
+
+    def serialize() -> int:
+        buf = io.BytesIO()
+        pq.write_table(table_from_records(records), buf)
+        return buf.tell()
+
+    return _timed(serialize, repeat)[0]
+
+
+def bench_save_records(rows: int, repeat: int, s3: S3Server, **_) -> List[float]:
+    records = Parser().parse_json(synthetic_json(rows))
+    storage = _storage(s3)
+    return _timed(lambda: storage.save_records(records), repeat)[0]
+
+
+def bench_load(rows: int, repeat: int, s3: S3Server, **_) -> List[float]:
+    from datetime import date
+
+    from b3_scraper.infrastructure.columnar import table_from_records
+
+    table = table_from_records(Parser().parse_json(synthetic_json(rows)))
+    storage = _storage(s3)
+    prefix = f"bench/load/{rows}"
+    day = date.fromisoformat(str(table["record_date"][0].as_py()))
+    # Duas gravações da mesma partição (ex.: dois polls do daemon): dois arquivos Parquet
+    # (a chave tem resolução de segundos)
+    storage.save_table(table, prefix=prefix)
+    time.sleep(1)
+    storage.save_table(table, prefix=prefix)
+    timings, loaded = _timed(lambda: storage.load(day, day, prefix=prefix), repeat)
+    if loaded.num_rows != table.num_rows:
+        raise RuntimeError(f"load() devolveu {loaded.num_rows} linhas para {table.num_rows} registros gravados")
+    return timings
+
+
+def bench_run(rows: int, repeat: int, s3: S3Server, page_size: int, streaming: bool = False, **_) -> List[float]:
+    from b3_scraper.application import orchestrator
+
+    with B3Server(rows) as b3:
+        settings.STREAMING = streaming
+        settings.B3_BASE_URL = b3.url
+        settings.S3_ENDPOINT_URL = s3.url
+        settings.S3_PREFIX = "bench/run"
+        settings.PAGE_SIZE = page_size
+        settings.SKIP_UNCHANGED = False
+        settings.HTTP_CACHE_DIR = None
+        settings.TICKER_INDEX_DIR = None
+        timings, results = _timed(lambda: orchestrator.run([(settings.INDEX, settings.SEGMENT)]), repeat)
+    failed = [result for result in results if result.status == "failed"]
+    if failed:
+        raise RuntimeError(f"run() falhou: {failed}")
+    return timings
+
+
+def bench_run_stream(rows: int, repeat: int, s3: S3Server, page_size: int, **_) -> List[float]:
+    return bench_run(rows, repeat, s3, page_size, streaming=True)
+
+
+_FUNCTIONS = {
+    "parse_html": bench_parse_html,
+    "parse_json": bench_parse_json,
+    "serialize": bench_serialize,
+    "save_records": bench_save_records,
+    "load": bench_load,
+    "run": bench_run,
+    "run_stream": bench_run_stream,
+}
+
+
+def _environment() -> Dict[str, Optional[str]]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import pyarrow
+
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "pyarrow": pyarrow.__version__,
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+
+def compare(results: List[dict], baseline_path: str, tolerance: float) -> List[dict]:
+    """
+    Compara com a última medição de cada (benchmark, rows) do arquivo de referência.
+    :return: regressões (best_s acima de baseline * (1 + tolerance))
+    """
+    baseline: Dict[Tuple[str, int], dict] = {}
+    with open(baseline_path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                if "best_s" in entry:
+                    baseline[(entry["benchmark"], entry["rows"])] = entry
+    regressions = []
+    for result in results:
+        reference = baseline.get((result["benchmark"], result["rows"]))
+        if reference and "best_s" in result and result["best_s"] > reference["best_s"] * (1 + tolerance):
+            regressions.append({
+                "benchmark": result["benchmark"],
+                "rows": result["rows"],
+                "best_s": result["best_s"],
+                "baseline_s": reference["best_s"],
+                "baseline_commit": reference.get("commit"),
+                "ratio": round(result["best_s"] / reference["best_s"], 3),
+            })
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline com cargas sintéticas.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 10000])
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=settings.PAGE_SIZE,
+                        help="Registros por página do servidor B3 local no benchmark run.")
+    parser.add_argument("--output", type=str, help="Acrescenta os resultados (JSON lines) a este arquivo.")
+    parser.add_argument("--compare", type=str, help="Arquivo de resultados de referência (JSON lines).")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Regressão tolerada em relação à referência (default: %(default)s).")
+    args = parser.parse_args()
+
+    environment = _environment()
+    results = []
+    with S3Server() as s3:
+        for rows in args.rows:
+            for name in args.benchmarks:
+                result = {"benchmark": name, "rows": rows, "repeat": args.repeat, **environment}
+                try:
+                    timings = _FUNCTIONS[name](rows=rows, repeat=args.repeat, s3=s3, page_size=args.page_size)
+                    best = min(timings)
+                    result.update(
+                        best_s=round(best, 6),
+                        mean_s=round(sum(timings) / len(timings), 6),
+                        rows_per_s=round(rows / best, 1) if best else None,
+                    )
+                except Exception as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+                print(json.dumps(result), flush=True)
+                results.append(result)
+
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(result) + "\n" for result in results)
+    exit_code = 1 if any("error" in result for result in results) else 0
+    if args.compare:
+        for regression in compare(results, args.compare, args.tolerance):
+            print(json.dumps({"regression": regression}), file=sys.stderr)
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
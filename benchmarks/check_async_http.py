@@ -0,0 +1,191 @@
+"""
+benchmarks.check_async_http
+Verifica o AsyncHttpClient contra um servidor stub (aiohttp.web em 127.0.0.1) no mesmo
+event loop: retry em status do status_forcelist, espera por Retry-After, limites de taxa
+global e por host (token bucket), coalescência de GETs idênticos simultâneos e timeout por
+conexão/leitura (a espera na fila do pool não conta).
+Cada verificação vira uma linha JSON; falha (exit 1) se alguma não passar.
+
+Uso:
+    python -m benchmarks.check_async_http
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+from typing import Callable, List, Tuple
+
+from b3_scraper.infrastructure.async_http_client import AsyncHttpClient
+
+
+def _app(hits: Counter):
+    from aiohttp import web
+
+    async def flaky(request):
+        # 503 nas duas primeiras tentativas de cada chave
+        key = request.match_info["key"]
+        hits[f"flaky/{key}"] += 1
+        if hits[f"flaky/{key}"] <= 2:
+            return web.Response(status=503)
+        return web.Response(text="ok")
+
+    async def broken(request):
+        hits["broken"] += 1
+        return web.Response(status=500)
+
+    async def throttled(request):
+        hits["throttled"] += 1
+        if hits["throttled"] == 1:
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        return web.Response(text="ok")
+
+    async def slow(request):
+        hits["slow"] += 1
+        await asyncio.sleep(0.2)
+        return web.Response(text=request.query.get("page", ""))
+
+    async def queued(request):
+        hits["queued"] += 1
+        await asyncio.sleep(0.4)
+        return web.Response(text=request.query.get("n", ""))
+
+    async def ok(request):
+        hits["ok"] += 1
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/flaky/{key}", flaky)
+    app.router.add_get("/broken", broken)
+    app.router.add_get("/throttled", throttled)
+    app.router.add_get("/slow", slow)
+    app.router.add_get("/queued", queued)
+    app.router.add_get("/ok", ok)
+    return app
+
+
+async def check_retry(url: str, hits: Counter) -> dict:
+    async with AsyncHttpClient(timeout=5, max_retries=3, backoff_factor=0.01, status_forcelist=frozenset({503})) as client:
+        body = await client.get(url + "flaky/a")
+    return {"passed": body == "ok" and hits["flaky/a"] == 3, "requests": hits["flaky/a"]}
+
+
+async def check_retry_exhausted(url: str, hits: Counter) -> dict:
+    import aiohttp
+
+    async with AsyncHttpClient(timeout=5, max_retries=2, backoff_factor=0.01, status_forcelist=frozenset({500})) as client:
+        try:
+            await client.get(url + "broken")
+            raised = False
+        except aiohttp.ClientResponseError as e:
+            raised = e.status == 500
+    return {"passed": raised and hits["broken"] == 3, "requests": hits["broken"]}
+
+
+async def check_retry_after(url: str, hits: Counter) -> dict:
+    async with AsyncHttpClient(timeout=5, max_retries=2, backoff_factor=0.01, status_forcelist=frozenset({429})) as client:
+        started = time.perf_counter()
+        body = await client.get(url + "throttled")
+        elapsed = time.perf_counter() - started
+    return {"passed": body == "ok" and hits["throttled"] == 2 and elapsed >= 0.9, "seconds": round(elapsed, 3)}
+
+
+async def check_rate_limit(url: str, hits: Counter) -> dict:
+    # 5 req/s com rajada de 2: 10 GETs distintos levam pelo menos (10 - 2) / 5 = 1,6 s
+    async with AsyncHttpClient(timeout=5, rate_limit=5, rate_burst=2) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client.get(url + "ok", params={"n": n}) for n in range(10)))
+        elapsed = time.perf_counter() - started
+    return {"passed": hits["ok"] == 10 and 1.5 <= elapsed < 3.0, "seconds": round(elapsed, 3)}
+
+
+async def check_host_rate_limit(url: str, hits: Counter) -> dict:
+    # O limite é por host: "localhost" e "127.0.0.1" têm baldes próprios
+    other = url.replace("127.0.0.1", "localhost")
+    async with AsyncHttpClient(timeout=5, host_rate_limit=5, host_rate_burst=1) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            client.get(base + "ok", params={"n": n}) for base in (url, other) for n in range(6)
+        ))
+        elapsed = time.perf_counter() - started
+    return {"passed": hits["ok"] == 12 and 0.9 <= elapsed < 2.0, "seconds": round(elapsed, 3)}
+
+
+async def check_coalescing(url: str, hits: Counter) -> dict:
+    async with AsyncHttpClient(timeout=5) as client:
+        same = await asyncio.gather(*(client.get(url + "slow", params={"page": 1}) for _ in range(10)))
+        coalesced = hits["slow"]
+        distinct = await asyncio.gather(*(client.get(url + "slow", params={"page": n}) for n in range(3)))
+    return {
+        "passed": coalesced == 1 and same == ["1"] * 10 and distinct == ["0", "1", "2"] and hits["slow"] == 4,
+        "requests": hits["slow"],
+    }
+
+
+async def check_pool_queue(url: str, hits: Counter) -> dict:
+    # 8 GETs de 0,4 s em 2 conexões: ~1,6 s no total, acima do timeout de 1 s, mas cada
+    # requisição, depois de obter a conexão, responde dentro do timeout
+    async with AsyncHttpClient(timeout=1, max_retries=0, pool_maxsize=2) as client:
+        started = time.perf_counter()
+        bodies = await asyncio.gather(*(client.get(url + "queued", params={"n": n}) for n in range(8)))
+        elapsed = time.perf_counter() - started
+    return {
+        "passed": bodies == [str(n) for n in range(8)] and hits["queued"] == 8 and elapsed > 1.0,
+        "seconds": round(elapsed, 3),
+    }
+
+
+CHECKS: List[Tuple[str, Callable]] = [
+    ("retry", check_retry),
+    ("retry_exhausted", check_retry_exhausted),
+    ("retry_after", check_retry_after),
+    ("rate_limit", check_rate_limit),
+    ("host_rate_limit", check_host_rate_limit),
+    ("coalescing", check_coalescing),
+    ("pool_queue", check_pool_queue),
+]
+
+
+async def run_checks(names: List[str]) -> List[dict]:
+    """
+    Executa as verificações escolhidas, cada uma com um servidor stub novo.
+    """
+    from aiohttp import web
+
+    results = []
+    for name, check in CHECKS:
+        if name not in names:
+            continue
+        hits: Counter = Counter()
+        runner = web.AppRunner(_app(hits))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            result = await check(f"http://127.0.0.1:{port}/", hits)
+        except Exception as e:
+            result = {"passed": False, "error": repr(e)}
+        finally:
+            await runner.cleanup()
+        results.append({"check": name, **result})
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--checks", nargs="+", default=[name for name, _ in CHECKS],
+        choices=[name for name, _ in CHECKS], help="Verificações a executar (default: todas)."
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run_checks(args.checks))
+    for result in results:
+        print(json.dumps(result))
+    return 0 if all(result["passed"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+benchmarks.generators
+Geradores de cargas sintéticas com a estrutura real da B3: JSON do GetPortfolioDay e
+HTML da "Carteira do Dia", com números no formato brasileiro ("1.234.567", "12,345").
+São determinísticos (seed) e escalam de 100 a 1.000.000 de linhas.
+"""
+import random
+from datetime import date
+from typing import Dict, Iterator, List, Optional
+
+# Data do pregão usada por padrão nas cargas sintéticas
+DEFAULT_DATE = date(2025, 7, 18)
+
+_TYPES = ("ON  NM", "PN  N1", "UNT N2", "ON  ED NM", "PNA N1")
+
+
+def _br_number(value: float, decimals: int) -> str:
+    # Formatação brasileira: milhar com "." e decimais com ","
+    text = f"{value:,.{decimals}f}"
+    return text.replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def synthetic_rows(rows: int, seed: int = 42) -> Iterator[Dict[str, str]]:
+    """
+    Linhas da carteira (código, ação, tipo, quantidade teórica e participação formatadas).
+    """
+    rnd = random.Random(seed)
+    for i in range(rows):
+        yield {
+            "cod": f"T{i:06d}3",
+            "asset": f"EMPRESA {i} S&A",
+            "type": _TYPES[i % len(_TYPES)],
+            "theoricalQty": _br_number(rnd.uniform(1e6, 5e9), 0),
+            "part": _br_number(rnd.uniform(0, 15), 3),
+        }
+
+
+def synthetic_results(rows: int, seed: int = 42) -> List[dict]:
+    """
+    Itens "results" do GetPortfolioDay.
+    """
+    return [
+        {"segment": None, "partAcum": None, **row}
+        for row in synthetic_rows(rows, seed)
+    ]
+
+
+def synthetic_json(
+    rows: int,
+    page_number: int = 1,
+    page_size: Optional[int] = None,
+    record_date: date = DEFAULT_DATE,
+    seed: int = 42,
+    results: Optional[List[dict]] = None,
+) -> dict:
+    """
+    Resposta do GetPortfolioDay para uma página de uma carteira com `rows` linhas.
+    :param page_size: linhas por página (default: todas em uma página)
+    :param results: itens já gerados (evita regerar a carteira a cada página)
+    """
+    results = results if results is not None else synthetic_results(rows, seed)
+    page_size = page_size or max(rows, 1)
+    total_pages = max(1, -(-rows // page_size))
+    return {
+        "page": {
+            "pageNumber": page_number,
+            "pageSize": page_size,
+            "totalRecords": rows,
+            "totalPages": total_pages,
+        },
+        "header": {
+            "date": record_date.strftime("%d/%m/%y"),
+            "text": "Quantidade Teórica Total",
+            "part": "100,000",
+            "partAcum": None,
+            "textReductor": "Redutor",
+            "reductor": _br_number(15_000_000.123, 3),
+            "theoricalQty": _br_number(rows * 1e8, 0),
+        },
+        "results": results[(page_number - 1) * page_size: page_number * page_size],
+    }
+
+
+def synthetic_html(rows: int, seed: int = 42, record_date: date = DEFAULT_DATE) -> str:
+    """
+    Gera uma página com a estrutura da "Carteira do Dia" da B3 contendo `rows` linhas.
+    """
+    body = [
+        "<tr>"
+        f"<td> <a href='#'>{row['cod']}</a> </td>"
+        f"<td>{row['asset'].replace('&', '&amp;')}</td>"
+        f"<td>{row['type'][:3]} <span>{row['type'][3:].strip()}</span></td>"
+        f"<td>{row['theoricalQty']}</td>"
+        f"<td>{row['part']}</td>"
+        "</tr>\n"
+        for row in synthetic_rows(rows, seed)
+    ]
+    return (
+        "<html><head><title>B3</title></head><body>"
+        f"<h2>Carteira do Dia - <!-- data --> {record_date.strftime('%d/%m/%y')}</h2>"
+        "<table class='table'>"
+        "<thead><tr><th>Código</th><th>Ação</th><th>Tipo</th>"
+        "<th>Qtde. Teórica</th><th>Part. (%)</th></tr></thead>"
+        f"<tbody>\n{''.join(body)}</tbody>"
+        "<tfoot><tr><td>Quantidade Teórica Total</td><td>1.000</td></tr></tfoot>"
+        "</table></body></html>"
+    )
@@ -0,0 +1,288 @@
+"""
+benchmarks.servers
+Servidores locais para os benchmarks ponta a ponta, em threads do próprio processo:
+- B3Server: responde ao GetPortfolioDay (payload base64 no caminho) com carteiras sintéticas;
+- S3Server: subconjunto em memória da API S3 usado pelo Storage (PUT/GET/HEAD/DELETE,
+  ListObjectsV2, DeleteObjects e upload multipart), com endereçamento por caminho.
+"""
+import base64
+import hashlib
+import json
+import threading
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.sax.saxutils import escape, unescape
+
+from benchmarks.generators import synthetic_json, synthetic_results
+
+
+class _Server:
+    """
+    Servidor HTTP em thread daemon; use como context manager.
+    """
+    handler = BaseHTTPRequestHandler
+
+    def __init__(self):
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self.handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}/"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: Dict[str, str] = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+
+class _B3Handler(_QuietHandler):
+    def do_GET(self):
+        try:
+            encoded = urlsplit(self.path).path.rsplit("/", 1)[-1]
+            payload = json.loads(base64.b64decode(unquote(encoded)))
+        except ValueError:
+            self._send(400)
+            return
+        body = json.dumps(self.server.owner.page(
+            payload.get("index", "IBOV"), int(payload["pageNumber"]), int(payload["pageSize"])
+        )).encode("utf-8")
+        self._send(200, body, {"Content-Type": "application/json"})
+
+
+class B3Server(_Server):
+    """
+    Simula o endpoint JSON da B3 com uma carteira de `rows` linhas por índice.
+    """
+    handler = _B3Handler
+
+    def __init__(self, rows: int):
+        super().__init__()
+        self.rows = rows
+        self._lock = threading.Lock()
+        self._results: Dict[str, List[dict]] = {}
+
+    def page(self, index: str, page_number: int, page_size: int) -> dict:
+        with self._lock:
+            if index not in self._results:
+                self._results[index] = synthetic_results(self.rows, seed=zlib.crc32(index.encode("utf-8")))
+        return synthetic_json(self.rows, page_number, page_size, results=self._results[index])
+
+
+def _decode_aws_chunked(body: bytes) -> bytes:
+    # Corpo "aws-chunked" (checksums em trailer do botocore): "<hex>[;ext]\r\n<dados>\r\n"... "0\r\n"
+    data = bytearray()
+    position = 0
+    while True:
+        line_end = body.index(b"\r\n", position)
+        size = int(body[position:line_end].split(b";")[0], 16)
+        if size == 0:
+            return bytes(data)
+        data += body[line_end + 2:line_end + 2 + size]
+        position = line_end + 2 + size + 2
+
+
+class _S3Handler(_QuietHandler):
+    def _target(self) -> Tuple[str, str, Dict[str, List[str]]]:
+        parts = urlsplit(self.path)
+        bucket, _, key = parts.path.lstrip("/").partition("/")
+        return unquote(bucket), unquote(key), parse_qs(parts.query, keep_blank_values=True)
+
+    def _body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    while self.rfile.readline() not in (b"\r\n", b""):
+                        pass
+                    break
+                body += self.rfile.read(size)
+                self.rfile.readline()
+            raw = bytes(body)
+        else:
+            raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if "aws-chunked" in self.headers.get("Content-Encoding", ""):
+            return _decode_aws_chunked(raw)
+        return raw
+
+    def _error(self, status: int, code: str) -> None:
+        body = f"<?xml version='1.0' encoding='UTF-8'?><Error><Code>{code}</Code></Error>".encode()
+        self._send(status, body, {"Content-Type": "application/xml"})
+
+    def do_PUT(self):
+        bucket, key, query = self._target()
+        body = self._body()
+        store = self.server.owner
+        if "uploadId" in query:
+            etag = store.put_part(query["uploadId"][0], int(query["partNumber"][0]), body)
+        elif not key:
+            self._send(200)
+            return
+        else:
+            etag = store.put(bucket, key, body)
+        self._send(200, headers={"ETag": etag})
+
+    def do_GET(self):
+        bucket, key, query = self._target()
+        store = self.server.owner
+        if not key:
+            self._send(200, store.list_xml(bucket, query), {"Content-Type": "application/xml"})
+            return
+        found = store.get(bucket, key)
+        if found is None:
+            self._error(404, "NoSuchKey")
+            return
+        self._send(200, found[0], {"ETag": found[1], "Content-Type": "application/octet-stream"})
+
+    def do_HEAD(self):
+        bucket, key, _ = self._target()
+        found = self.server.owner.get(bucket, key)
+        if found is None:
+            self._send(404)
+            return
+        self.send_response(200)
+        self.send_header("ETag", found[1])
+        self.send_header("Content-Length", str(len(found[0])))
+        self.end_headers()
+
+    def do_DELETE(self):
+        bucket, key, query = self._target()
+        if "uploadId" in query:
+            self.server.owner.abort(query["uploadId"][0])
+        else:
+            self.server.owner.delete(bucket, [key])
+        self._send(204)
+
+    def do_POST(self):
+        bucket, key, query = self._target()
+        body = self._body()
+        store = self.server.owner
+        if "delete" in query:
+            keys = [unescape(item) for item in _xml_values(body, "Key")]
+            store.delete(bucket, keys)
+            xml = "<?xml version='1.0' encoding='UTF-8'?><DeleteResult></DeleteResult>"
+        elif "uploads" in query:
+            upload_id = store.create_upload(bucket, key)
+            xml = ("<?xml version='1.0' encoding='UTF-8'?><InitiateMultipartUploadResult>"
+                   f"<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+                   f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>")
+        elif "uploadId" in query:
+            etag = store.complete_upload(query["uploadId"][0])
+            xml = ("<?xml version='1.0' encoding='UTF-8'?><CompleteMultipartUploadResult>"
+                   f"<Bucket>{escape(bucket)}</Bucket><Key>{escape(key)}</Key>"
+                   f"<ETag>{escape(etag)}</ETag></CompleteMultipartUploadResult>")
+        else:
+            self._error(400, "InvalidRequest")
+            return
+        self._send(200, xml.encode("utf-8"), {"Content-Type": "application/xml"})
+
+
+def _xml_values(body: bytes, tag: str) -> List[str]:
+    text = body.decode("utf-8")
+    values = []
+    start = text.find(f"<{tag}>")
+    while start != -1:
+        end = text.index(f"</{tag}>", start)
+        values.append(text[start + len(tag) + 2:end])
+        start = text.find(f"<{tag}>", end)
+    return values
+
+
+class S3Server(_Server):
+    """
+    Stand-in do S3 em memória. Aponte S3_ENDPOINT_URL (ou Storage(endpoint_url=...)) para `url`.
+    """
+    handler = _S3Handler
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self.objects: Dict[Tuple[str, str], Tuple[bytes, str, datetime]] = {}
+        self._uploads: Dict[str, Tuple[str, str, Dict[int, bytes]]] = {}
+        self.bytes_received = 0
+
+    def put(self, bucket: str, key: str, body: bytes) -> str:
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        with self._lock:
+            self.objects[(bucket, key)] = (body, etag, datetime.now(timezone.utc))
+            self.bytes_received += len(body)
+        return etag
+
+    def get(self, bucket: str, key: str):
+        with self._lock:
+            found = self.objects.get((bucket, key))
+        return (found[0], found[1]) if found else None
+
+    def delete(self, bucket: str, keys: List[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self.objects.pop((bucket, key), None)
+
+    def create_upload(self, bucket: str, key: str) -> str:
+        upload_id = hashlib.sha1(f"{bucket}/{key}/{datetime.now().timestamp()}".encode()).hexdigest()
+        with self._lock:
+            self._uploads[upload_id] = (bucket, key, {})
+        return upload_id
+
+    def put_part(self, upload_id: str, number: int, body: bytes) -> str:
+        with self._lock:
+            self._uploads[upload_id][2][number] = body
+        return f'"{hashlib.md5(body).hexdigest()}"'
+
+    def complete_upload(self, upload_id: str) -> str:
+        with self._lock:
+            bucket, key, parts = self._uploads.pop(upload_id)
+        return self.put(bucket, key, b"".join(parts[number] for number in sorted(parts)))
+
+    def abort(self, upload_id: str) -> None:
+        with self._lock:
+            self._uploads.pop(upload_id, None)
+
+    def list_xml(self, bucket: str, query: Dict[str, List[str]]) -> bytes:
+        prefix = query.get("prefix", [""])[0]
+        max_keys = int(query.get("max-keys", ["1000"])[0])
+        after = query.get("continuation-token", query.get("start-after", [""]))[0]
+        with self._lock:
+            keys = sorted(
+                (key, body, etag, modified) for (b, key), (body, etag, modified) in self.objects.items()
+                if b == bucket and key.startswith(prefix) and key > after
+            )
+        page, truncated = keys[:max_keys], len(keys) > max_keys
+        contents = "".join(
+            f"<Contents><Key>{escape(key)}</Key><Size>{len(body)}</Size><ETag>{escape(etag)}</ETag>"
+            f"<LastModified>{modified.strftime('%Y-%m-%dT%H:%M:%S.000Z')}</LastModified></Contents>"
+            for key, body, etag, modified in page
+        )
+        token = f"<NextContinuationToken>{escape(page[-1][0])}</NextContinuationToken>" if truncated else ""
+        return (
+            "<?xml version='1.0' encoding='UTF-8'?>"
+            "<ListBucketResult xmlns='http://s3.amazonaws.com/doc/2006-03-01/'>"
+            f"<Name>{escape(bucket)}</Name><Prefix>{escape(prefix)}</Prefix><KeyCount>{len(page)}</KeyCount>"
+            f"<MaxKeys>{max_keys}</MaxKeys><IsTruncated>{'true' if truncated else 'false'}</IsTruncated>"
+            f"{contents}{token}</ListBucketResult>"
+        ).encode("utf-8")
@@ -0,0 +1,28 @@
+"""
+tests.test_import_budget
+Regressão do custo de importação (ver benchmarks.bench_import): a CLI não carrega
+dependências pesadas e cabe no orçamento; o caminho de coleta (orquestrador + Parser())
+não carrega lxml/bs4/aiohttp/pyarrow/boto3.
+"""
+import pytest
+
+from benchmarks.bench_import import RUN_PATH_ALLOWED, RUN_PATH_PROBE, heavy_modules, measure
+
+BUDGET_MS = 250.0
+
+
+@pytest.fixture(autouse=True)
+def required_settings(monkeypatch):
+    # Campos obrigatórios do Settings; os valores não são usados
+    for name in ("S3_BUCKET", "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        monkeypatch.setenv(name, "test")
+
+
+def test_cli_import_is_light_and_within_budget():
+    runs = [measure() for _ in range(3)]
+    assert heavy_modules(runs[0]["modules"]) == []
+    assert min(run["ms"] for run in runs) <= BUDGET_MS
+
+
+def test_run_path_does_not_load_optional_dependencies():
+    assert heavy_modules(measure(RUN_PATH_PROBE)["modules"], RUN_PATH_ALLOWED) == []